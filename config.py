@@ -1,5 +1,9 @@
 import os
 from pathlib import Path
+from dotenv import load_dotenv
+
+# So DB_* settings can live in .env like the connection settings
+load_dotenv()
 
 PROJECT_ROOT = Path(__file__).parent
 
@@ -7,6 +11,7 @@ DATA_DIR = PROJECT_ROOT / 'data'
 RAW_DATA_DIR = DATA_DIR / 'raw'
 PROCESSED_DATA_DIR = DATA_DIR / 'processed'
 VALIDATION_DATA_DIR = DATA_DIR / 'validation'
+REPLAY_DATA_DIR = DATA_DIR / 'replay'
 
 SQL_DIR = PROJECT_ROOT / 'sql'
 SCHEMA_DIR = SQL_DIR / 'schema'
@@ -17,8 +22,11 @@ LOGS_DIR = PROJECT_ROOT / 'logs'
 for dir in [DATA_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, LOGS_DIR]:
     dir.mkdir(parents=True, exist_ok=True)
 
-DB_POOL_SIZE = 5
-DB_MAX_OVERFLOW = 10
-DB_POOL_TIMEOUT = 30
-DB_POOL_RECYCLE = 3600
+# Connection pool settings for src/utils/db_connection.py, overridable from the environment/.env
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 3600))
+# Set when connecting through pgbouncer (transaction pooling): no client-side pool
+DB_PGBOUNCER = os.getenv('DB_PGBOUNCER', '').lower() in ('1', 'true', 'yes')
 DB_BATCH_SIZE = 1000
\ No newline at end of file
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from dotenv import load_dotenv
+
+from config import LOGS_DIR
+from src.etl.backfill import parse_seasons, parse_season_types, plan_backfill, run_backfill
+from src.utils.db_connection import get_engine
+from src.utils.log_setup import setup_logging, output_logger
+from src.utils.rate_limit import SharedRateLimiter
+from src.utils.stats_api import set_request_limiter
+
+# Loads many seasons of history, e.g.
+#   python scripts/backfill.py --seasons 2015-16:2024-25 --types regular,playoffs,playin --workers 3
+# Reruns resume from the work queue; --plan-only just prints the request plan.
+
+out = output_logger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Backfill several NBA seasons in parallel under one API rate budget')
+    parser.add_argument('--seasons', type=str, required=True,
+                        help="Season range or list, e.g. '2015-16:2024-25' or '2019-20,2021-22'")
+    parser.add_argument('--types', type=str, default='regular,playoffs,playin',
+                        help='Comma separated season types: preseason, regular, allstar, playoffs, playin')
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes (one season each at a time)')
+    parser.add_argument('--requests-per-minute', type=int, default=20, help='API request budget shared by all workers')
+    parser.add_argument('--queue', type=str, default=None, help='Work queue SQLite file (default data/processed/etl_queue.sqlite)')
+    parser.add_argument('--retry-failed', action='store_true', help='Retry games that ran out of attempts on earlier runs')
+    parser.add_argument('--report-every', type=int, default=60, help='Seconds between progress lines')
+    parser.add_argument('--plan-only', action='store_true', help='Print the plan and exit')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    # Worker processes log through this process's queue, so one listener writes the log file
+    setup_logging(LOGS_DIR / 'etl_pipeline.jsonl', multiprocess=True)
+    load_dotenv()
+    seasons = parse_seasons(args.seasons)
+    season_types = parse_season_types(args.types)
+
+    out.info("="*70)
+    out.info(f"BACKFILL PLAN: {seasons[0]} to {seasons[-1]} ({', '.join(season_types)})")
+    out.info("="*70)
+
+    # Schedule requests made while planning count against the same budget
+    set_request_limiter(SharedRateLimiter(requests_per_minute=args.requests_per_minute))
+    engine = get_engine()
+    try:
+        plan = plan_backfill(engine, seasons, season_types, args.requests_per_minute)
+    finally:
+        engine.dispose()
+    set_request_limiter(None)
+
+    out.info(plan.to_string(index=False))
+    total_games = int(plan['pending'].sum())
+    total_requests = int(plan['requests'].sum())
+    out.info(f"\nTotal: {total_games} games to load, ~{total_requests} requests "
+             f"(+1 per new player), ~{total_requests / args.requests_per_minute / 60:.1f}h at {args.requests_per_minute} requests/min")
+
+    if args.plan_only or total_games == 0:
+        return 0
+
+    seasons = plan.loc[plan['pending'] > 0, 'season'].tolist()
+    results = run_backfill(seasons, season_types, workers=args.workers, requests_per_minute=args.requests_per_minute,
+                           queue_path=args.queue, retry_failed=args.retry_failed, total_games=total_games,
+                           report_every=args.report_every)
+
+    failed = [season for season, success in results.items() if not success]
+    if failed:
+        out.error(f"[ERROR] Backfill incomplete for: {', '.join(failed)}")
+        return 1
+    out.info("[OK] Backfill complete")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
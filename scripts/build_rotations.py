@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from config import PROCESSED_DATA_DIR
+from src.etl.backfill import parse_seasons
+from src.utils.rotations import export_rotations, open_rotations, stored_seasons
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Builds the bit-packed rotation matrices of every team-season (src/utils/rotations.py)
+# from lineup_stints, skipping seasons whose stints did not change since the last build:
+#   python scripts/build_rotations.py --seasons 2023-24:2024-25
+#   python scripts/build_rotations.py --seasons 2024-25 --show 1610612754
+# --show prints a team's minutes per quarter and a rotation heatmap from the store
+# without touching the database. In a notebook:
+#   team = open_rotations('data/processed/rotations', '2024-25').team(1610612754)
+#   team.heatmap(), team.lineup_minutes(), team.substitutions(), team.stagger(a, b)
+
+# Darker = on the court in more of the games
+SHADES = ' .:-=+*#%@'
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Build per team-season on-court matrices from lineup_stints')
+    parser.add_argument('--seasons', type=str, required=True, help="Season range or list, e.g. '2015-16:2024-25' or '2024-25'")
+    parser.add_argument('--out', type=str, default=str(PROCESSED_DATA_DIR / 'rotations'), help='Store directory (one subdirectory per season)')
+    parser.add_argument('--force', action='store_true', help='Rebuild seasons whose stints did not change')
+    parser.add_argument('--show', type=int, default=None, metavar='TEAM_ID', help="Print this team's rotation from the store and skip the build")
+    parser.add_argument('--bucket', type=int, default=120, help='Heatmap resolution in game seconds (default 120)')
+    return parser.parse_args()
+
+def show_team(directory, season, team_id, bucket):
+    team = open_rotations(directory, season).team(team_id)
+    out.info("="*70)
+    out.info(f"ROTATION {team_id} {season} ({len(team.game_ids)} games, {len(team.player_ids)} players)")
+    out.info("="*70)
+    minutes = team.minutes().pivot(index='player_id', columns='period', values='minutes_per_game').fillna(0)
+    minutes['total'] = team.minutes().groupby('player_id')['minutes'].sum() / len(team.game_ids)
+    minutes = minutes.sort_values('total', ascending=False)
+    out.info("Minutes per game played, by period (total: per team game)")
+    out.info(minutes.round(1).to_string())
+
+    heatmap = team.heatmap(bucket).loc[minutes.index]
+    out.info(f"\nOn the court, share of games per {bucket}s of game time ('{SHADES}' = 0..100%)")
+    for player_id, shares in heatmap.iterrows():
+        line = ''.join(SHADES[min(int(share * len(SHADES)), len(SHADES) - 1)] for share in shares.fillna(0))
+        out.info(f"{player_id:>10} |{line}|")
+
+    lineups = team.lineup_minutes(by_period=False).head(10)
+    out.info("\nTop lineups by minutes")
+    out.info(lineups.round(1).to_string(index=False))
+
+def main():
+    args = parse_args()
+    setup_logging()
+    seasons = parse_seasons(args.seasons)
+
+    if args.show is not None:
+        available = [season for season in seasons if season in stored_seasons(args.out)]
+        if not available:
+            out.error(f"[ERROR] No rotations for {', '.join(seasons)} in {args.out}, build them first")
+            return 1
+        for season in available:
+            show_team(args.out, season, args.show, args.bucket)
+        return 0
+
+    out.info("="*70)
+    out.info(f"BUILDING ROTATIONS: {seasons[0]} to {seasons[-1]} -> {args.out}")
+    out.info("="*70)
+    from src.utils.db_connection import get_engine
+    engine = get_engine()
+    try:
+        start = time.perf_counter()
+        results = export_rotations(engine, args.out, seasons, force=args.force)
+    except Exception as e:
+        out.error(f"[ERROR] Build failed: {e}")
+        return 1
+    finally:
+        engine.dispose()
+
+    for season, status in results.items():
+        if status == 'built':
+            meta = open_rotations(args.out, season).meta
+            out.info(f"  {season}  built      {meta['teams']} teams, {meta['games']} games, {meta['bytes'] / 1e6:.1f} MB")
+        else:
+            out.info(f"  {season}  {status}")
+    out.info(f"[OK] {sum(1 for status in results.values() if status == 'built')} season(s) built in {time.perf_counter() - start:.1f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,27 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from nba_api.stats.endpoints import gamerotation
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+def main():
+    setup_logging()
+    rotation = gamerotation.GameRotation('0042400407')
+    dfs = rotation.get_data_frames()
 
-rotation = gamerotation.GameRotation('0042400407')
-dfs = rotation.get_data_frames()
+    out.info(f'Number of dataframes returned: {len(dfs)}')
 
-print(f'Number of dataframes returned: {len(dfs)}')
+    for i, df in enumerate(dfs):
+        out.info(f'\nDataFrame {i}:')
+        out.info(f'  Shape: {df.shape}')
+        out.info(f'  Columns: {list(df.columns)}')
+        if 'TEAM_ID' in df.columns:
+            out.info(f'  Unique TEAM_IDs: {df["TEAM_ID"].unique()}')
+            out.info(f'  Row count by team: {df["TEAM_ID"].value_counts().to_dict()}')
+    return 0
 
-for i, df in enumerate(dfs):
-    print(f'\nDataFrame {i}:')
-    print(f'  Shape: {df.shape}')
-    print(f'  Columns: {list(df.columns)}')
-    if 'TEAM_ID' in df.columns:
-        print(f'  Unique TEAM_IDs: {df["TEAM_ID"].unique()}')
-        print(f'  Row count by team: {df["TEAM_ID"].value_counts().to_dict()}')
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import glob
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Fails (exit 1) when a script does work at import or the CLI starts slowly:
+#   - every scripts/*.py is imported in a fresh interpreter with the network
+#     blocked; the import must not open a socket (API calls, database),
+#     create an engine or set logging up, all of which belong in main()
+#   - `nba_etl.py <subcommand> --help` must not load HEAVY_MODULES and its
+#     median start time must stay under the budget
+#   python scripts/check_startup.py
+#   python scripts/check_startup.py --budget-ms 200 --rounds 10
+# scripts/run_benchmarks.py records the same start times with the other cases.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, 'scripts')
+CLI = os.path.join(SCRIPTS_DIR, 'nba_etl.py')
+STARTUP_BUDGET_MS = 300
+HEAVY_MODULES = ['pandas', 'numpy', 'sqlalchemy', 'nba_api']
+
+# CLI commands whose startup time is budgeted: --help builds the full parser but
+# must not pull in pandas, SQLAlchemy or nba_api
+STARTUP_COMMANDS = [['--help'],
+                    ['ingest', '--help'],
+                    ['reload-stints', '--help'],
+                    ['fix-players', '--help'],
+                    ['views', '--help'],
+                    ['quarantine', '--help'],
+                    ['live', '--help'],
+                    ['migrate', '--help'],
+                    ['status', '--help']]
+
+# Runs in the child: blocks sockets, imports one script, reports what the import did
+IMPORT_PROBE = """
+import importlib, json, socket, sys
+sys.path.insert(0, {scripts_dir!r})
+connections = []
+def blocked(*args, **kwargs):
+    connections.append(repr(args[1:] if args and isinstance(args[0], socket.socket) else args)[:80])
+    raise OSError('network blocked by check_startup')
+socket.socket.connect = blocked
+socket.create_connection = blocked
+socket.getaddrinfo = blocked
+error = None
+try:
+    importlib.import_module({module!r})
+except BaseException as e:
+    error = f'{{type(e).__name__}}: {{e}}'
+log_setup = sys.modules.get('src.utils.log_setup')
+db_connection = sys.modules.get('src.utils.db_connection')
+with open({report!r}, 'w') as f:
+    json.dump({{'error': error, 'connections': connections,
+               'logging': bool(log_setup and log_setup._listener is not None),
+               'engines': sorted(db_connection._engines) if db_connection else []}}, f)
+"""
+
+# Runs in the child: the CLI's --help, then which heavy modules it loaded
+HELP_PROBE = """
+import json, os, runpy, sys
+sys.path.insert(0, os.path.dirname({cli!r}))
+sys.argv = [{cli!r}] + {command!r}
+try:
+    runpy.run_path({cli!r}, run_name='__main__')
+except SystemExit:
+    pass
+with open({report!r}, 'w') as f:
+    json.dump([name for name in {heavy!r} if name in sys.modules], f)
+"""
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Check that scripts have no import-time side effects and the CLI starts fast')
+    parser.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help=f'Median start time allowed per CLI subcommand (default {STARTUP_BUDGET_MS})')
+    parser.add_argument('--rounds', type=int, default=5, help='Timed starts per subcommand (default 5)')
+    return parser.parse_args()
+
+def _probe(code, **values):
+    # Runs a probe in a fresh interpreter; it writes its report to a file since the script under test may print anything
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report = os.path.join(tmp_dir, 'report.json')
+        result = subprocess.run([sys.executable, '-c', code.format(report=report, **values)],
+                                capture_output=True, text=True, cwd=PROJECT_ROOT)
+        if not os.path.exists(report):
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'the probe wrote no report')
+        with open(report, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+def import_problems(path):
+    """
+    What importing a script did that it shouldn't have, [] if nothing
+    """
+    module = os.path.splitext(os.path.basename(path))[0]
+    report = _probe(IMPORT_PROBE, scripts_dir=SCRIPTS_DIR, module=module)
+    problems = []
+    if report['error']:
+        problems.append(f"import failed: {report['error']}")
+    if report['connections']:
+        problems.append(f"opened {len(report['connections'])} connection(s): {report['connections'][0]}")
+    if report['logging']:
+        problems.append('set logging up')
+    if report['engines']:
+        problems.append(f"created engine(s) {', '.join(report['engines'])}")
+    return problems
+
+def time_startup(command, rounds):
+    # Median wall time of `python nba_etl.py <command>` in a fresh interpreter
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, CLI] + command, check=True, stdout=subprocess.DEVNULL, cwd=PROJECT_ROOT)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+def main():
+    args = parse_args()
+    setup_logging()
+    failures = 0
+
+    out.info("Importing every script with the network blocked...")
+    for path in sorted(glob.glob(os.path.join(SCRIPTS_DIR, '*.py'))):
+        if os.path.abspath(path) == os.path.abspath(__file__):
+            continue
+        problems = import_problems(path)
+        failures += bool(problems)
+        (out.error if problems else out.info)(f"  {'[ERROR]' if problems else '[OK]   '} {os.path.basename(path)}" + (f": {'; '.join(problems)}" if problems else ''))
+
+    out.info(f"\nTiming nba_etl.py startup (budget {args.budget_ms:.0f} ms)...")
+    for command in STARTUP_COMMANDS:
+        heavy = _probe(HELP_PROBE, cli=CLI, command=command, heavy=HEAVY_MODULES)
+        median_ms = time_startup(command, args.rounds) * 1000
+        problems = []
+        if heavy:
+            problems.append(f"loads {', '.join(heavy)}")
+        if median_ms > args.budget_ms:
+            problems.append('over budget')
+        failures += bool(problems)
+        (out.error if problems else out.info)(f"  {'[ERROR]' if problems else '[OK]   '} {' '.join(command):<22} {median_ms:7.1f} ms" + (f"  {'; '.join(problems)}" if problems else ''))
+
+    if failures:
+        out.error(f"\n[ERROR] {failures} startup check(s) failed")
+        return 1
+    out.info("\n[OK] No import-time side effects, every subcommand within budget")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,27 +2,37 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
+from src.utils.db_connection import get_engine
 import pandas as pd
+from src.utils.log_setup import setup_logging, output_logger
 
-engine = create_db_engine()
+out = output_logger(__name__)
 
-print("Checking if view was updated correctly...")
-result = pd.read_sql("SELECT pg_get_viewdef('lineup_stint_stats', true)", engine)
-view_def = result.iloc[0,0]
+def main():
+    setup_logging()
+    engine = get_engine()
 
-print("\nSearching for join condition in view definition:")
-if 'pbp.action_id >=' in view_def and 'pbp.action_id <=' in view_def:
-    print("[OK] View uses action_id for joins (CORRECT - view was updated!)")
-elif 'pbp.seconds_into_game >=' in view_def:
-    print("[ERROR] View still uses seconds_into_game (OLD - view NOT updated)")
-    print("\nThe SQL file execution didn't update the view.")
-    print("Try manually dropping and recreating the view.")
-else:
-    print("[UNKNOWN] Could not determine join condition")
+    out.info("Checking if view was updated correctly...")
+    result = pd.read_sql("SELECT pg_get_viewdef('lineup_stint_stats', true)", engine)
+    view_def = result.iloc[0,0]
 
-print("\nView definition snippet:")
-print(view_def[:600])
-print("...")
+    out.info("\nSearching for join condition in view definition:")
+    if 'numrange(ls.start_secs, ls.end_secs' in view_def:
+        out.info("[OK] View joins on the (start_secs, end_secs] game clock range (CORRECT - view was updated!)")
+    elif 'pbp.action_id >=' in view_def or 'pbp.seconds_into_game >=' in view_def:
+        out.error("[ERROR] View still uses the old action_id/seconds join (OLD - view NOT updated)")
+        out.info("Run sql/schema/04_stint_game_clock.sql, then sql/views/lineup_performance.sql")
+        out.info("\nThe SQL file execution didn't update the view.")
+        out.info("Try manually dropping and recreating the view.")
+    else:
+        out.info("[UNKNOWN] Could not determine join condition")
 
-engine.dispose()
+    out.info("\nView definition snippet:")
+    out.info(view_def[:600])
+    out.info("...")
+
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
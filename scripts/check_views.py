@@ -2,38 +2,48 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
-import pandas as pd
-
-engine = create_db_engine()
-
-print("=== Checking lineup_stint_stats view ===")
-try:
-    check = pd.read_sql('''
-        SELECT stint_id, duration_secs, points_scored, points_allowed,
-               possessions, offensive_rating, defensive_rating, net_rating
-        FROM lineup_stint_stats
-        WHERE possessions > 0
-        LIMIT 10
-    ''', engine)
-    print(check)
-    print(f"\nRows with NULL ratings: {check['offensive_rating'].isna().sum()}")
-    print(f"Rows with valid ratings: {check['offensive_rating'].notna().sum()}")
-except Exception as e:
-    print(f"Error: {e}")
-
-print("\n=== Checking lineup_aggregated_stats view ===")
-try:
-    agg = pd.read_sql('''
-        SELECT lineup_hash, total_minutes, total_plus_minus,
-               avg_offensive_rating, avg_defensive_rating, avg_net_rating
-        FROM lineup_aggregated_stats
-        WHERE total_minutes > 5
-        ORDER BY total_minutes DESC
-        LIMIT 10
-    ''', engine)
-    print(agg)
-except Exception as e:
-    print(f"Error: {e}")
-
-engine.dispose()
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+def main():
+    setup_logging()
+    from src.utils.db_connection import get_engine
+    import pandas as pd
+
+    engine = get_engine()
+
+    out.info("=== Checking lineup_stint_stats view ===")
+    try:
+        check = pd.read_sql('''
+            SELECT stint_id, duration_secs, points_scored, points_allowed,
+                   possessions, offensive_rating, defensive_rating, net_rating
+            FROM lineup_stint_stats
+            WHERE possessions > 0
+            LIMIT 10
+        ''', engine)
+        out.info(check)
+        out.info(f"\nRows with NULL ratings: {check['offensive_rating'].isna().sum()}")
+        out.info(f"Rows with valid ratings: {check['offensive_rating'].notna().sum()}")
+    except Exception as e:
+        out.info(f"Error: {e}")
+
+    out.info("\n=== Checking lineup_aggregated_stats view ===")
+    try:
+        agg = pd.read_sql('''
+            SELECT lineup_hash, total_minutes, total_plus_minus,
+                   avg_offensive_rating, avg_defensive_rating, avg_net_rating
+            FROM lineup_aggregated_stats
+            WHERE total_minutes > 5
+            ORDER BY total_minutes DESC
+            LIMIT 10
+        ''', engine)
+        out.info(agg)
+    except Exception as e:
+        out.info(f"Error: {e}")
+
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from src.utils.rating_intervals import season_intervals, load_stints, write_intervals
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Net rating intervals for every lineup and player (src/utils/rating_intervals.py):
+#   python scripts/compute_rating_intervals.py                      pooled over every season ('all', what the views show)
+#   python scripts/compute_rating_intervals.py --seasons 2024-25    per season, other seasons' rows are kept
+# writes lineup_rating_intervals / player_rating_intervals (run
+# `python scripts/nba_etl.py migrate up` first on an existing database).
+# --store reads a stint store (scripts/export_stints.py) and only prints.
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Bootstrap and shrunk net rating intervals for lineups and players')
+    parser.add_argument('--store', type=str, default=None, help='Read stints from this stint store instead of the database (no write)')
+    parser.add_argument('--seasons', type=str, default=None, help="Comma separated seasons, e.g. 2023-24,2024-25, each computed on its own (default: pooled over every season as 'all')")
+    parser.add_argument('--n-boot', type=int, default=1000, help='Bootstrap replicates (default 1000)')
+    parser.add_argument('--alpha', type=float, default=0.05, help='1 - interval coverage (default 0.05 for 95%%)')
+    parser.add_argument('--workers', type=int, default=4, help='Threads, one team at a time each (default 4)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default 0)')
+    parser.add_argument('--min-possessions', type=int, default=100, help='Lineups shown in the summary need this many possessions (default 100)')
+    parser.add_argument('--no-players', action='store_true', help='Skip the player intervals')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    setup_logging()
+    engine = None
+    start = time.perf_counter()
+    seasons = args.seasons.split(',') if args.seasons else None
+    if args.store:
+        from src.etl.stint_store import open_stint_store
+        stints = open_stint_store(args.store).to_frame(with_players=True)
+    else:
+        from src.utils.db_connection import get_engine
+        engine = get_engine()
+        stints = load_stints(engine, seasons)
+    out.info(f"Loaded {len(stints)} stints in {time.perf_counter() - start:.1f}s")
+    if not len(stints):
+        out.error("[ERROR] No stints to compute intervals from")
+        return 1
+
+    options = dict(n_boot=args.n_boot, alpha=args.alpha, workers=args.workers, seed=args.seed)
+    start = time.perf_counter()
+    lineups_df, players_df = season_intervals(stints, seasons, players=not args.no_players, **options)
+    if lineups_df is None:
+        out.error(f"[ERROR] No stints for {', '.join(seasons)}")
+        return 1
+    out.info(f"{len(lineups_df)} lineup and {len(players_df) if players_df is not None else 0} player intervals "
+             f"for {', '.join(lineups_df['season'].unique())} in {time.perf_counter() - start:.1f}s")
+
+    if engine is not None:
+        try:
+            write_intervals(engine, lineups_df, players_df, args.n_boot)
+            out.info("[OK] Intervals written to lineup_rating_intervals / player_rating_intervals")
+        except Exception as e:
+            out.error(f"[ERROR] Could not write intervals: {e}")
+            return 1
+        finally:
+            engine.dispose()
+
+    shown = lineups_df[lineups_df['possessions'] >= args.min_possessions]
+    out.info("="*70)
+    out.info(f"TOP LINEUPS BY INTERVAL LOWER BOUND (>= {args.min_possessions} possessions)")
+    out.info("="*70)
+    out.info(shown.sort_values('net_rating_low', ascending=False).head(15).to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from config import PROCESSED_DATA_DIR
+from src.etl.backfill import parse_seasons
+from src.etl.stint_store import export_stint_store, open_stint_store
+from src.utils.db_connection import get_engine
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Exports lineup stints + per-stint stats to a memory-mapped store for notebooks:
+#   from src.etl.stint_store import open_stint_store
+#   store = open_stint_store('data/processed/stint_store')
+#   store.stints['points_scored'], store.players(store.stints['lineup_id'])
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Export lineup stints to a memory-mapped stint store')
+    parser.add_argument('--out', type=str, default=str(PROCESSED_DATA_DIR / 'stint_store'), help='Store directory (replaced)')
+    parser.add_argument('--seasons', type=str, default=None, help="Only these seasons, e.g. '2015-16:2024-25' (default all)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    setup_logging()
+    seasons = parse_seasons(args.seasons) if args.seasons else None
+
+    out.info("="*70)
+    out.info(f"EXPORTING STINT STORE TO {args.out}")
+    out.info("="*70)
+
+    engine = get_engine()
+    try:
+        start = time.perf_counter()
+        export_stint_store(engine, args.out, seasons)
+        out.info(f"[OK] Exported in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        out.error(f"[ERROR] Export failed: {e}")
+        return 1
+    finally:
+        engine.dispose()
+
+    start = time.perf_counter()
+    store = open_stint_store(args.out)
+    out.info(f"Opened {len(store)} stints / {len(store.lineups)} lineups in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
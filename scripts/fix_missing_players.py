@@ -2,80 +2,107 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
-from nba_api.stats.endpoints import commonplayerinfo
-import pandas as pd
 import time
 
-engine = create_db_engine()
-
-print("="*70)
-print("FINDING AND FIXING MISSING PLAYERS")
-print("="*70)
-
-# Find player IDs that are in lineups but not in players table
-missing_query = """
-SELECT DISTINCT player_id FROM (
-    SELECT player1_id AS player_id FROM lineup_stints
-    UNION SELECT player2_id FROM lineup_stints
-    UNION SELECT player3_id FROM lineup_stints
-    UNION SELECT player4_id FROM lineup_stints
-    UNION SELECT player5_id FROM lineup_stints
-) all_players
-WHERE player_id NOT IN (SELECT player_id FROM players)
-ORDER BY player_id
-"""
-
-missing_players = pd.read_sql(missing_query, engine)
-
-if len(missing_players) == 0:
-    print("\n[OK] No missing players found!")
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+def main():
+    from src.utils.db_connection import get_engine
+    from src.etl.dimension_cache import TEAM_ID_RANGE
+    from nba_api.stats.endpoints import commonplayerinfo
+    from sqlalchemy import text
+    import pandas as pd
+
+    setup_logging()
+    engine = get_engine()
+
+    out.info("="*70)
+    out.info("FINDING AND FIXING MISSING PLAYERS")
+    out.info("="*70)
+
+    # Player IDs that are in lineups but not in players table, and the stub rows the
+    # pipeline adds when a player's info can't be fetched (position NULL, see DimensionCache)
+    missing_query = """
+    SELECT DISTINCT player_id FROM (
+        SELECT player1_id AS player_id FROM lineups
+        UNION SELECT player2_id FROM lineups
+        UNION SELECT player3_id FROM lineups
+        UNION SELECT player4_id FROM lineups
+        UNION SELECT player5_id FROM lineups
+    ) all_players
+    WHERE player_id NOT IN (SELECT player_id FROM players)
+    UNION
+    SELECT player_id FROM players
+    WHERE position IS NULL AND player_id <> 0 AND player_id NOT BETWEEN :team_min AND :team_max
+    ORDER BY player_id
+    """
+
+    missing_players = pd.read_sql(text(missing_query), engine,
+                                  params={'team_min': TEAM_ID_RANGE[0], 'team_max': TEAM_ID_RANGE[1]})
+
+    if len(missing_players) == 0:
+        out.info("\n[OK] No missing players found!")
+        engine.dispose()
+        return 0
+
+    out.info(f"\nFound {len(missing_players)} missing or stub player IDs:")
+    out.info(missing_players)
+
+    out.info("\nFetching player info from NBA API...")
+
+    player_data = []
+    for player_id in missing_players['player_id']:
+        try:
+            info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
+            df = info.get_data_frames()[0]
+
+            # Match the schema: player_id, player_name, position, height, weight
+            # ('' for an unknown position, NULL marks a stub row)
+            player_info = {
+                'player_id': int(player_id),
+                'player_name': df['DISPLAY_FIRST_LAST'].iloc[0],
+                'position': df['POSITION'].iloc[0] if 'POSITION' in df.columns and pd.notna(df['POSITION'].iloc[0]) else '',
+                'height': df['HEIGHT'].iloc[0] if 'HEIGHT' in df.columns and pd.notna(df['HEIGHT'].iloc[0]) else None,
+                'weight': int(df['WEIGHT'].iloc[0]) if 'WEIGHT' in df.columns and pd.notna(df['WEIGHT'].iloc[0]) else None
+            }
+            player_data.append(player_info)
+            out.info(f"  Fetching player {player_id}... OK - {player_info['player_name']}")
+            time.sleep(0.6)  # Rate limiting
+
+        except Exception as e:
+            out.error(f"  Fetching player {player_id}... ERROR - {e}")
+            continue
+
+    if len(player_data) > 0:
+        out.info(f"\nLoading {len(player_data)} players into database...")
+        # Stub rows already exist, they are overwritten with the fetched info
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO players (player_id, player_name, position, height, weight)
+                VALUES (:player_id, :player_name, :position, :height, :weight)
+                ON CONFLICT (player_id) DO UPDATE
+                SET player_name = EXCLUDED.player_name, position = EXCLUDED.position,
+                    height = EXCLUDED.height, weight = EXCLUDED.weight
+            """), player_data)
+        out.info("[OK] Players loaded successfully")
+
+        out.info("\nLoaded players:")
+        for p in player_data:
+            out.info(f"  {p['player_id']}: {p['player_name']}")
+    else:
+        out.error("\n[ERROR] Could not fetch any player data")
+        engine.dispose()
+        return 1
+
+    out.info("\n" + "="*70)
+    out.info("Now refresh your Power BI dashboard!")
+    out.info("The Lineup Display measure should show player names correctly.")
+    out.info("="*70)
+
     engine.dispose()
-    exit(0)
-
-print(f"\nFound {len(missing_players)} missing player IDs:")
-print(missing_players)
-
-print("\nFetching player info from NBA API...")
-
-player_data = []
-for player_id in missing_players['player_id']:
-    try:
-        print(f"  Fetching player {player_id}...", end=" ")
-        info = commonplayerinfo.CommonPlayerInfo(player_id=player_id)
-        df = info.get_data_frames()[0]
-
-        # Match the schema: player_id, player_name, position, height, weight
-        player_info = {
-            'player_id': player_id,
-            'player_name': df['DISPLAY_FIRST_LAST'].iloc[0],
-            'position': df['POSITION'].iloc[0] if 'POSITION' in df.columns and pd.notna(df['POSITION'].iloc[0]) else None,
-            'height': df['HEIGHT'].iloc[0] if 'HEIGHT' in df.columns and pd.notna(df['HEIGHT'].iloc[0]) else None,
-            'weight': int(df['WEIGHT'].iloc[0]) if 'WEIGHT' in df.columns and pd.notna(df['WEIGHT'].iloc[0]) else None
-        }
-        player_data.append(player_info)
-        print(f"OK - {player_info['player_name']}")
-        time.sleep(0.6)  # Rate limiting
-
-    except Exception as e:
-        print(f"ERROR - {e}")
-        continue
-
-if len(player_data) > 0:
-    print(f"\nLoading {len(player_data)} players into database...")
-    players_df = pd.DataFrame(player_data)
-    players_df.to_sql('players', engine, if_exists='append', index=False)
-    print("[OK] Players loaded successfully")
-
-    print("\nLoaded players:")
-    for p in player_data:
-        print(f"  {p['player_id']}: {p['player_name']}")
-else:
-    print("\n[ERROR] Could not fetch any player data")
-
-print("\n" + "="*70)
-print("Now refresh your Power BI dashboard!")
-print("The Lineup Display measure should show player names correctly.")
-print("="*70)
-
-engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
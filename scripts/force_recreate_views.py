@@ -2,69 +2,80 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
-from sqlalchemy import text
+import argparse
 
-engine = create_db_engine()
+from src.utils.log_setup import setup_logging, output_logger
 
-print("Step 1: Dropping all existing views...")
-drop_statements = [
-    "DROP VIEW IF EXISTS game_lineup_summary CASCADE",
-    "DROP VIEW IF EXISTS player_impact_stats CASCADE",
-    "DROP VIEW IF EXISTS lineup_aggregated_stats CASCADE",
-    "DROP VIEW IF EXISTS lineup_stint_stats CASCADE"
-]
+out = output_logger(__name__)
 
-try:
-    with engine.connect() as conn:
-        for stmt in drop_statements:
-            print(f"  Executing: {stmt}")
-            conn.execute(text(stmt))
-        conn.commit()
-    print("[OK] All views dropped successfully")
-except Exception as e:
-    print(f"[ERROR] Failed to drop views: {e}")
-    engine.dispose()
-    exit(1)
+VIEWS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'views', 'lineup_performance.sql')
 
-print("\nStep 2: Reading updated SQL file...")
-try:
-    with open('sql/views/lineup_performance.sql', 'r', encoding='utf-8') as f:
+# Rebuilds the analysis views side by side in a staging schema and swaps them in
+# atomically (src/etl/view_manager.py), so dashboards keep reading the old views
+# until the new ones are verified: a staging view must return the probe game's rows
+# and, where the live view exists, the same rows over their shared columns.
+# --allow-changes deploys views meant to return different data. --dry-run only prints the plan.
+
+def add_arguments(parser):
+    parser.add_argument('--dry-run', action='store_true', help='Print the deployment plan and exit')
+    parser.add_argument('--workers', type=int, default=4, help='Views of one dependency level built in parallel (default 4)')
+    parser.add_argument('--no-verify', action='store_true', help='Skip the staging probes before the swap')
+    parser.add_argument('--allow-changes', action='store_true',
+                        help='Swap in views whose probe game rows differ from the live ones (empty or failing views are still refused)')
+    parser.add_argument('--game-id', type=str, default=None, help='Game the probes check (default the latest loaded)')
+    parser.add_argument('--file', type=str, default=VIEWS_FILE, help='View script to deploy')
+    return parser
+
+def run(args):
+    setup_logging()
+    from src.utils.db_connection import get_engine
+    from src.etl.view_manager import plan_deployment, format_plan, deploy
+
+    with open(args.file, 'r', encoding='utf-8') as f:
         sql_content = f.read()
-    print(f"[OK] Read {len(sql_content)} characters from SQL file")
-except Exception as e:
-    print(f"[ERROR] Failed to read SQL file: {e}")
-    engine.dispose()
-    exit(1)
 
-print("\nStep 3: Creating new views with fixed definitions...")
-try:
-    with engine.connect() as conn:
-        conn.execute(text(sql_content))
-        conn.commit()
-    print("[OK] All views created successfully")
-except Exception as e:
-    print(f"[ERROR] Failed to create views: {e}")
-    import traceback
-    traceback.print_exc()
-    engine.dispose()
-    exit(1)
+    out.info("="*70)
+    out.info(f"VIEW DEPLOYMENT PLAN ({os.path.basename(args.file)})")
+    out.info("="*70)
+    try:
+        engine = get_engine()
+        plan = plan_deployment(sql_content, engine)
+    except Exception as e:
+        if not args.dry_run:
+            out.error(f"[ERROR] Could not connect to the database: {e}")
+            return 1
+        out.warning(f"[WARNING] Could not inspect the database ({type(e).__name__}), showing the offline plan")
+        out.info(format_plan(plan_deployment(sql_content)))
+        return 0
+    try:
+        out.info(format_plan(plan))
+        if args.dry_run:
+            return 0
 
-print("\nStep 4: Verifying the fix...")
-try:
-    result = conn.execute(text("SELECT pg_get_viewdef('lineup_stint_stats', true)"))
-    view_def = result.fetchone()[0]
+        out.info("\nBuilding staging views, probing and swapping...")
+        try:
+            result = deploy(engine, sql_content, workers=args.workers, verify=not args.no_verify, game_id=args.game_id,
+                            allow_changes=args.allow_changes)
+        except Exception as e:
+            out.error(f"[ERROR] Deployment failed, live views unchanged: {e}")
+            return 1
 
-    if 'pbp.action_id >=' in view_def:
-        print("[OK] View now uses action_id (FIX SUCCESSFUL!)")
-    else:
-        print("[WARNING] Could not verify fix")
-except Exception as e:
-    print(f"[ERROR] Verification failed: {e}")
+        for name, seconds in result['timings'].items():
+            probe = result['probes'].get(name)
+            if probe and probe['rows'] is not None:
+                checked = f"{probe['rows']} rows for the probe game, md5 {probe['checksum'][:8]}"
+                checked += ', changed from live' if probe['problem'] else (', same as live' if probe['live'] else ', new')
+            else:
+                checked = 'plan ok' if probe else 'not probed'
+            out.info(f"  {name:<28} built in {seconds:.2f}s, {checked}")
+        out.info(f"[OK] Views swapped in {result['swap_seconds']:.2f}s")
+        return 0
+    finally:
+        engine.dispose()
 
-engine.dispose()
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Rebuild the analysis views with an atomic swap')
+    return run(add_arguments(parser).parse_args(argv))
 
-print("\n" + "="*60)
-print("DONE! Now run: python scripts/check_views.py")
-print("You should see possessions of 10-30 per stint")
-print("="*60)
+if __name__ == "__main__":
+    sys.exit(main())
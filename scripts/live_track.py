@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+GAME7_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'raw', 'thunder_pacers_game7.csv')
+
+# Follows the lineups of a game in progress (src/etl/live_tracker.py): polls
+# PlayByPlayV3 and prints every stint that closes with its score.
+#   python scripts/live_track.py --game-id 0042400407 --interval 20
+# --replay streams a recorded play-by-play instead, e.g. the bundled Game 7
+# at 120 game seconds per second:
+#   python scripts/live_track.py --replay --speed 120
+
+def add_arguments(parser):
+    parser.add_argument('--game-id', type=str, default=None, help='Game to poll (in progress)')
+    parser.add_argument('--interval', type=float, default=20.0, help='Seconds between polls (default 20)')
+    parser.add_argument('--replay', nargs='?', const=GAME7_CSV, default=None, metavar='CSV',
+                        help='Replay a recorded play-by-play CSV (default the bundled Game 7)')
+    parser.add_argument('--speed', type=float, default=60.0, help='Replay speed in game seconds per second, 0 = no waiting (default 60)')
+    parser.add_argument('--step', type=float, default=30.0, help='Game seconds between replayed polls (default 30)')
+    parser.add_argument('--output', type=str, default=None, help='Write the stints to this CSV at the end')
+    return parser
+
+def player_label(tracker, team_id, player):
+    if isinstance(player, str):
+        return player
+    names = tracker.names.get(team_id, {}).get(player)
+    return names[0] if names else str(player)
+
+def print_update(tracker, batch):
+    out.info(f"Q{tracker.period} {tracker.clock}  {tracker.score['v']}-{tracker.score['h']}  "
+             f"(+{batch['events']} events, {batch['opened']} stints opened, {batch['closed']} closed)")
+    for stint in batch['closed_stints']:
+        players = ', '.join(player_label(tracker, stint['team_id'], player) for player in stint['players'] or [])
+        out.info(f"  [STINT] {stint['team_id']} {stint['start_secs']:.1f}-{stint['end_secs']:.1f}s "
+                 f"{stint['points_scored']}-{stint['points_allowed']}  {players or 'lineup unknown'}")
+
+def run(args):
+    setup_logging()
+    import pandas as pd
+    from src.etl.live_tracker import LiveGameTracker, poll_game, replay_stream
+
+    if args.replay is None and args.game_id is None:
+        out.error("[ERROR] Give --game-id to poll a live game or --replay to stream a recorded one")
+        return 1
+
+    out.info("="*70)
+    if args.replay is not None:
+        pbp = pd.read_csv(args.replay, dtype={'gameId': str}, index_col=0)
+        game_id = args.game_id or pbp['gameId'].iloc[0]
+        out.info(f"REPLAYING {game_id} FROM {os.path.basename(args.replay)} ({args.speed:g}x)")
+        out.info("="*70)
+        tracker = LiveGameTracker(game_id)
+        for frame in replay_stream(pbp, speed=args.speed, step_secs=args.step):
+            batch = tracker.process(frame)
+            if batch['events']:
+                print_update(tracker, batch)
+    else:
+        out.info(f"TRACKING {args.game_id} (polling every {args.interval:g}s, Ctrl+C to stop)")
+        out.info("="*70)
+        tracker = LiveGameTracker(args.game_id)
+        try:
+            poll_game(args.game_id, tracker, interval=args.interval, on_update=print_update)
+        except KeyboardInterrupt:
+            pass
+
+    stints = tracker.stints_df()
+    out.info("="*70)
+    out.info(f"{tracker.events_processed} events, {len(stints)} stints, score {tracker.score['v']}-{tracker.score['h']}"
+             f"{' (final)' if tracker.finished else ''}")
+    if len(stints):
+        totals = stints.groupby('team_id')[['duration_secs', 'points_scored', 'points_allowed', 'possessions']].sum()
+        out.info(totals.to_string())
+    if args.output:
+        stints.to_csv(args.output, index=False)
+        out.info(f"[OK] Stints written to {args.output}")
+    return 0
+
+def main(argv=None):
+    parser = add_arguments(argparse.ArgumentParser(description='Track the lineups of a live (or replayed) game'))
+    return run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import re
+
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+VIEWS_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'views', 'lineup_performance.sql')
+
+# Versioned schema migrations (src/etl/migrations.py):
+#   python scripts/migrate.py status             applied and pending versions
+#   python scripts/migrate.py up [--to 7]        apply pending migrations, with a before/after size report
+#   python scripts/migrate.py baseline 6         mark 01-06 applied on a database created before the runner
+#   python scripts/migrate.py report [--scan]    row widths and table sizes
+# Views dropped by a migration are redeployed afterwards (staged, atomic swap).
+
+def add_arguments(parser):
+    parser.add_argument('action', nargs='?', choices=['status', 'up', 'baseline', 'report'], default='status')
+    parser.add_argument('version', nargs='?', type=int, default=None, help='Version to baseline at')
+    parser.add_argument('--to', type=int, default=None, help='Apply migrations up to this version only (default all)')
+    parser.add_argument('--scan', action='store_true', help='Also time a full scan of each table in the report')
+    parser.add_argument('--no-report', action='store_true', help="Don't measure the tables before and after `up`")
+    parser.add_argument('--no-views', action='store_true', help="Don't redeploy the views a migration dropped")
+    return parser
+
+def drops_views(migration):
+    with open(migration['path'], 'r', encoding='utf-8') as f:
+        return re.search(r'^\s*DROP\s+VIEW', f.read(), re.IGNORECASE | re.MULTILINE) is not None
+
+def print_status(state, migrations):
+    pending = {migration['version'] for migration in state['pending']}
+    changed = {migration['version'] for migration in state['changed']}
+    for migration in migrations:
+        status = 'pending' if migration['version'] in pending else 'applied'
+        if migration['version'] in changed:
+            status += ' (file changed since)'
+        out.info(f"  {migration['name']:<36} {status}")
+    out.info(f"\nCurrent version: {state['current'] if state['current'] is not None else 'none'}")
+    if state['fresh']:
+        out.info("Empty database: `up` creates the schema with 01_create_tables.sql")
+    elif state['needs_baseline']:
+        out.warning("[WARNING] Tables exist but no migration history: run `baseline VERSION` with the last migration this database has")
+
+def run(args):
+    setup_logging()
+    from src.utils.db_connection import get_engine
+    from src.etl import migrations as schema
+
+    migrations = schema.discover()
+    try:
+        engine = get_engine()
+    except Exception as e:
+        out.error(f"[ERROR] Could not connect to the database: {e}")
+        return 1
+
+    try:
+        out.info("="*70)
+        out.info(f"SCHEMA MIGRATIONS ({args.action.upper()})")
+        out.info("="*70)
+        if args.action == 'status':
+            print_status(schema.plan(engine, migrations), migrations)
+            return 0
+
+        if args.action == 'report':
+            out.info(schema.format_report(schema.table_report(engine, scan=args.scan)))
+            return 0
+
+        if args.action == 'baseline':
+            if args.version is None:
+                out.error("[ERROR] Give the version the database is at, e.g. `baseline 6`")
+                return 1
+            recorded = schema.baseline(engine, args.version, migrations)
+            out.info(f"[OK] Recorded {len(recorded)} migration(s) as applied: {', '.join(m['name'] for m in recorded) or 'none'}")
+            return 0
+
+        state = schema.plan(engine, migrations, args.to)
+        if not state['pending']:
+            out.info("[OK] Schema is up to date")
+            return 0
+        measure = not args.no_report and not state['fresh']
+        before = schema.table_report(engine, scan=args.scan) if measure else None
+        try:
+            applied = schema.upgrade(engine, args.to, migrations)
+        except Exception as e:
+            out.error(f"[ERROR] Migration failed, its changes were rolled back: {e}")
+            return 1
+        for migration, duration_ms in applied:
+            out.info(f"[OK] {migration['name']} ({duration_ms} ms)")
+
+        if not args.no_views and not state['fresh'] and any(drops_views(migration) for migration, _ in applied):
+            from src.etl.view_manager import deploy
+            with open(VIEWS_FILE, 'r', encoding='utf-8') as f:
+                views_sql = f.read()
+            try:
+                result = deploy(engine, views_sql)
+                out.info(f"[OK] Views redeployed ({result['swap_seconds']:.2f}s swap)")
+            except Exception as e:
+                out.error(f"[ERROR] Could not redeploy the views, run `nba_etl.py views recreate`: {e}")
+                return 1
+
+        if measure:
+            after = schema.table_report(engine, scan=args.scan)
+            out.info("\n" + schema.format_report(before, after))
+        return 0
+    finally:
+        engine.dispose()
+
+def main(argv=None):
+    parser = add_arguments(argparse.ArgumentParser(description='Apply versioned schema migrations'))
+    return run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.db_connection import get_engine
+from sqlalchemy import text
+import pandas as pd
+import time
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Moves lineup_stints from a VARCHAR lineup_hash + 5 player columns to an integer
+# lineup_id referencing the lineups table, measuring table size and view query
+# time before and after so the change can be compared.
+
+MIGRATION_FILE = 'sql/schema/02_lineup_ids.sql'
+VIEWS_FILE = 'sql/views/lineup_performance.sql'
+RESULTS_FILE = 'logs/lineup_id_migration.csv'
+
+# Queries that Power BI issues on refresh
+BENCHMARK_QUERIES = {
+    'lineup_aggregated_stats': "SELECT COUNT(*) FROM lineup_aggregated_stats",
+    'player_impact_stats': "SELECT COUNT(*) FROM player_impact_stats",
+    'game_lineup_summary': "SELECT COUNT(*) FROM game_lineup_summary",
+}
+
+def measure(engine, label, repeats=3):
+    rows = []
+    with engine.connect() as conn:
+        for relation in ['lineup_stints', 'lineups']:
+            exists = conn.execute(text("SELECT to_regclass(:name)"), {'name': relation}).scalar()
+            if exists is None:
+                continue
+            total = conn.execute(text("SELECT pg_total_relation_size(:name)"), {'name': relation}).scalar()
+            table = conn.execute(text("SELECT pg_relation_size(:name)"), {'name': relation}).scalar()
+            rows.append({'phase': label, 'metric': f'{relation}_total_bytes', 'value': total})
+            rows.append({'phase': label, 'metric': f'{relation}_table_bytes', 'value': table})
+
+        for name, query in BENCHMARK_QUERIES.items():
+            # Best of N to keep cache warm-up out of the comparison
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                conn.execute(text(query)).scalar()
+                timings.append(time.perf_counter() - start)
+            rows.append({'phase': label, 'metric': f'{name}_query_ms', 'value': round(min(timings) * 1000, 1)})
+    return rows
+
+def main():
+    setup_logging()
+    engine = get_engine()
+
+    out.info("="*70)
+    out.info("MIGRATING lineup_stints TO INTEGER LINEUP IDS")
+    out.info("="*70)
+
+    out.info("\nStep 1: Measuring current layout...")
+    before = measure(engine, 'before')
+    for row in before:
+        out.info(f"  {row['metric']}: {row['value']}")
+
+    out.info("\nStep 2: Applying migration...")
+    try:
+        with open(MIGRATION_FILE, 'r', encoding='utf-8') as f:
+            migration_sql = f.read()
+        with engine.begin() as conn:
+            conn.execute(text(migration_sql))
+        out.info("[OK] Migration applied")
+    except Exception as e:
+        out.error(f"[ERROR] Migration failed: {e}")
+        engine.dispose()
+        return 1
+
+    out.info("\nStep 3: Recreating views...")
+    try:
+        with open(VIEWS_FILE, 'r', encoding='utf-8') as f:
+            views_sql = f.read()
+        with engine.begin() as conn:
+            conn.execute(text(views_sql))
+        out.info("[OK] Views recreated")
+    except Exception as e:
+        out.error(f"[ERROR] Failed to create views: {e}")
+        engine.dispose()
+        return 1
+
+    out.info("\nStep 4: Reclaiming space from dropped columns...")
+    # VACUUM can't run inside a transaction block
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("VACUUM FULL ANALYZE lineup_stints"))
+        conn.execute(text("VACUUM ANALYZE lineups"))
+    out.info("[OK] Vacuum complete")
+
+    out.info("\nStep 5: Measuring new layout...")
+    after = measure(engine, 'after')
+
+    results = pd.DataFrame(before + after)
+    results.to_csv(RESULTS_FILE, index=False)
+
+    comparison = results.pivot_table(index='metric', columns='phase', values='value', aggfunc='first')
+    comparison = comparison.reindex(columns=['before', 'after'])
+    out.info(comparison.to_string())
+    out.info(f"\nSaved measurements to {RESULTS_FILE}")
+
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import glob
+import json
+import sqlite3
+
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Single entry point for the pipeline and the maintenance scripts:
+#   python scripts/nba_etl.py ingest --season 2024-25
+#   python scripts/nba_etl.py reload-stints | fix-players | views recreate | views check | status
+#   python scripts/nba_etl.py quarantine list | quarantine release [GAME_ID ...]
+#   python scripts/nba_etl.py live --game-id 0042400407 | live --replay
+#   python scripts/nba_etl.py migrate status | migrate up | migrate baseline 6 | migrate report
+# Every subcommand imports its dependencies when it runs, so building the parser
+# (and --help) never loads pandas, SQLAlchemy or nba_api and never touches the database.
+# scripts/check_startup.py fails if a subcommand's --help loads them or starts slowly.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cmd_ingest(args):
+    import run_etl
+    return run_etl.run(args)
+
+def cmd_reload_stints(args):
+    import reload_lineup_stints_only
+    return reload_lineup_stints_only.run(args)
+
+def cmd_fix_players(args):
+    import fix_missing_players
+    return fix_missing_players.main()
+
+def cmd_views(args):
+    if args.action == 'recreate':
+        import force_recreate_views
+        return force_recreate_views.run(args)
+    import check_views
+    return check_views.main()
+
+def cmd_live(args):
+    import live_track
+    return live_track.run(args)
+
+def cmd_migrate(args):
+    import migrate
+    return migrate.run(args)
+
+def cmd_quarantine(args):
+    from src.etl.validation import Quarantine
+    from src.etl.work_queue import WorkQueue
+    from config import PROCESSED_DATA_DIR
+
+    quarantine = Quarantine(PROCESSED_DATA_DIR / 'quarantine')
+    game_ids = args.game_ids or quarantine.game_ids()
+    if args.action == 'list':
+        for game_id in game_ids:
+            record = quarantine.get(game_id)
+            if record:
+                out.info(f"{game_id}: {'; '.join(record['issues'])}")
+        out.info(f"{len(game_ids)} quarantined game(s)")
+        return 0
+
+    # Released games are processed again by the next run
+    for game_id in game_ids:
+        quarantine.release(game_id)
+    queue_path = args.queue or os.path.join(PROJECT_ROOT, 'data', 'processed', 'etl_queue.sqlite')
+    requeued = 0
+    if os.path.exists(queue_path):
+        queue = WorkQueue(queue_path)
+        requeued = queue.release_quarantined(game_ids)
+        queue.close()
+    out.info(f"[OK] Released {len(game_ids)} game(s), {requeued} queue task(s) back to pending")
+    return 0
+
+def cmd_status(args):
+    out.info("="*70)
+    out.info("NBA LINEUP ETL STATUS")
+    out.info("="*70)
+
+    # Work queue and last run report are local files, no database needed
+    queue_path = args.queue or os.path.join(PROJECT_ROOT, 'data', 'processed', 'etl_queue.sqlite')
+    if os.path.exists(queue_path):
+        conn = sqlite3.connect(queue_path)
+        rows = conn.execute("SELECT season, stage, status, COUNT(*) FROM tasks GROUP BY season, stage, status ORDER BY season, stage, status").fetchall()
+        conn.close()
+        out.info(f"\nWork queue ({queue_path}):")
+        for season, stage, status, count in rows:
+            out.info(f"  {season} {stage:<6} {status:<8} {count}")
+    else:
+        out.info("\nWork queue: none")
+
+    quarantine_dir = os.path.join(PROJECT_ROOT, 'data', 'processed', 'quarantine')
+    quarantined = glob.glob(os.path.join(quarantine_dir, '*.json'))
+    out.info(f"\nQuarantined games: {len(quarantined)}" + (" (nba_etl.py quarantine list)" if quarantined else ""))
+
+    reports = sorted(glob.glob(os.path.join(PROJECT_ROOT, 'logs', 'metrics', 'run_*.json')))
+    if reports:
+        with open(reports[-1], 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        out.info(f"\nLast run {report['run_id']}: {report['games']} games in {report['wall_seconds']}s")
+    else:
+        out.info("\nLast run: none")
+
+    if args.no_db:
+        return 0
+    from src.utils.db_connection import get_engine
+    from sqlalchemy import text
+    engine = get_engine()
+    try:
+        with engine.connect() as conn:
+            out.info("\nDatabase:")
+            for table in ['games', 'players', 'lineups', 'lineup_stints', 'lineup_game_stats']:
+                count = conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+                out.info(f"  {table:<18} {count}")
+    except Exception as e:
+        out.error(f"[ERROR] Could not query the database: {e}")
+        return 1
+    finally:
+        engine.dispose()
+    return 0
+
+def build_parser():
+    import run_etl
+
+    parser = argparse.ArgumentParser(description='NBA lineup analysis ETL')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest = subparsers.add_parser('ingest', help='Run the ETL pipeline (same options as run_etl.py)')
+    run_etl.add_arguments(ingest)
+    ingest.set_defaults(func=cmd_ingest)
+
+    import reload_lineup_stints_only
+    reload_stints = subparsers.add_parser('reload-stints', help='Regenerate lineup stints for the games whose inputs or transform changed')
+    reload_lineup_stints_only.add_arguments(reload_stints)
+    reload_stints.set_defaults(func=cmd_reload_stints)
+
+    fix_players = subparsers.add_parser('fix-players', help='Fetch players referenced by lineups but missing from players, and repair stub rows')
+    fix_players.set_defaults(func=cmd_fix_players)
+
+    import force_recreate_views
+    views = subparsers.add_parser('views', help='Rebuild (staged, atomic swap) or spot-check the analysis views')
+    views.add_argument('action', choices=['recreate', 'check'])
+    force_recreate_views.add_arguments(views)
+    views.set_defaults(func=cmd_views)
+
+    quarantine = subparsers.add_parser('quarantine', help='List or release games that failed pre-load validation')
+    quarantine.add_argument('action', choices=['list', 'release'])
+    quarantine.add_argument('game_ids', nargs='*', help='Games to list/release (default all)')
+    quarantine.add_argument('--queue', type=str, default=None, help='Work queue SQLite file')
+    quarantine.set_defaults(func=cmd_quarantine)
+
+    import live_track
+    live = subparsers.add_parser('live', help='Track the lineups of a game in progress, or replay a recorded one')
+    live_track.add_arguments(live)
+    live.set_defaults(func=cmd_live)
+
+    import migrate
+    migrate_parser = subparsers.add_parser('migrate', help='Apply versioned schema migrations and report table sizes')
+    migrate.add_arguments(migrate_parser)
+    migrate_parser.set_defaults(func=cmd_migrate)
+
+    status = subparsers.add_parser('status', help='Show the work queue, last run and table sizes')
+    status.add_argument('--queue', type=str, default=None, help='Work queue SQLite file')
+    status.add_argument('--no-db', action='store_true', help='Skip the database counts')
+    status.set_defaults(func=cmd_status)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # Subcommands with a log file of their own set logging up again
+    setup_logging()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
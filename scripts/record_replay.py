@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+import pandas as pd
+
+from config import RAW_DATA_DIR, REPLAY_DATA_DIR
+from src.utils.replay_server import (record_endpoint, save_payload, playbyplay_payload, rotation_payload,
+                                     boxscore_payload, game_finder_payload, player_info_payload)
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Fills data/replay/ with payloads for scripts/serve_replay.py
+#   --game-id / --season   record real responses from stats.nba.com
+#   --synthetic N          build N synthetic games (no network)
+#   --game7                the bundled Game 7 play-by-play (no network)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Record stats.nba.com payloads for the replay server')
+    parser.add_argument('--dir', type=str, default=str(REPLAY_DATA_DIR), help='Payload directory')
+    parser.add_argument('--game-id', type=str, action='append', default=[], help='Record a live game (repeatable)')
+    parser.add_argument('--season', type=str, default=None, help='Record the live LeagueGameFinder schedule for a season')
+    parser.add_argument('--synthetic', type=int, default=0, help='Write N synthetic games, schedule and players')
+    parser.add_argument('--synthetic-season', type=str, default='2024-25', help='Season the synthetic schedule is filed under')
+    parser.add_argument('--game7', action='store_true', help='Write the bundled Game 7 play-by-play')
+    return parser.parse_args()
+
+def record_live_game(directory, game_id):
+    from nba_api.stats.endpoints import playbyplayv3, gamerotation, boxscoretraditionalv3, commonplayerinfo
+
+    pbp = playbyplayv3.PlayByPlayV3(game_id)
+    record_endpoint(directory, pbp)
+    time.sleep(0.6)
+    record_endpoint(directory, gamerotation.GameRotation(game_id))
+    time.sleep(0.6)
+    record_endpoint(directory, boxscoretraditionalv3.BoxScoreTraditionalV3(game_id))
+    time.sleep(0.6)
+
+    player_ids = pbp.get_data_frames()[0]['personId'].unique()
+    player_ids = [p for p in player_ids if p != 0 and not (1610612000 <= p <= 1610613000)]
+    for player_id in player_ids:
+        try:
+            record_endpoint(directory, commonplayerinfo.CommonPlayerInfo(player_id))
+            time.sleep(0.6)
+        except Exception as e:
+            out.info(f"  Skipping player {player_id}: {e}")
+    out.info(f"[OK] Recorded game {game_id} ({len(player_ids)} players)")
+
+def record_live_season(directory, season):
+    from nba_api.stats.endpoints import leaguegamefinder
+
+    finder = leaguegamefinder.LeagueGameFinder(season_nullable=season)
+    record_endpoint(directory, finder)
+    out.info(f"[OK] Recorded schedule for {season}")
+
+def write_synthetic(directory, n_games, season):
+    from src.utils.synthetic_season import generate_season, make_league
+
+    league = make_league()
+    schedule = []
+    for game_id, pbp, rotation_dfs in generate_season(n_games, league=league):
+        away_id = int(rotation_dfs[0]['TEAM_ID'].iloc[0])
+        home_id = int(rotation_dfs[1]['TEAM_ID'].iloc[0])
+        home_score = int(pbp['scoreHome'].iloc[-1])
+        away_score = int(pbp['scoreAway'].iloc[-1])
+
+        save_payload(directory, 'playbyplayv3', {'GameID': game_id}, playbyplay_payload(game_id, pbp))
+        save_payload(directory, 'gamerotation', {'GameID': game_id}, rotation_payload(rotation_dfs))
+        save_payload(directory, 'boxscoretraditionalv3', {'GameID': game_id},
+                     boxscore_payload(game_id, home_id, away_id, home_score, away_score))
+
+        # LeagueGameFinder returns one row per team per game
+        game_date = (pd.Timestamp('2024-10-22') + pd.Timedelta(days=len(schedule) // 20)).strftime('%Y-%m-%d')
+        for team_id, score, opp_score in [(home_id, home_score, away_score), (away_id, away_score, home_score)]:
+            schedule.append({'SEASON_ID': f'2{season[:4]}', 'TEAM_ID': team_id, 'GAME_ID': game_id,
+                             'GAME_DATE': game_date, 'WL': 'W' if score > opp_score else 'L', 'PTS': score})
+
+    save_payload(directory, 'leaguegamefinder', {'Season': season}, game_finder_payload(pd.DataFrame(schedule)))
+    for team in league:
+        for player in team['roster']:
+            save_payload(directory, 'commonplayerinfo', {'PlayerID': player['id']},
+                         player_info_payload(player['id'], player['first'], player['last'], 'G', '6-5', 200))
+    out.info(f"[OK] Wrote {n_games} synthetic games and the {season} schedule")
+
+def write_game7(directory):
+    pbp = pd.read_csv(RAW_DATA_DIR / 'thunder_pacers_game7.csv', dtype={'gameId': str}, index_col=0)
+    game_id = pbp['gameId'].iloc[0]
+    save_payload(directory, 'playbyplayv3', {'GameID': game_id}, playbyplay_payload(game_id, pbp))
+    out.info(f"[OK] Wrote play-by-play for {game_id}")
+
+def main():
+    args = parse_args()
+    setup_logging()
+    if not (args.game_id or args.season or args.synthetic or args.game7):
+        out.info("Nothing to record: pass --game-id, --season, --synthetic or --game7")
+        return 1
+
+    if args.game7:
+        write_game7(args.dir)
+    if args.synthetic:
+        write_synthetic(args.dir, args.synthetic, args.synthetic_season)
+    if args.season:
+        record_live_season(args.dir, args.season)
+    for game_id in args.game_id:
+        record_live_game(args.dir, game_id)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
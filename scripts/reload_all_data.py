@@ -2,47 +2,47 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
+from config import LOGS_DIR
+from src.utils.db_connection import get_engine
 from src.etl.pipeline import process_season
+from src.utils.log_setup import setup_logging, output_logger
 import logging
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/etl_pipeline.log'),
-        logging.StreamHandler()
-    ]
-)
-
 logger = logging.getLogger(__name__)
-
-print("="*70)
-print("RELOADING ALL DATA WITH FIXED LINEUP TRACKER")
-print("="*70)
-
-engine = create_db_engine()
-
-print("\nThe lineup_stints table has been cleared.")
-print("play_by_play, games, players, and teams data is still intact.")
-print("\nStarting to reload lineup stints for all games...")
-print("This will take a while due to NBA API rate limiting.\n")
-
-try:
-    # Process the 2024-25 season
-    # The pipeline will skip already-loaded games (based on play_by_play table)
-    # but will regenerate lineup_stints for all games
-    process_season('2024-25', engine, batch_size=10)
-
-    print("\n" + "="*70)
-    print("DATA RELOAD COMPLETE!")
-    print("="*70)
-
-except Exception as e:
-    logger.error(f"Error during data reload: {e}", exc_info=True)
-    print(f"\n[ERROR] Data reload failed: {e}")
-    print("Check logs/etl_pipeline.log for details")
-
-finally:
-    engine.dispose()
+out = output_logger(__name__)
+
+def main():
+    setup_logging(LOGS_DIR / 'etl_pipeline.jsonl')
+    out.info("="*70)
+    out.info("RELOADING ALL DATA WITH FIXED LINEUP TRACKER")
+    out.info("="*70)
+
+    engine = get_engine()
+
+    out.info("\nThe lineup_stints table has been cleared.")
+    out.info("play_by_play, games, players, and teams data is still intact.")
+    out.info("\nStarting to reload lineup stints for all games...")
+    out.info("This will take a while due to NBA API rate limiting.\n")
+
+    try:
+        # Process the 2024-25 season
+        # The pipeline will skip already-loaded games (based on play_by_play table)
+        # but will regenerate lineup_stints for all games
+        process_season('2024-25', engine, batch_size=10)
+
+        out.info("\n" + "="*70)
+        out.info("DATA RELOAD COMPLETE!")
+        out.info("="*70)
+        return 0
+
+    except Exception as e:
+        logger.error(f"Error during data reload: {e}", exc_info=True)
+        out.error(f"\n[ERROR] Data reload failed: {e}")
+        out.info("Check logs/etl_pipeline.jsonl for details")
+        return 1
+
+    finally:
+        engine.dispose()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,116 +2,74 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
-from src.etl.lineup_tracker import clean_data, get_lineups, get_stints
-from src.etl.database_loader import load_lineup_stints
-import pandas as pd
+import argparse
 import logging
-import time
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/lineup_reload.log'),
-        logging.StreamHandler()
-    ]
-)
+from src.utils.log_setup import setup_logging, output_logger
 
 logger = logging.getLogger(__name__)
-
-engine = create_db_engine()
-
-print("="*70)
-print("RELOADING LINEUP STINTS FOR ALL GAMES")
-print("="*70)
-
-# Get all games from play_by_play table (these are already loaded)
-logger.info("Getting list of all loaded games...")
-games_query = "SELECT DISTINCT game_id FROM play_by_play ORDER BY game_id"
-game_ids = pd.read_sql(games_query, engine)['game_id'].astype(str).str.zfill(10).tolist()
-
-logger.info(f"Found {len(game_ids)} games to process")
-print(f"\nFound {len(game_ids)} games with play-by-play data")
-print("Will regenerate lineup stints for all games using fixed code...\n")
-
-games_processed = 0
-games_failed = 0
-
-for i, game_id in enumerate(game_ids):
+out = output_logger(__name__)
+
+# Regenerates the stints of the loaded games after a tracker fix. Only games
+# whose API inputs or transform code changed since they were loaded are redone
+# (game_fingerprints, src/etl/fingerprints.py); their inputs come from the
+# archive in data/raw/games, so an unchanged game costs a hash and no API call.
+#   python scripts/reload_lineup_stints_only.py               changed games only
+#   python scripts/reload_lineup_stints_only.py --refetch     also pick up corrected API data
+#   python scripts/reload_lineup_stints_only.py --force       every game
+
+def add_arguments(parser):
+    parser.add_argument('--game-ids', nargs='*', default=None, help='Only these games (default every loaded game)')
+    parser.add_argument('--season', type=str, default=None, help='Only the loaded games of this season, e.g. 2024-25')
+    parser.add_argument('--force', action='store_true', help='Reprocess every game, changed or not')
+    parser.add_argument('--refetch', action='store_true', help='Fetch the inputs from the API instead of the archive')
+    return parser
+
+def run(args):
+    from src.utils.db_connection import get_engine
+    from src.etl.database_loader import get_loaded_games
+    from src.etl.pipeline import reload_games
+    from src.etl.stint_store import season_code
+    from src.utils.metrics import RunMetrics
+    from config import LOGS_DIR
+
+    setup_logging(LOGS_DIR / 'lineup_reload.jsonl')
+
+    engine = get_engine()
+
+    out.info("="*70)
+    out.info("RELOADING LINEUP STINTS FOR CHANGED GAMES" if not args.force else "RELOADING LINEUP STINTS FOR ALL GAMES")
+    out.info("="*70)
+
+    game_ids = args.game_ids or get_loaded_games(engine)
+    if args.season:
+        game_ids = [game_id for game_id in game_ids if int(game_id) // 100000 % 100 == season_code(args.season)]
+    logger.info(f"Found {len(game_ids)} games to check")
+    out.info(f"\nChecking {len(game_ids)} loaded games against their fingerprints...\n")
+
+    metrics = RunMetrics()
     try:
-        # Rate limiting: pause every 10 games
-        if i > 0 and i % 10 == 0:
-            logger.info(f"Processed {i} games, taking 30 second break...")
-            time.sleep(30)
-
-        logger.info(f"[{i+1}/{len(game_ids)}] Processing game {game_id}")
-
-        # Get play-by-play data from database
-        pbp_query = f"SELECT * FROM play_by_play WHERE game_id = '{game_id}'"
-        pbp_df = pd.read_sql(pbp_query, engine)
-
-        if len(pbp_df) == 0:
-            logger.warning(f"No play-by-play data found for game {game_id}")
-            games_failed += 1
-            continue
-
-        # Get unique teams (skip team_id 0 which is neutral)
-        teams = pbp_df['team_id'].unique()
-        teams = [t for t in teams if t != 0]
-
-        if len(teams) < 2:
-            logger.warning(f"Game {game_id} has fewer than 2 teams: {teams}")
-            games_failed += 1
-            continue
-
-        # Process lineups for each team
-        all_stints = []
-        for team_id in teams:
-            try:
-                # Get lineups using the FIXED get_lineups function
-                lineups = get_lineups(game_id, team_id)
-                time.sleep(0.6)  # Brief delay for API rate limiting
-
-                # Generate stints
-                stints = get_stints(pbp_df, lineups, team_id)
-                stints = stints[stints['duration_secs'] != 0].copy()
-                all_stints.append(stints)
-
-                logger.info(f"  Team {team_id}: {len(stints)} stints")
-
-            except Exception as e:
-                logger.error(f"  Failed to process team {team_id}: {type(e).__name__}: {str(e)}")
-                raise
-
-        if len(all_stints) > 0:
-            all_stints_df = pd.concat(all_stints)
-
-            # Load to database
-            load_lineup_stints(engine, all_stints_df)
-            games_processed += 1
-            logger.info(f"  Loaded {len(all_stints_df)} total stints for game {game_id}")
-        else:
-            logger.warning(f"No stints generated for game {game_id}")
-            games_failed += 1
-
-        time.sleep(0.6)  # Brief delay between games
-
-    except Exception as e:
-        logger.error(f"Failed to process game {game_id}: {type(e).__name__}: {str(e)}")
-        games_failed += 1
-        continue
-
-print("\n" + "="*70)
-print("RELOAD COMPLETE!")
-print("="*70)
-print(f"Successfully processed: {games_processed} games")
-print(f"Failed: {games_failed} games")
-print("\nNext steps:")
-print("1. Run: python scripts/check_views.py")
-print("2. Verify Power BI dashboards work correctly")
-print("3. Check that lineups now show more than 2 games played together")
-print("="*70)
-
-engine.dispose()
+        result = reload_games(engine, game_ids, force=args.force, refetch=args.refetch, metrics=metrics)
+    finally:
+        engine.dispose()
+
+    out.info("\n" + "="*70)
+    out.info("RELOAD COMPLETE!")
+    out.info("="*70)
+    reasons = ', '.join(f"{count} {reason}" for reason, count in sorted(result['reasons'].items()))
+    out.info(f"Reprocessed: {len(result['reloaded'])} games" + (f" ({reasons})" if reasons else ""))
+    out.info(f"Skipped (unchanged): {result['skipped']} games")
+    out.info(f"Failed: {len(result['failed'])} games" + (f" ({', '.join(result['failed'][:10])})" if result['failed'] else ""))
+    if result['reloaded']:
+        out.info("\nNext steps:")
+        out.info("1. Run: python scripts/check_views.py")
+        out.info("2. Verify Power BI dashboards work correctly")
+    out.info("="*70)
+    return 0 if not result['failed'] else 1
+
+def main(argv=None):
+    parser = add_arguments(argparse.ArgumentParser(description='Regenerate lineup stints for games whose inputs or transform changed'))
+    return run(parser.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
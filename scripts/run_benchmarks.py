@@ -0,0 +1,371 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import glob
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.etl.lineup_tracker import clean_data, clean_subs_pbp, get_lineups, get_stints, get_period_starters
+from src.etl.nba_data_extractor import pbp_cleaner
+from src.etl import database_loader
+from src.etl.validation import validate_game
+from src.etl.live_tracker import LiveGameTracker, replay_stream
+from src.etl.stint_store import write_stint_store, open_stint_store, STINT_DTYPE, LINEUP_DTYPE
+from src.utils.lineup_index import lineup_index_from_store
+from src.utils.rotations import write_rotations, open_rotations, PLAYER_COLUMNS
+from src.utils.synthetic_season import generate_season, make_league, GAMES_PER_SEASON
+from src.utils.log_setup import setup_logging, output_logger
+from check_startup import STARTUP_COMMANDS, STARTUP_BUDGET_MS
+
+out = output_logger(__name__)
+
+# Offline benchmarks for the lineup transform and loader hot paths.
+# Transform cases use the bundled Game 7 play-by-play and synthetic games; the
+# loader cases need a local Postgres (--db) and run in a throwaway schema.
+# Every run is saved to logs/benchmarks/ and compared with the previous run.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAME7_CSV = os.path.join(PROJECT_ROOT, 'data', 'raw', 'thunder_pacers_game7.csv')
+SCHEMA_FILE = os.path.join(PROJECT_ROOT, 'sql', 'schema', '01_create_tables.sql')
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'logs', 'benchmarks')
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark the lineup transform and loader hot paths')
+    parser.add_argument('--rounds', type=int, default=20, help='Timed rounds per case (default 20)')
+    parser.add_argument('--season-games', type=int, default=GAMES_PER_SEASON,
+                        help=f'Synthetic games for the full-season transform case (default {GAMES_PER_SEASON}, 0 to skip)')
+    parser.add_argument('--db', action='store_true', help='Also benchmark the loaders against the database in .env')
+    parser.add_argument('--only', type=str, default=None, help='Only run cases whose name contains this string')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Relative slowdown of the median that counts as a regression (default 0.10)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit 1 if any case regressed')
+    parser.add_argument('--startup-budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help=f'Exit 1 if any CLI subcommand takes longer than this to start (default {STARTUP_BUDGET_MS})')
+    return parser.parse_args()
+
+def time_case(func, rounds, setup=None):
+    """
+    Runs func rounds times (after one untimed warm-up) and returns timing stats in seconds
+    setup: optional callable run before each round, outside the timed region; its result is passed to func
+    """
+    def run_once():
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg) if setup else func()
+        return time.perf_counter() - start
+
+    run_once()
+    timings = [run_once() for _ in range(rounds)]
+    return {'rounds': rounds,
+            'min': min(timings),
+            'median': statistics.median(timings),
+            'mean': statistics.mean(timings),
+            'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0}
+
+def transform_cases():
+    game7 = pd.read_csv(GAME7_CSV, dtype={'gameId': str}, index_col=0)
+    game7_clean = clean_data(game7)
+
+    game_id, pbp, rotation_dfs = next(generate_season(1, seed=1))
+    clean_pbp = clean_data(pbp)
+    team_id = pbp['teamId'].unique()[1]
+    lineups = get_lineups(game_id, team_id, rotation_dfs)
+    _, game_stints = transform_game(game_id, pbp, rotation_dfs)
+    subs = pd.concat([clean_subs_pbp(pbp, team) for team in pbp['teamId'].unique()[1:]])
+    known_players = np.unique(pd.concat(rotation_dfs)['PERSON_ID'].to_numpy(np.int64))
+    game7_polls = list(replay_stream(game7, speed=0, step_secs=30))
+
+    def live_replay():
+        tracker = LiveGameTracker(game7['gameId'].iloc[0])
+        for frame in game7_polls:
+            tracker.process(frame)
+
+    return {
+        'clean_data[game7]': lambda: clean_data(game7),
+        'pbp_cleaner[game7]': lambda: pbp_cleaner(game7_clean),
+        'clean_data[synthetic]': lambda: clean_data(pbp),
+        # Game 7 needs a roster request for players without events, so this one runs on synthetic data
+        'clean_subs_pbp[synthetic]': lambda: clean_subs_pbp(pbp, team_id),
+        'get_period_starters[synthetic]': lambda: get_period_starters(pbp, subs),
+        'get_lineups[synthetic]': lambda: get_lineups(game_id, team_id, rotation_dfs),
+        'get_stints[synthetic]': lambda: get_stints(clean_pbp, lineups, team_id),
+        'validate_game[synthetic]': lambda: validate_game(game_stints, pbp, rotation_dfs, known_players),
+        # Whole game as 96 polls of 30 game seconds, each poll only walks its new events
+        'live_tracker[game7 replay]': live_replay,
+    }
+
+def store_cases(directory, seasons=10):
+    # Random stints at the size of `seasons` full seasons (~60 stints per game), only the read path is timed
+    rng = np.random.default_rng(4)
+    n = seasons * GAMES_PER_SEASON * 60
+    stints = np.zeros(n, dtype=STINT_DTYPE)
+    stints['stint_id'] = np.arange(n)
+    stints['game_id'] = np.sort(rng.integers(21500001, 21500001 + seasons * 100000, n))
+    stints['lineup_id'] = rng.integers(1, 50001, n)
+    stints['duration_secs'] = rng.integers(1, 600, n)
+    stints['points_scored'] = rng.integers(0, 20, n)
+    lineups = np.zeros(50000, dtype=LINEUP_DTYPE)
+    lineups['lineup_id'] = np.arange(1, 50001)
+    # Lineups of 5 from the 15-man roster of one of 30 teams x `seasons` seasons, so they share players like real ones
+    rosters = 1000 + rng.integers(0, 30 * seasons, 50000)[:, None] * 15
+    lineups['players'] = np.sort(rosters + np.argsort(rng.random((50000, 15)), axis=1)[:, :5], axis=1)
+    write_stint_store(directory, stints, lineups)
+
+    def open_and_sum():
+        store = open_stint_store(directory)
+        return int(store.stints['points_scored'].sum())
+
+    index = lineup_index_from_store(open_stint_store(directory))
+    query_ids = iter(np.tile(np.arange(1, 50001), 10))
+
+    return {
+        f'open_stint_store[{seasons} seasons]': lambda: open_stint_store(directory),
+        f'open_stint_store+column_sum[{seasons} seasons]': open_and_sum,
+        f'lineup_index_build[{seasons} seasons]': lambda: lineup_index_from_store(open_stint_store(directory)),
+        f'lineup_index_query[{seasons} seasons]': lambda: index.query(lineup_id=next(query_ids), k=10, more_minutes=True),
+    }
+
+def rotation_cases(directory, n_teams=30, n_games=82, stints_per_game=30):
+    # A season of random stints tiling each game (5 of a 15-man roster each), built once, only queries are timed
+    rng = np.random.default_rng(6)
+    frames = []
+    for t in range(n_teams):
+        for g in range(n_games):
+            bounds = np.r_[0.0, np.round(np.sort(rng.uniform(0, 2880, stints_per_game - 1)), 1), 2880.0]
+            players = 1000 + t * 100 + np.sort(np.argsort(rng.random((stints_per_game, 15)), axis=1)[:, :5], axis=1)
+            frame = pd.DataFrame(players, columns=PLAYER_COLUMNS)
+            frame['game_id'] = 22400001 + t * n_games + g
+            frame['team_id'] = 1610612737 + t
+            frame['start_secs'] = bounds[:-1]
+            frame['end_secs'] = bounds[1:]
+            frames.append(frame)
+    write_rotations(directory, pd.concat(frames, ignore_index=True), '2024-25')
+    team = open_rotations(directory, '2024-25').team(1610612737)
+    pair = team.player_ids[:2]
+
+    return {
+        'rotations_open_team[season]': lambda: open_rotations(directory, '2024-25').team(1610612737),
+        'rotations_heatmap[team-season]': team.heatmap,
+        'rotations_lineup_minutes[team-season]': team.lineup_minutes,
+        'rotations_substitutions[team-season]': team.substitutions,
+        'rotations_stagger[team-season]': lambda: team.stagger(*pair),
+    }
+
+def startup_cases(rounds):
+    """
+    Times `python scripts/nba_etl.py <subcommand> --help` in a fresh interpreter
+    """
+    cli = os.path.join(PROJECT_ROOT, 'scripts', 'nba_etl.py')
+    cases = {}
+    for command in STARTUP_COMMANDS:
+        def start_cli(command=command):
+            subprocess.run([sys.executable, cli] + command, check=True, stdout=subprocess.DEVNULL, cwd=PROJECT_ROOT)
+        cases[f"startup[{' '.join(command)}]"] = (start_cli, rounds)
+    return cases
+
+def transform_game(game_id, pbp, rotation_dfs):
+    # Same transform sequence as process_single_game, without the API and DB calls
+    clean_pbp = clean_data(pbp)
+    stints = []
+    for team in pbp['teamId'].unique()[1:]:
+        lineups = get_lineups(game_id, team, rotation_dfs)
+        team_stints = get_stints(clean_pbp, lineups, team)
+        stints.append(team_stints[team_stints['duration_secs'] != 0])
+    return pbp_cleaner(clean_pbp), pd.concat(stints)
+
+def season_case(n_games):
+    # Generation is excluded from the timing, only the transform is measured
+    games = list(generate_season(n_games, seed=2))
+    start = time.perf_counter()
+    for game in games:
+        transform_game(*game)
+    elapsed = time.perf_counter() - start
+    return {'rounds': 1, 'min': elapsed, 'median': elapsed, 'mean': elapsed, 'stdev': 0.0,
+            'games': n_games, 'games_per_second': n_games / elapsed}
+
+def loader_cases(rounds):
+    from sqlalchemy import event, text
+    from src.utils.db_connection import create_db_engine
+
+    schema = f'bench_{os.getpid()}'
+    engine = create_db_engine()
+
+    # Every pooled connection works inside the throwaway schema
+    @event.listens_for(engine, 'connect')
+    def set_search_path(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f'SET search_path TO {schema}')
+        cursor.close()
+
+    # Only the CREATE statements: the DROPs in the schema file must never touch real tables
+    with open(SCHEMA_FILE, 'r', encoding='utf-8') as f:
+        statements = [stmt.strip() for stmt in f.read().split(';')]
+    creates = [stmt[stmt.index('CREATE'):] for stmt in statements if 'CREATE TABLE' in stmt]
+
+    results = {}
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f'CREATE SCHEMA {schema}'))
+            conn.execute(text(f'SET search_path TO {schema}'))
+            for stmt in creates:
+                conn.execute(text(stmt))
+
+        league = make_league()
+        # Period/timeout events carry team_id 0 and player_id 0, seed them so the FKs hold
+        teams_df = pd.DataFrame([{'team_id': 0, 'abbreviation': '', 'team_name': 'None'}] +
+                                [{'team_id': t['id'], 'abbreviation': t['tricode'], 'team_name': t['name']} for t in league])
+        players_df = pd.DataFrame([{'player_id': 0, 'player_name': 'None', 'position': None, 'height': None, 'weight': None}] +
+                                  [{'player_id': p['id'], 'player_name': f"{p['first']} {p['last']}", 'position': 'G', 'height': '6-5', 'weight': 200}
+                                   for t in league for p in t['roster']])
+        results['load_teams'] = time_case(lambda: database_loader.load_teams(engine, teams_df), 1)
+        results['load_players'] = time_case(lambda: database_loader.load_players(engine, players_df), 1)
+
+        # Each round loads a different game so the inserts are never duplicate-key no-ops
+        games = []
+        for game_id, pbp, rotation_dfs in generate_season(rounds + 1, seed=3):
+            home, away = pbp['teamId'].unique()[1:3]
+            game_df = pd.DataFrame({'game_id': [game_id], 'home_team_id': [home], 'away_team_id': [away],
+                                    'home_score': [100], 'away_score': [99]})
+            clean_pbp, stints = transform_game(game_id, pbp, rotation_dfs)
+            games.append((game_df, clean_pbp, stints))
+
+        def next_game():
+            return games.pop()
+
+        def load_game(game):
+            game_df, clean_pbp, stints = game
+            database_loader.load_games(engine, game_df)
+            return clean_pbp, stints
+
+        def run_playbyplay(game):
+            clean_pbp, stints = load_game(game)
+            database_loader.load_playbyplay(engine, clean_pbp)
+            pending_stints.append(stints)
+
+        pending_stints = []
+        results['load_playbyplay'] = time_case(run_playbyplay, rounds, setup=next_game)
+
+        def next_stints():
+            # Cold interning map each round, as in a fresh process
+            database_loader._lineup_ids.clear()
+            return pending_stints.pop()
+
+        results['load_lineup_stints'] = time_case(lambda stints: database_loader.load_lineup_stints(engine, stints),
+                                                  rounds, setup=next_stints)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS {schema} CASCADE'))
+        engine.dispose()
+    return results
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+def compare(results, previous, threshold):
+    regressions = []
+    out.info(f"\n{'case':<40}{'median ms':>12}{'previous':>12}{'change':>10}")
+    for name, stats in results['cases'].items():
+        median_ms = stats['median'] * 1000
+        before = previous['cases'].get(name) if previous else None
+        if before:
+            before_ms = before['median'] * 1000
+            change = (median_ms - before_ms) / before_ms if before_ms > 0 else 0.0
+            flag = '  REGRESSION' if change > threshold else ''
+            if flag:
+                regressions.append(name)
+            out.info(f"{name:<40}{median_ms:>12.2f}{before_ms:>12.2f}{change:>+9.1%}{flag}")
+        else:
+            out.info(f"{name:<40}{median_ms:>12.2f}{'-':>12}{'-':>10}")
+    return regressions
+
+def main():
+    args = parse_args()
+    setup_logging()
+
+    results = {'commit': current_commit(),
+               'timestamp': datetime.now().isoformat(timespec='seconds'),
+               'rounds': args.rounds,
+               'cases': {}}
+
+    out.info("Running transform benchmarks...")
+    for name, func in transform_cases().items():
+        if args.only and args.only not in name:
+            continue
+        results['cases'][name] = time_case(func, args.rounds)
+        out.info(f"  {name}: {results['cases'][name]['median'] * 1000:.2f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, func in store_cases(os.path.join(tmp_dir, 'stint_store')).items():
+            if args.only and args.only not in name:
+                continue
+            results['cases'][name] = time_case(func, args.rounds)
+            out.info(f"  {name}: {results['cases'][name]['median'] * 1000:.2f} ms")
+        if not args.only or 'rotations' in args.only:
+            for name, func in rotation_cases(os.path.join(tmp_dir, 'rotations')).items():
+                if args.only and args.only not in name:
+                    continue
+                results['cases'][name] = time_case(func, args.rounds)
+                out.info(f"  {name}: {results['cases'][name]['median'] * 1000:.2f} ms")
+
+    out.info("Running CLI startup benchmarks...")
+    over_budget = []
+    for name, (func, rounds) in startup_cases(min(args.rounds, 5)).items():
+        if args.only and args.only not in name:
+            continue
+        results['cases'][name] = time_case(func, rounds)
+        median_ms = results['cases'][name]['median'] * 1000
+        if median_ms > args.startup_budget_ms:
+            over_budget.append(name)
+        out.info(f"  {name}: {median_ms:.2f} ms")
+
+    name = f'transform_season[{args.season_games}]'
+    if args.season_games > 0 and (not args.only or args.only in name):
+        out.info(f"Running full-season transform over {args.season_games} synthetic games...")
+        results['cases'][name] = season_case(args.season_games)
+        out.info(f"  {results['cases'][name]['games_per_second']:.1f} games/s")
+
+    if args.db:
+        out.info("Running loader benchmarks...")
+        for name, stats in loader_cases(args.rounds).items():
+            if args.only and args.only not in name:
+                continue
+            results['cases'][name] = stats
+            out.info(f"  {name}: {stats['median'] * 1000:.2f} ms")
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    previous_runs = sorted(glob.glob(os.path.join(RESULTS_DIR, '*.json')))
+    previous = None
+    if previous_runs:
+        with open(previous_runs[-1], 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+        out.info(f"\nComparing with {os.path.basename(previous_runs[-1])} (commit {previous.get('commit')})")
+
+    regressions = compare(results, previous, args.threshold)
+
+    out_path = os.path.join(RESULTS_DIR, f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['commit']}.json")
+    with open(out_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    out.info(f"\nSaved results to {out_path}")
+
+    if over_budget:
+        out.info(f"{len(over_budget)} command(s) over the {args.startup_budget_ms:.0f} ms startup budget: {', '.join(over_budget)}")
+        return 1
+    if regressions and args.fail_on_regression:
+        out.info(f"{len(regressions)} case(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,82 +1,147 @@
 import sys
 import argparse
+from datetime import date
 from pathlib import Path
-from dotenv import load_dotenv
 import logging
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 log_dir = project_root / 'logs'
-log_dir.mkdir(exist_ok=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    handlers=[
-        logging.StreamHandler(sys.stdout),              # Print to console
-        logging.FileHandler(log_dir / 'etl_pipeline.log')  # Save to file
-    ]
-)
+from src.utils.log_setup import setup_logging, output_logger
 
 logger = logging.getLogger(__name__)
+out = output_logger(__name__)
 
-load_dotenv()
+# Nothing heavy is imported at module level: pandas, SQLAlchemy and nba_api are only
+# loaded by run(), so --help and the nba_etl.py dispatcher start instantly
 
-from src.etl.pipeline import process_season, process_single_game
-from src.utils.db_connection import create_db_engine
-
-def parse_args():
-    parser = argparse.ArgumentParser(description='Run NBA Lineup Analysis ETL Pipeline')
-    
+def add_arguments(parser):
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument('--game-id', type=str, help='Process single game (e.g., 0022300001)')
     group.add_argument('--season', type=str, help='Process full season (e.g., 2024-25)')
+    group.add_argument('--since', type=date.fromisoformat, help='Incremental: process new finished games since this date (e.g., 2025-01-15)')
+    group.add_argument('--daily', action='store_true', help='Incremental: process new finished games from yesterday and today')
 
-    return parser.parse_args()
+    parser.add_argument('--until', type=date.fromisoformat, default=None, help='With --since, last date of the window (default today)')
+    parser.add_argument('--metrics-dir', type=str, default=str(log_dir / 'metrics'),
+                        help='Directory for the per-run JSON/CSV stage timing report')
+    parser.add_argument('--prometheus-textfile', type=str, default=None,
+                        help='Also write stage histograms to this Prometheus textfile (e.g., /var/lib/node_exporter/etl.prom)')
+    parser.add_argument('--prefetch', type=int, default=0,
+                        help='Season mode: fetch this many games ahead over async HTTP while the current game loads (0 = sequential)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Max in-flight API requests when prefetching')
+    parser.add_argument('--requests-per-minute', type=int, default=20, help='API request budget when prefetching')
+    parser.add_argument('--queue', type=str, nargs='?', const='', default=None,
+                        help='Season mode: run through the resumable work queue (optional SQLite path, default data/processed/etl_queue.sqlite)')
+    parser.add_argument('--retry-failed', action='store_true', help='With --queue, retry games that ran out of attempts on earlier runs')
+    parser.add_argument('--retry-quarantined', action='store_true',
+                        help='Refetch games that failed validation on earlier runs (skipped until the transform code changes otherwise)')
+    parser.add_argument('--profile', type=float, default=0.0, metavar='FRACTION',
+                        help='Profile this fraction of the games (0-1, picked by game id) into --profile-dir')
+    parser.add_argument('--profile-slowest', type=int, default=0, metavar='N',
+                        help='Profile every game and keep the N slowest')
+    parser.add_argument('--profile-dir', type=str, default=str(log_dir / 'profiles'),
+                        help='Directory for the pstats / collapsed stack profiles and the run summary')
+    parser.add_argument('--log-level', type=str, default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Level of the console and logs/etl_pipeline.jsonl (JSON lines, rotated)')
+    return parser
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Run NBA Lineup Analysis ETL Pipeline')
+    return add_arguments(parser).parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main entry point"""
-    args = parse_args()
+    return run(parse_args(argv))
+
+def run(args):
+    setup_logging(log_dir / 'etl_pipeline.jsonl', level=args.log_level)
+    from dotenv import load_dotenv
+    load_dotenv()
+    from src.etl.pipeline import process_season, process_season_queued, process_single_game, process_daily, refresh_aggregates
+    from src.utils.db_connection import get_engine, dispose_engines, pool_status
+    from src.utils.metrics import RunMetrics
 
     logger.info("NBA LINEUP ANALYSIS ETL PIPELINE")
+    metrics = RunMetrics()
+    if args.profile > 0 or args.profile_slowest > 0:
+        from src.utils.profiling import GameProfiler
+        metrics.profiler = GameProfiler(args.profile_dir, fraction=args.profile, slowest=args.profile_slowest, run_id=metrics.run_id)
+        logger.info(f"Profiling {args.profile:.0%} of the games" +
+                    (f" and the {args.profile_slowest} slowest" if args.profile_slowest else '') + f" into {args.profile_dir}")
     try:
         if args.game_id:
             logger.info(f"Mode: Single Game ({args.game_id})")
-            engine = create_db_engine()
+            engine = get_engine()
             try:
-                success = process_single_game(args.game_id, engine)
+                with metrics.profile(args.game_id):
+                    success = process_single_game(args.game_id, engine, metrics)
                 if success:
-                    print("Pipeline Successfully loaded game")
+                    refresh_aggregates(engine, [args.game_id], metrics)
+                    out.info("Pipeline Successfully loaded game")
                     return 0
                 else:
-                    print("Pipeline Failed to load game")
+                    out.error("Pipeline Failed to load game")
                     return 1
             finally:
                 logger.debug("Disposing database engine...")
-                engine.dispose()
+                dispose_engines()
                 # make sure to close the engine after use
         elif args.season:
             logger.info(f"Mode: Full Season ({args.season})")
-            engine = create_db_engine()
+            engine = get_engine()
             try: 
-                success = process_season(args.season, engine)
+                if args.queue is not None:
+                    success = process_season_queued(args.season, engine, queue_path=args.queue or None,
+                                                    metrics=metrics, retry_failed=args.retry_failed,
+                                                    retry_quarantined=args.retry_quarantined)
+                else:
+                    success = process_season(args.season, engine, metrics=metrics, prefetch=args.prefetch,
+                                             concurrency=args.concurrency, requests_per_minute=args.requests_per_minute,
+                                             retry_quarantined=args.retry_quarantined)
+                if success:
+                    out.info("Pipeline Successfully loaded season")
+                    return 0
+                else:
+                    out.error("Pipeline Failed to load season")
+                    return 1
+            finally:
+                logger.debug("Disposing database engine...")
+                dispose_engines()
+        else:
+            logger.info(f"Mode: Incremental ({args.since or 'yesterday'} to {args.until or 'today'})")
+            engine = get_engine()
+            try:
+                success = process_daily(engine, since=args.since, until=args.until, metrics=metrics,
+                                        retry_quarantined=args.retry_quarantined)
                 if success:
-                    print("Pipeline Successfully loaded season")
+                    out.info("Pipeline Successfully loaded new games")
                     return 0
                 else:
-                    print("Pipeline Failed to load season")
+                    out.error("Pipeline Failed to load some new games")
                     return 1
             finally:
                 logger.debug("Disposing database engine...")
-                engine.dispose()
+                dispose_engines()
     except KeyboardInterrupt:
         logger.warning("Pipeline interrupted by user (Ctrl+C)")
         return 130
     except Exception as e:
         logger.error(f"Error {e}")
         return 1
+    finally:
+        # Report whatever was measured, including interrupted runs
+        metrics.set_gauges('db_pool', pool_status())
+        logger.info(f"Database pool: {pool_status()}")
+        metrics.write_report(args.metrics_dir)
+        if args.prometheus_textfile:
+            metrics.write_prometheus(args.prometheus_textfile)
+        if metrics.profiler is not None:
+            summary = metrics.profiler.finish()
+            if summary:
+                out.info(summary)
 
 if __name__ == "__main__":
     sys.exit(main())
\ No newline at end of file
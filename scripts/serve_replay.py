@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from config import REPLAY_DATA_DIR
+from src.utils.replay_server import ReplayConfig, start_replay_server
+from src.utils.log_setup import setup_logging, output_logger
+
+# Serves data/replay/ as a local stats.nba.com. In another shell:
+#   NBA_STATS_BASE_URL=http://127.0.0.1:8765 python scripts/run_etl.py --game-id 0029900001
+
+out = output_logger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve recorded stats.nba.com payloads')
+    parser.add_argument('--dir', type=str, default=str(REPLAY_DATA_DIR), help='Payload directory')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='+/- uniform seconds on top of --latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--requests-per-minute', type=int, default=None, help='Sliding-window budget before 429s')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for reproducible fault injection')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    setup_logging()
+    config = ReplayConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          throttle_rate=args.throttle_rate, requests_per_minute=args.requests_per_minute,
+                          seed=args.seed)
+    server = start_replay_server(args.dir, args.host, args.port, config)
+    out.info(f"Replay server running at {server.base_url} (Ctrl+C to stop)")
+    out.info(f"Use it with: NBA_STATS_BASE_URL={server.base_url}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        out.info(f"Request stats: {server.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+from dotenv import load_dotenv
+
+from src.utils.db_connection import get_engine
+from src.utils.summary_server import start_summary_server
+from src.utils.log_setup import setup_logging, output_logger
+
+# Serves the dashboard summaries from the per game aggregate tables. In Power BI:
+# Get Data -> Web -> http://127.0.0.1:8766/lineups?season=2024-25&format=csv
+# Needs sql/schema/05_summary_tables.sql on existing databases.
+
+out = output_logger(__name__)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Serve cached lineup, player and game summaries over HTTP')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--version-ttl', type=float, default=2.0,
+                        help='Seconds between checks of etl_data_version (default 2)')
+    parser.add_argument('--warm', action='store_true', help='Compute the unfiltered summaries before serving')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    setup_logging()
+    load_dotenv()
+    engine = get_engine()
+    server = start_summary_server(engine, args.host, args.port, args.version_ttl)
+    if args.warm:
+        server.cache.warm()
+    out.info(f"Summary server running at {server.base_url} (Ctrl+C to stop)")
+    out.info(f"Endpoints: {server.base_url}/lineups, /players, /games, /version  (?season=, ?team_id=, ?format=csv)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        engine.dispose()
+        out.info(f"Request stats: {server.cache.stats}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
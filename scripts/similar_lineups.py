@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import time
+
+import pandas as pd
+
+from config import PROCESSED_DATA_DIR
+from src.utils.lineup_index import lineup_index_from_store, lineup_index_from_database
+from src.utils.log_setup import setup_logging, output_logger
+
+out = output_logger(__name__)
+
+# Nearest lineups to a five, from the stint store (scripts/export_stints.py) or the database:
+#   python scripts/similar_lineups.py --lineup-id 1234 --more-minutes
+#   python scripts/similar_lineups.py --players 1628983,1631096,1628392,1629652,1631114 --db --weights minutes
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Find the lineups most similar to a given five')
+    parser.add_argument('--lineup-id', type=int, default=None, help='Lineup to search around')
+    parser.add_argument('--players', type=str, default=None, help='Or 5 comma separated player ids')
+    parser.add_argument('--store', type=str, default=str(PROCESSED_DATA_DIR / 'stint_store'), help='Stint store to index')
+    parser.add_argument('--db', action='store_true', help='Index lineup_game_stats instead of the stint store (and show names)')
+    parser.add_argument('-k', type=int, default=10, help='Lineups to return (default 10)')
+    parser.add_argument('--more-minutes', action='store_true', help='Only lineups that played more minutes than --lineup-id')
+    parser.add_argument('--min-minutes', type=float, default=None, help='Only lineups with at least this many minutes')
+    parser.add_argument('--team-id', type=int, default=None, help='Only lineups of this team')
+    parser.add_argument('--weights', choices=['none', 'minutes'], default='none',
+                        help="'minutes' weights shared players by their minutes (default plain Jaccard)")
+    parser.add_argument('--stat-weight', type=float, default=0.0,
+                        help='Rank by jaccard - w * stat distance instead of Jaccard first (default 0)')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    setup_logging()
+    if args.lineup_id is None and args.players is None:
+        out.error("[ERROR] Give --lineup-id or --players")
+        return 1
+    player_weights = 'minutes' if args.weights == 'minutes' else None
+
+    engine = None
+    start = time.perf_counter()
+    if args.db:
+        from src.utils.db_connection import get_engine
+        engine = get_engine()
+        index = lineup_index_from_database(engine, player_weights=player_weights)
+    else:
+        from src.etl.stint_store import open_stint_store
+        index = lineup_index_from_store(open_stint_store(args.store), player_weights=player_weights)
+    out.info(f"Indexed {len(index)} lineups in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    players = [int(player) for player in args.players.split(',')] if args.players else None
+    start = time.perf_counter()
+    try:
+        result = index.query(players=players, lineup_id=args.lineup_id, k=args.k,
+                             min_seconds=args.min_minutes * 60 if args.min_minutes is not None else None,
+                             more_minutes=args.more_minutes, team_id=args.team_id, stat_weight=args.stat_weight)
+    except ValueError as e:
+        out.error(f"[ERROR] {e}")
+        return 1
+    out.info(f"Query took {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    if engine is not None and len(result):
+        names = pd.read_sql("SELECT player_id, player_name FROM players", engine).set_index('player_id')['player_name']
+        player_columns = [f'player{i + 1}_id' for i in range(5)]
+        result['lineup'] = result[player_columns].apply(lambda row: ', '.join(str(names.get(player, player)) for player in row), axis=1)
+        result = result.drop(columns=player_columns)
+        engine.dispose()
+
+    out.info("="*70)
+    out.info(result.to_string(index=False) if len(result) else "No lineup shares a player with this one")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,22 +2,38 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.utils.db_connection import create_db_engine
+from src.utils.db_connection import get_engine
+from src.etl.view_manager import probe, latest_game_id
 import pandas as pd
+from src.utils.log_setup import setup_logging, output_logger
 
-engine = create_db_engine()
+out = output_logger(__name__)
 
-print("Checking which views exist in database...")
-views = pd.read_sql("SELECT table_name FROM information_schema.views WHERE table_schema = 'public' ORDER BY table_name", engine)
-print("\nViews found:")
-print(views)
+def main():
+    setup_logging()
+    engine = get_engine()
 
-print("\nTesting each view:")
-for view_name in views['table_name']:
-    try:
-        count = pd.read_sql(f'SELECT COUNT(*) FROM {view_name}', engine)
-        print(f"  {view_name}: OK ({count.iloc[0,0]} rows)")
-    except Exception as e:
-        print(f"  {view_name}: ERROR - {str(e)[:100]}")
+    out.info("Checking which views exist in database...")
+    views = pd.read_sql("SELECT table_name FROM information_schema.views WHERE table_schema = 'public' ORDER BY table_name", engine)
+    out.info("\nViews found:")
+    out.info(views)
 
-engine.dispose()
+    # One game's rows (or just the plan) per view instead of a full COUNT(*) scan
+    game_id = latest_game_id(engine)
+    out.info(f"\nTesting each view (probe game {game_id}):")
+    for view_name in views['table_name']:
+        try:
+            with engine.connect() as conn:
+                result = probe(conn, 'public', view_name, game_id)
+            if result['rows'] is None:
+                out.info(f"  {view_name}: OK (plan only)")
+            else:
+                out.info(f"  {view_name}: OK ({result['rows']} rows for the probe game, md5 {result['checksum'][:8]})")
+        except Exception as e:
+            out.error(f"  {view_name}: ERROR - {str(e)[:100]}")
+
+    engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
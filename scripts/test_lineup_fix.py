@@ -2,78 +2,89 @@ import sys
 import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.etl.lineup_tracker import get_lineups, get_stints, clean_data
+from src.etl.lineup_tracker import get_lineups, get_stints, clean_data, lineup_key
 from nba_api.stats.endpoints import playbyplayv3
 import pandas as pd
+from src.utils.log_setup import setup_logging, output_logger
 
-# Test with the problematic game from earlier
-game_id = '0042400407'
-team1_id = 1610612754  # Indiana Pacers
-team2_id = 1610612760  # Oklahoma City Thunder
+out = output_logger(__name__)
 
-print("="*70)
-print("TESTING LINEUP TRACKER FIX")
-print(f"Game: {game_id}")
-print(f"Team 1: {team1_id} (Pacers)")
-print(f"Team 2: {team2_id} (Thunder)")
-print("="*70)
+def main():
+    setup_logging()
+    # Test with the problematic game from earlier
+    game_id = '0042400407'
+    team1_id = 1610612754  # Indiana Pacers
+    team2_id = 1610612760  # Oklahoma City Thunder
 
-print("\nStep 1: Getting play-by-play data...")
-pbp = playbyplayv3.PlayByPlayV3(game_id)
-pbp_df = pbp.get_data_frames()[0]
-clean_pbp = clean_data(pbp_df)
-print(f"[OK] Got {len(clean_pbp)} play-by-play events")
+    out.info("="*70)
+    out.info("TESTING LINEUP TRACKER FIX")
+    out.info(f"Game: {game_id}")
+    out.info(f"Team 1: {team1_id} (Pacers)")
+    out.info(f"Team 2: {team2_id} (Thunder)")
+    out.info("="*70)
 
-print("\nStep 2: Getting lineups for Team 1 (Pacers)...")
-team1_lineups = get_lineups(game_id, team1_id)
-print(f"[OK] Found {len(team1_lineups)} lineups for Team 1")
-print(f"  First lineup: {team1_lineups[0]['PLAYERS']}")
+    out.info("\nStep 1: Getting play-by-play data...")
+    pbp = playbyplayv3.PlayByPlayV3(game_id)
+    pbp_df = pbp.get_data_frames()[0]
+    clean_pbp = clean_data(pbp_df)
+    out.info(f"[OK] Got {len(clean_pbp)} play-by-play events")
 
-print("\nStep 3: Getting lineups for Team 2 (Thunder)...")
-team2_lineups = get_lineups(game_id, team2_id)
-print(f"[OK] Found {len(team2_lineups)} lineups for Team 2")
-print(f"  First lineup: {team2_lineups[0]['PLAYERS']}")
+    out.info("\nStep 2: Getting lineups for Team 1 (Pacers)...")
+    team1_lineups = get_lineups(game_id, team1_id)
+    out.info(f"[OK] Found {len(team1_lineups)} lineups for Team 1")
+    out.info(f"  First lineup: {team1_lineups[0]['PLAYERS']}")
 
-print("\nStep 4: Checking for duplicates...")
-team1_hashes = set('-'.join(str(p) for p in lineup['PLAYERS']) for lineup in team1_lineups)
-team2_hashes = set('-'.join(str(p) for p in lineup['PLAYERS']) for lineup in team2_lineups)
-duplicates = team1_hashes.intersection(team2_hashes)
+    out.info("\nStep 3: Getting lineups for Team 2 (Thunder)...")
+    team2_lineups = get_lineups(game_id, team2_id)
+    out.info(f"[OK] Found {len(team2_lineups)} lineups for Team 2")
+    out.info(f"  First lineup: {team2_lineups[0]['PLAYERS']}")
 
-if duplicates:
-    print(f"[ERROR] Found {len(duplicates)} duplicate lineups between teams!")
-    for dup in list(duplicates)[:3]:
-        print(f"  {dup}")
-else:
-    print("[OK] No duplicate lineups found - FIX IS WORKING!")
+    out.info("\nStep 4: Checking for duplicates...")
+    team1_hashes = set('-'.join(str(p) for p in lineup['PLAYERS']) for lineup in team1_lineups)
+    team2_hashes = set('-'.join(str(p) for p in lineup['PLAYERS']) for lineup in team2_lineups)
+    duplicates = team1_hashes.intersection(team2_hashes)
 
-print("\nStep 5: Generating stints for both teams...")
-team1_stints = get_stints(clean_pbp, team1_lineups, team1_id)
-team2_stints = get_stints(clean_pbp, team2_lineups, team2_id)
-print(f"[OK] Team 1: {len(team1_stints)} stints")
-print(f"[OK] Team 2: {len(team2_stints)} stints")
+    if duplicates:
+        out.error(f"[ERROR] Found {len(duplicates)} duplicate lineups between teams!")
+        for dup in list(duplicates)[:3]:
+            out.info(f"  {dup}")
+    else:
+        out.info("[OK] No duplicate lineups found - FIX IS WORKING!")
 
-print("\nStep 6: Verifying stint data integrity...")
-combined = pd.concat([team1_stints, team2_stints])
-print(f"  Total stints: {len(combined)}")
-print(f"  Unique team_ids: {combined['team_id'].unique()}")
-print(f"  Unique lineup_hashes: {combined['lineup_hash'].nunique()}")
+    out.info("\nStep 5: Generating stints for both teams...")
+    team1_stints = get_stints(clean_pbp, team1_lineups, team1_id)
+    team2_stints = get_stints(clean_pbp, team2_lineups, team2_id)
+    out.info(f"[OK] Team 1: {len(team1_stints)} stints")
+    out.info(f"[OK] Team 2: {len(team2_stints)} stints")
 
-# Check if same lineup_hash appears for both teams
-duplicates_in_stints = combined.groupby('lineup_hash')['team_id'].nunique()
-duplicates_in_stints = duplicates_in_stints[duplicates_in_stints > 1]
+    out.info("\nStep 6: Verifying stint data integrity...")
+    combined = pd.concat([team1_stints, team2_stints])
+    player_cols = ['player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']
+    combined['lineup_hash'] = ['-'.join(str(p) for p in lineup_key(row)) for row in combined[player_cols].itertuples(index=False, name=None)]
+    out.info(f"  Total stints: {len(combined)}")
+    out.info(f"  Unique team_ids: {combined['team_id'].unique()}")
+    out.info(f"  Unique lineup_hashes: {combined['lineup_hash'].nunique()}")
 
-if len(duplicates_in_stints) > 0:
-    print(f"\n[ERROR] {len(duplicates_in_stints)} lineup_hashes appear for multiple teams!")
-    print("  Examples:")
-    for hash_val in duplicates_in_stints.index[:3]:
-        teams = combined[combined['lineup_hash'] == hash_val]['team_id'].unique()
-        print(f"    {hash_val}: teams {teams}")
-else:
-    print("\n[SUCCESS] Each lineup_hash belongs to exactly one team!")
+    # Check if same lineup_hash appears for both teams
+    duplicates_in_stints = combined.groupby('lineup_hash')['team_id'].nunique()
+    duplicates_in_stints = duplicates_in_stints[duplicates_in_stints > 1]
 
-print("\n" + "="*70)
-if len(duplicates_in_stints) == 0:
-    print("FIX VERIFIED - Ready to reload all data!")
-else:
-    print("FIX NOT WORKING - Further investigation needed")
-print("="*70)
+    if len(duplicates_in_stints) > 0:
+        out.error(f"\n[ERROR] {len(duplicates_in_stints)} lineup_hashes appear for multiple teams!")
+        out.info("  Examples:")
+        for hash_val in duplicates_in_stints.index[:3]:
+            teams = combined[combined['lineup_hash'] == hash_val]['team_id'].unique()
+            out.info(f"    {hash_val}: teams {teams}")
+    else:
+        out.info("\n[SUCCESS] Each lineup_hash belongs to exactly one team!")
+
+    out.info("\n" + "="*70)
+    if len(duplicates_in_stints) == 0:
+        out.info("FIX VERIFIED - Ready to reload all data!")
+    else:
+        out.info("FIX NOT WORKING - Further investigation needed")
+    out.info("="*70)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
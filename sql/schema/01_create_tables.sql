@@ -1,12 +1,23 @@
 -- Active: 1760807926261@@127.0.0.1@5432@nba_analysis
 -- Active: 1760716511493@@127.0.0.1@5432
 
+DROP TABLE IF EXISTS game_fingerprints CASCADE;
+DROP TABLE IF EXISTS player_rating_intervals CASCADE;
+DROP TABLE IF EXISTS lineup_rating_intervals CASCADE;
+DROP TABLE IF EXISTS etl_data_version CASCADE;
+DROP TABLE IF EXISTS player_game_stats CASCADE;
+DROP TABLE IF EXISTS lineup_game_stats CASCADE;
 DROP TABLE IF EXISTS lineup_stints CASCADE;
+DROP TABLE IF EXISTS lineups CASCADE;
 DROP TABLE IF EXISTS play_by_play CASCADE;
+DROP TABLE IF EXISTS action_types CASCADE;
 DROP TABLE IF EXISTS games CASCADE;
 DROP TABLE IF EXISTS players CASCADE;
 DROP TABLE IF EXISTS teams CASCADE;
 
+-- GiST indexes on (game_id, time range) need the btree_gist operator classes
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
 
 CREATE TABLE IF NOT EXISTS teams (
     team_id INT PRIMARY KEY,
@@ -33,56 +44,166 @@ CREATE TABLE IF NOT EXISTS games(
     FOREIGN KEY (away_team_id) REFERENCES teams(team_id)
 );
 
+-- Action type/subtype pairs ('Made Shot', 'Jump Shot'), play_by_play stores the id
+CREATE TABLE IF NOT EXISTS action_types(
+    action_type_id SMALLSERIAL PRIMARY KEY,
+    action_type VARCHAR(40) NOT NULL,
+    action_subtype VARCHAR(60) NOT NULL DEFAULT '',
+
+    UNIQUE (action_type, action_subtype)
+);
+
+-- The event time is seconds_into_game (the API clock and seconds left are derived from it and
+-- period), the player's name is in players
 CREATE TABLE IF NOT EXISTS play_by_play(
     event_id SERIAL PRIMARY KEY,
     game_id INT,
-    action_id INT,
-    period INT,
-    clock VARCHAR(15),
-    seconds_left_in_game INT,
-    seconds_into_game INT,
+    action_id SMALLINT,
+    period SMALLINT,
+    seconds_into_game NUMERIC(6,1),
     player_id INT,
-    player_name VARCHAR(80),
     team_id INT,
     description VARCHAR(200),
-    action_type VARCHAR(80),
-    action_subtype VARCHAR(80),
-    shot_value INT,
+    action_type_id SMALLINT,
+    shot_value SMALLINT,
     shot_result VARCHAR(10),
 
     FOREIGN KEY (game_id) REFERENCES games(game_id),
     FOREIGN KEY (player_id) REFERENCES players(player_id),
-    FOREIGN KEY (team_id) REFERENCES teams(team_id)
+    FOREIGN KEY (team_id) REFERENCES teams(team_id),
+    FOREIGN KEY (action_type_id) REFERENCES action_types(action_type_id)
+);
+
+-- One row per distinct 5-player combination (player ids sorted ascending)
+CREATE TABLE IF NOT EXISTS lineups(
+    lineup_id SERIAL PRIMARY KEY,
+    player1_id INT NOT NULL,
+    player2_id INT NOT NULL,
+    player3_id INT NOT NULL,
+    player4_id INT NOT NULL,
+    player5_id INT NOT NULL,
+    lineup_hash VARCHAR(100) NOT NULL UNIQUE
 );
 
 CREATE TABLE IF NOT EXISTS lineup_stints(
     stint_id SERIAL PRIMARY KEY,
     game_id INT,
     team_id INT,
+    lineup_id INT,
     start_num INT,
     end_num INT,
+    -- Game clock bounds, an event at seconds_into_game t is in the stint when start_secs < t <= end_secs
+    start_secs NUMERIC(6,1),
+    end_secs NUMERIC(6,1),
     duration_secs INT,
-    player1_id INT,
-    player2_id INT,
-    player3_id INT,
-    player4_id INT,
-    player5_id INT,
-    lineup_hash VARCHAR(100),
+
+    FOREIGN KEY (game_id) REFERENCES games(game_id),
+    FOREIGN KEY (lineup_id) REFERENCES lineups(lineup_id)
+);
+
+-- Range index for the event -> stint join in lineup_stint_stats
+CREATE INDEX IF NOT EXISTS idx_stints_game_time ON lineup_stints
+    USING gist (game_id, numrange(start_secs, end_secs, '(]'));
+
+-- Per game lineup totals, rebuilt only for newly loaded games (see refresh_lineup_game_stats)
+CREATE TABLE IF NOT EXISTS lineup_game_stats(
+    game_id INT,
+    team_id INT,
+    lineup_id INT,
+    stints INT,
+    seconds INT,
+    points_scored INT,
+    points_allowed INT,
+    possessions INT,
+
+    PRIMARY KEY (game_id, team_id, lineup_id),
+    FOREIGN KEY (game_id) REFERENCES games(game_id),
+    FOREIGN KEY (lineup_id) REFERENCES lineups(lineup_id)
+);
+
+-- Per game player on-court totals, rebuilt with lineup_game_stats
+CREATE TABLE IF NOT EXISTS player_game_stats(
+    game_id INT,
+    team_id INT,
+    player_id INT,
+    stints INT,
+    seconds INT,
+    points_scored INT,
+    points_allowed INT,
+    possessions INT,
+
+    PRIMARY KEY (game_id, team_id, player_id),
+    FOREIGN KEY (game_id) REFERENCES games(game_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_player_game_stats_player ON player_game_stats(player_id, team_id);
+
+-- Single row counter bumped whenever the per game aggregates change (ETag of the summary server)
+CREATE TABLE IF NOT EXISTS etl_data_version(
+    id INT PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO etl_data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Hashes of each loaded game's API frames and transform code, reload-stints skips unchanged games
+CREATE TABLE IF NOT EXISTS game_fingerprints(
+    game_id INT PRIMARY KEY,
+    input_hash CHAR(64) NOT NULL,
+    transform_hash CHAR(64) NOT NULL,
+    stints INT,
+    processed_at TIMESTAMP DEFAULT NOW(),
 
     FOREIGN KEY (game_id) REFERENCES games(game_id)
 );
 
+-- Bootstrap / shrunk net rating intervals, replaced by scripts/compute_rating_intervals.py
+-- per season ('all' = pooled over every season, what the views join)
+CREATE TABLE IF NOT EXISTS lineup_rating_intervals(
+    season VARCHAR(7) NOT NULL DEFAULT 'all',
+    lineup_id INT,
+    team_id INT,
+    stints INT,
+    possessions INT,
+    net_rating NUMERIC(7,2),
+    net_rating_low NUMERIC(7,2),
+    net_rating_high NUMERIC(7,2),
+    net_rating_se NUMERIC(7,2),
+    shrunk_net_rating NUMERIC(7,2),
+    shrunk_low NUMERIC(7,2),
+    shrunk_high NUMERIC(7,2),
+    n_boot INT,
+    computed_at TIMESTAMP,
+
+    PRIMARY KEY (season, lineup_id, team_id),
+    FOREIGN KEY (lineup_id) REFERENCES lineups(lineup_id)
+);
+
+CREATE TABLE IF NOT EXISTS player_rating_intervals(
+    season VARCHAR(7) NOT NULL DEFAULT 'all',
+    player_id INT,
+    team_id INT,
+    stints INT,
+    possessions INT,
+    net_rating NUMERIC(7,2),
+    net_rating_low NUMERIC(7,2),
+    net_rating_high NUMERIC(7,2),
+    net_rating_se NUMERIC(7,2),
+    shrunk_net_rating NUMERIC(7,2),
+    shrunk_low NUMERIC(7,2),
+    shrunk_high NUMERIC(7,2),
+    n_boot INT,
+    computed_at TIMESTAMP,
+
+    PRIMARY KEY (season, player_id, team_id)
+);
+
 -- CREATE INDEX IF NOT EXISTS idx_pvp_game ON play_by_play(game_id);
 -- CREATE INDEX IF NOT EXISTS idx_pvp_event ON play_by_play(game_id, action_id);
 -- CREATE INDEX IF NOT EXISTS idx_stints_game ON lineup_stints(game_id);
--- CREATE INDEX IF NOT EXISTS idx_stints_lineup ON lineup_stints(lineup_hash);
+-- CREATE INDEX IF NOT EXISTS idx_stints_lineup ON lineup_stints(lineup_id);
 
 -- CREATE MATERIALIZED VIEW active_lineups
 
 -- CREATE MATERIALIZED VIEW possession_stats
-
-TRUNCATE TABLE lineup_stints CASCADE;
-TRUNCATE TABLE play_by_play CASCADE;
-TRUNCATE TABLE games CASCADE;
-TRUNCATE TABLE players CASCADE;
-TRUNCATE TABLE teams CASCADE;
\ No newline at end of file
@@ -0,0 +1,68 @@
+-- ============================================================================
+-- MIGRATION: integer lineup ids
+-- ============================================================================
+-- Moves the 5 player columns and the VARCHAR lineup_hash out of lineup_stints
+-- into a lineups dimension table keyed by an integer lineup_id.
+-- Safe to run more than once. Run sql/views/lineup_performance.sql afterwards
+-- to recreate the views (they are dropped here because they depend on the
+-- columns being removed).
+--
+-- Before/after sizes and view timings: python scripts/migrate_lineup_ids.py
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS lineups(
+    lineup_id SERIAL PRIMARY KEY,
+    player1_id INT NOT NULL,
+    player2_id INT NOT NULL,
+    player3_id INT NOT NULL,
+    player4_id INT NOT NULL,
+    player5_id INT NOT NULL,
+    lineup_hash VARCHAR(100) NOT NULL UNIQUE
+);
+
+ALTER TABLE lineup_stints ADD COLUMN IF NOT EXISTS lineup_id INT REFERENCES lineups(lineup_id);
+
+DO $$
+BEGIN
+    -- Only backfill while the old columns are still there
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'lineup_stints' AND column_name = 'player1_id'
+    ) THEN
+        -- Rebuild the hash from the player columns so old unsorted hashes collapse
+        -- into the same lineup (player columns have always been stored sorted)
+        INSERT INTO lineups (player1_id, player2_id, player3_id, player4_id, player5_id, lineup_hash)
+        SELECT DISTINCT
+            player1_id, player2_id, player3_id, player4_id, player5_id,
+            concat_ws('-', player1_id, player2_id, player3_id, player4_id, player5_id)
+        FROM lineup_stints
+        ON CONFLICT (lineup_hash) DO NOTHING;
+
+        UPDATE lineup_stints ls
+        SET lineup_id = l.lineup_id
+        FROM lineups l
+        WHERE ls.lineup_id IS NULL
+            AND l.player1_id = ls.player1_id
+            AND l.player2_id = ls.player2_id
+            AND l.player3_id = ls.player3_id
+            AND l.player4_id = ls.player4_id
+            AND l.player5_id = ls.player5_id;
+    END IF;
+END $$;
+
+DROP VIEW IF EXISTS game_lineup_summary CASCADE;
+DROP VIEW IF EXISTS player_impact_stats CASCADE;
+DROP VIEW IF EXISTS lineup_aggregated_stats CASCADE;
+DROP VIEW IF EXISTS lineup_stint_stats CASCADE;
+
+DROP INDEX IF EXISTS idx_stints_lineup;
+
+ALTER TABLE lineup_stints
+    DROP COLUMN IF EXISTS lineup_hash,
+    DROP COLUMN IF EXISTS player1_id,
+    DROP COLUMN IF EXISTS player2_id,
+    DROP COLUMN IF EXISTS player3_id,
+    DROP COLUMN IF EXISTS player4_id,
+    DROP COLUMN IF EXISTS player5_id;
+
+CREATE INDEX IF NOT EXISTS idx_stints_lineup ON lineup_stints(lineup_id);
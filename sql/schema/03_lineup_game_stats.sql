@@ -0,0 +1,35 @@
+-- ============================================================================
+-- MIGRATION: incremental lineup aggregates
+-- ============================================================================
+-- Adds lineup_game_stats, one row per game/team/lineup with the totals the
+-- season level stats are built from. The pipeline rebuilds the rows of the
+-- games it loads (refresh_lineup_game_stats), so a nightly run only touches
+-- yesterday's games instead of recomputing every stint of the season.
+-- Safe to run more than once. Needs the views from sql/views/lineup_performance.sql.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS lineup_game_stats(
+    game_id INT,
+    team_id INT,
+    lineup_id INT,
+    stints INT,
+    seconds INT,
+    points_scored INT,
+    points_allowed INT,
+    possessions INT,
+
+    PRIMARY KEY (game_id, team_id, lineup_id),
+    FOREIGN KEY (game_id) REFERENCES games(game_id),
+    FOREIGN KEY (lineup_id) REFERENCES lineups(lineup_id)
+);
+
+-- Backfill every game already loaded
+INSERT INTO lineup_game_stats (game_id, team_id, lineup_id, stints, seconds,
+                               points_scored, points_allowed, possessions)
+SELECT game_id, team_id, lineup_id, COUNT(*), SUM(duration_secs),
+       SUM(points_scored), SUM(points_allowed), SUM(possessions)
+FROM lineup_stint_stats
+GROUP BY game_id, team_id, lineup_id
+ON CONFLICT (game_id, team_id, lineup_id) DO NOTHING;
+
+CREATE INDEX IF NOT EXISTS idx_lineup_game_stats_lineup ON lineup_game_stats(lineup_id, team_id);
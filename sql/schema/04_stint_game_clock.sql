@@ -0,0 +1,70 @@
+-- ============================================================================
+-- MIGRATION: stint boundaries by game clock
+-- ============================================================================
+-- lineup_stint_stats used to join events to stints with
+-- action_id BETWEEN start_num AND end_num, where start_num/end_num were the
+-- events nearest to the substitution times. Several events share a timestamp,
+-- so adjacent stints overlapped (points counted twice) or left gaps.
+-- Stints now carry their game clock bounds (start_secs, end_secs] and the view
+-- joins on that half-open range, backed by a GiST range index.
+--
+-- Also stores play_by_play times with their tenths of a second and fixes
+-- seconds_into_game for overtime periods (OT events used to land inside regulation).
+--
+-- Safe to run more than once. Run sql/views/lineup_performance.sql afterwards
+-- to recreate the views. The stint bounds backfilled here come from the old
+-- nearest-event mapping; `python scripts/nba_etl.py reload-stints` rebuilds
+-- them exactly from the rotation data.
+-- ============================================================================
+
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- The views reference the columns changed below
+DROP VIEW IF EXISTS lineup_stint_stats CASCADE;
+
+ALTER TABLE play_by_play
+    ALTER COLUMN seconds_left_in_game TYPE NUMERIC(6,1),
+    ALTER COLUMN seconds_into_game TYPE NUMERIC(6,1);
+
+-- Recompute both times from the period and the clock ('PT11M32.50S'),
+-- 12 minute quarters then 5 minute overtimes
+WITH clock AS (
+    SELECT event_id, period,
+           substring(clock FROM 'PT(\d+)M')::NUMERIC * 60 + substring(clock FROM 'M([\d.]+)S')::NUMERIC AS seconds_left
+    FROM play_by_play
+    WHERE clock ~ '^PT\d+M[\d.]+S$'
+)
+UPDATE play_by_play pbp
+SET seconds_left_in_game = CASE WHEN clock.period <= 4
+                                THEN (4 - clock.period) * 720 + clock.seconds_left
+                                ELSE clock.seconds_left END,
+    seconds_into_game = CASE WHEN clock.period <= 4
+                             THEN clock.period * 720 - clock.seconds_left
+                             ELSE 2880 + (clock.period - 4) * 300 - clock.seconds_left END
+FROM clock
+WHERE pbp.event_id = clock.event_id;
+
+ALTER TABLE lineup_stints
+    ADD COLUMN IF NOT EXISTS start_secs NUMERIC(6,1),
+    ADD COLUMN IF NOT EXISTS end_secs NUMERIC(6,1);
+
+-- Backfill: a stint starts at the time of its start event and runs until the
+-- next stint of the team starts (the last one until the last event of the game)
+WITH bounds AS (
+    SELECT ls.stint_id,
+           pbp.seconds_into_game AS start_secs,
+           LEAD(pbp.seconds_into_game) OVER (PARTITION BY ls.game_id, ls.team_id
+                                             ORDER BY ls.start_num, ls.stint_id) AS next_start,
+           MAX(pbp.seconds_into_game) OVER (PARTITION BY ls.game_id) AS game_end
+    FROM lineup_stints ls
+    INNER JOIN play_by_play pbp ON pbp.game_id = ls.game_id AND pbp.action_id = ls.start_num
+    WHERE ls.start_secs IS NULL
+)
+UPDATE lineup_stints ls
+SET start_secs = CASE WHEN bounds.start_secs <= 0 THEN 0 ELSE bounds.start_secs END,
+    end_secs = COALESCE(bounds.next_start, bounds.game_end)
+FROM bounds
+WHERE ls.stint_id = bounds.stint_id;
+
+CREATE INDEX IF NOT EXISTS idx_stints_game_time ON lineup_stints
+    USING gist (game_id, numrange(start_secs, end_secs, '(]'));
@@ -0,0 +1,49 @@
+-- ============================================================================
+-- MIGRATION: summary tables for the dashboard
+-- ============================================================================
+-- Adds player_game_stats (one row per game/team/player with on-court totals)
+-- and etl_data_version (a counter the loader bumps whenever it rebuilds the
+-- per game aggregates). scripts/serve_summaries.py serves lineup, player and
+-- game summaries from these tables and lineup_game_stats, cached in memory and
+-- keyed by the version, so a Power BI refresh no longer re-runs the stint join
+-- and the 5x player unpivot of the views.
+-- Safe to run more than once. Needs sql/schema/03_lineup_game_stats.sql.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS player_game_stats(
+    game_id INT,
+    team_id INT,
+    player_id INT,
+    stints INT,
+    seconds INT,
+    points_scored INT,
+    points_allowed INT,
+    possessions INT,
+
+    PRIMARY KEY (game_id, team_id, player_id),
+    FOREIGN KEY (game_id) REFERENCES games(game_id)
+);
+
+CREATE TABLE IF NOT EXISTS etl_data_version(
+    id INT PRIMARY KEY CHECK (id = 1),
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+INSERT INTO etl_data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING;
+
+-- Backfill every game already aggregated
+INSERT INTO player_game_stats (game_id, team_id, player_id, stints, seconds,
+                               points_scored, points_allowed, possessions)
+SELECT lgs.game_id, lgs.team_id, p.player_id, SUM(lgs.stints), SUM(lgs.seconds),
+       SUM(lgs.points_scored), SUM(lgs.points_allowed), SUM(lgs.possessions)
+FROM lineup_game_stats lgs
+INNER JOIN lineups l ON l.lineup_id = lgs.lineup_id
+CROSS JOIN LATERAL (VALUES (l.player1_id), (l.player2_id), (l.player3_id),
+                           (l.player4_id), (l.player5_id)) AS p(player_id)
+GROUP BY lgs.game_id, lgs.team_id, p.player_id
+ON CONFLICT (game_id, team_id, player_id) DO NOTHING;
+
+UPDATE etl_data_version SET version = version + 1, updated_at = NOW() WHERE id = 1;
+
+CREATE INDEX IF NOT EXISTS idx_player_game_stats_player ON player_game_stats(player_id, team_id);
@@ -0,0 +1,50 @@
+-- ============================================================================
+-- MIGRATION: net rating intervals
+-- ============================================================================
+-- Adds lineup_rating_intervals and player_rating_intervals: 95% bootstrap
+-- intervals (stints resampled within each lineup / player) and empirical Bayes
+-- shrunk net ratings, written by scripts/compute_rating_intervals.py.
+-- lineup_aggregated_stats, lineup_season_totals and player_impact_stats join
+-- them as net_rating_low / net_rating_high / shrunk_net_rating, so sort by
+-- net_rating_low instead of avg_net_rating to keep 20-possession lineups off
+-- the top of the table.
+-- Safe to run more than once. Run sql/views/lineup_performance.sql afterwards
+-- (python scripts/nba_etl.py views recreate) to add the columns to the views.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS lineup_rating_intervals(
+    lineup_id INT,
+    team_id INT,
+    stints INT,
+    possessions INT,
+    net_rating NUMERIC(7,2),
+    net_rating_low NUMERIC(7,2),
+    net_rating_high NUMERIC(7,2),
+    net_rating_se NUMERIC(7,2),
+    shrunk_net_rating NUMERIC(7,2),
+    shrunk_low NUMERIC(7,2),
+    shrunk_high NUMERIC(7,2),
+    n_boot INT,
+    computed_at TIMESTAMP,
+
+    PRIMARY KEY (lineup_id, team_id),
+    FOREIGN KEY (lineup_id) REFERENCES lineups(lineup_id)
+);
+
+CREATE TABLE IF NOT EXISTS player_rating_intervals(
+    player_id INT,
+    team_id INT,
+    stints INT,
+    possessions INT,
+    net_rating NUMERIC(7,2),
+    net_rating_low NUMERIC(7,2),
+    net_rating_high NUMERIC(7,2),
+    net_rating_se NUMERIC(7,2),
+    shrunk_net_rating NUMERIC(7,2),
+    shrunk_low NUMERIC(7,2),
+    shrunk_high NUMERIC(7,2),
+    n_boot INT,
+    computed_at TIMESTAMP,
+
+    PRIMARY KEY (player_id, team_id)
+);
@@ -0,0 +1,63 @@
+-- ============================================================================
+-- MIGRATION: compact play_by_play rows
+-- ============================================================================
+-- play_by_play is the largest table and lineup_stint_stats scans all of it.
+-- Every row repeated its action type and subtype as text, and stored values
+-- that other columns or tables already hold:
+--   - action_type / action_subtype -> action_type_id SMALLINT, a key into
+--     the new action_types lookup table (a few hundred distinct pairs)
+--   - clock ('PT11M32.50S') and seconds_left_in_game: seconds_into_game and
+--     period give the same time
+--   - player_name: the players table has it (player_id is a foreign key)
+--   - action_id, period, shot_value: INT -> SMALLINT
+-- The single ALTER TABLE below rewrites the table once, so dropped column
+-- space is reclaimed without a VACUUM FULL.
+-- Safe to run more than once. Apply with `python scripts/nba_etl.py migrate`,
+-- which measures the table sizes before and after and recreates the views
+-- (they are dropped here because lineup_stint_stats reads action_type).
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS action_types(
+    action_type_id SMALLSERIAL PRIMARY KEY,
+    action_type VARCHAR(40) NOT NULL,
+    action_subtype VARCHAR(60) NOT NULL DEFAULT '',
+
+    UNIQUE (action_type, action_subtype)
+);
+
+DROP VIEW IF EXISTS lineup_stint_stats CASCADE;
+
+ALTER TABLE play_by_play ADD COLUMN IF NOT EXISTS action_type_id SMALLINT REFERENCES action_types(action_type_id);
+
+DO $$
+BEGIN
+    -- Only backfill while the text columns are still there
+    IF EXISTS (
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = 'play_by_play' AND column_name = 'action_type'
+    ) THEN
+        INSERT INTO action_types (action_type, action_subtype)
+        SELECT DISTINCT COALESCE(action_type, ''), COALESCE(action_subtype, '')
+        FROM play_by_play
+        ON CONFLICT (action_type, action_subtype) DO NOTHING;
+
+        UPDATE play_by_play pbp
+        SET action_type_id = at.action_type_id
+        FROM action_types at
+        WHERE pbp.action_type_id IS NULL
+            AND at.action_type = COALESCE(pbp.action_type, '')
+            AND at.action_subtype = COALESCE(pbp.action_subtype, '');
+    END IF;
+END $$;
+
+ALTER TABLE play_by_play
+    DROP COLUMN IF EXISTS clock,
+    DROP COLUMN IF EXISTS seconds_left_in_game,
+    DROP COLUMN IF EXISTS player_name,
+    DROP COLUMN IF EXISTS action_type,
+    DROP COLUMN IF EXISTS action_subtype,
+    ALTER COLUMN action_id TYPE SMALLINT,
+    ALTER COLUMN period TYPE SMALLINT,
+    ALTER COLUMN shot_value TYPE SMALLINT;
+
+ANALYZE play_by_play;
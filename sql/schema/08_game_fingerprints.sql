@@ -0,0 +1,22 @@
+-- ============================================================================
+-- MIGRATION: game fingerprints
+-- ============================================================================
+-- Adds game_fingerprints: per loaded game, the sha256 of the API frames it was
+-- built from and of the transform code (src/etl/fingerprints.py). The pipeline
+-- writes a row after loading a game and keeps its frames in data/raw/games;
+-- `python scripts/nba_etl.py reload-stints` then redoes only the games whose
+-- inputs or transform changed and reports how many it skipped.
+-- Games loaded before this migration have no row and are redone (their inputs
+-- fetched from the API once) by the first reload.
+-- Safe to run more than once.
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS game_fingerprints(
+    game_id INT PRIMARY KEY,
+    input_hash CHAR(64) NOT NULL,
+    transform_hash CHAR(64) NOT NULL,
+    stints INT,
+    processed_at TIMESTAMP DEFAULT NOW(),
+
+    FOREIGN KEY (game_id) REFERENCES games(game_id)
+);
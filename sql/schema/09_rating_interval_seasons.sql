@@ -0,0 +1,25 @@
+-- ============================================================================
+-- MIGRATION: season key for the net rating intervals
+-- ============================================================================
+-- lineup_rating_intervals and player_rating_intervals were keyed by
+-- (lineup_id / player_id, team_id) only, so a run for one season replaced
+-- every other season's rows. Adds a season column to the key:
+--   - 'all': pooled over every loaded season, what lineup_aggregated_stats,
+--     lineup_season_totals and player_impact_stats join (their totals span
+--     every season)
+--   - '2024-25', ...: one season, written by
+--     scripts/compute_rating_intervals.py --seasons, which only replaces the
+--     rows of the seasons it computed
+-- Existing rows were computed over whatever the last run loaded and become
+-- 'all'. Safe to run more than once. Run sql/views/lineup_performance.sql
+-- afterwards (python scripts/nba_etl.py views recreate) so the views only
+-- join the 'all' rows.
+-- ============================================================================
+
+ALTER TABLE lineup_rating_intervals ADD COLUMN IF NOT EXISTS season VARCHAR(7) NOT NULL DEFAULT 'all';
+ALTER TABLE lineup_rating_intervals DROP CONSTRAINT IF EXISTS lineup_rating_intervals_pkey;
+ALTER TABLE lineup_rating_intervals ADD PRIMARY KEY (season, lineup_id, team_id);
+
+ALTER TABLE player_rating_intervals ADD COLUMN IF NOT EXISTS season VARCHAR(7) NOT NULL DEFAULT 'all';
+ALTER TABLE player_rating_intervals DROP CONSTRAINT IF EXISTS player_rating_intervals_pkey;
+ALTER TABLE player_rating_intervals ADD PRIMARY KEY (season, player_id, team_id);
@@ -26,25 +26,14 @@ DROP VIEW IF EXISTS lineup_stint_stats CASCADE;
 CREATE VIEW lineup_stint_stats AS
 WITH stint_events AS (
     -- Step 1: Match each lineup stint with all play-by-play events that happened during it
-    -- We use seconds_into_game to determine if an event happened during a stint
+    -- Only the integer keys are carried through the join; the players are
+    -- looked up once per stint from the lineups table at the end
     SELECT
         ls.stint_id,
-        ls.game_id,
         ls.team_id,
-        ls.start_num,
-        ls.end_num,
-        ls.duration_secs,
-        ls.player1_id,
-        ls.player2_id,
-        ls.player3_id,
-        ls.player4_id,
-        ls.player5_id,
-        ls.lineup_hash,
         pbp.action_id,
-        pbp.period,
-        pbp.seconds_into_game,
         pbp.team_id AS event_team_id,
-        pbp.action_type,
+        at.action_type,
         pbp.shot_value,
         pbp.shot_result,
         -- Determine if this event was by the lineup's team or opponent
@@ -56,24 +45,18 @@ WITH stint_events AS (
     FROM lineup_stints ls
     INNER JOIN play_by_play pbp
         ON ls.game_id = pbp.game_id
-        -- Event must occur during this stint (by action_id range)
-        AND pbp.action_id >= ls.start_num
-        AND pbp.action_id <= ls.end_num
+        -- Event must occur during this stint: half-open game clock range (start_secs, end_secs],
+        -- so an event at a substitution time is counted for one stint only.
+        -- Written as a range containment so it can use idx_stints_game_time (GiST)
+        AND numrange(ls.start_secs, ls.end_secs, '(]') @> pbp.seconds_into_game
+    -- play_by_play stores the action type as a key into the small action_types lookup
+    LEFT JOIN action_types at ON at.action_type_id = pbp.action_type_id
 ),
 
 stint_scoring AS (
     -- Step 2: Calculate points scored and allowed for each stint
     SELECT
         stint_id,
-        game_id,
-        team_id,
-        duration_secs,
-        lineup_hash,
-        player1_id,
-        player2_id,
-        player3_id,
-        player4_id,
-        player5_id,
         -- Points scored: sum shot values where team made a shot
         COALESCE(SUM(
             CASE
@@ -111,59 +94,60 @@ stint_scoring AS (
         COUNT(CASE WHEN event_context = 'defense' THEN 1 END) AS defensive_events
 
     FROM stint_events
-    GROUP BY
-        stint_id, game_id, team_id, duration_secs, lineup_hash,
-        player1_id, player2_id, player3_id, player4_id, player5_id
+    GROUP BY stint_id
 )
 -- Step 3: Calculate advanced metrics for each stint
 SELECT
-    stint_id,
-    game_id,
-    team_id,
-    lineup_hash,
-    player1_id,
-    player2_id,
-    player3_id,
-    player4_id,
-    player5_id,
-    duration_secs,
+    ls.stint_id,
+    ls.game_id,
+    ls.team_id,
+    ls.lineup_id,
+    l.lineup_hash,
+    l.player1_id,
+    l.player2_id,
+    l.player3_id,
+    l.player4_id,
+    l.player5_id,
+    ls.duration_secs,
     -- Basic counting stats
-    points_scored,
-    points_allowed,
-    points_scored - points_allowed AS plus_minus,
+    ss.points_scored,
+    ss.points_allowed,
+    ss.points_scored - ss.points_allowed AS plus_minus,
     -- Estimated possessions (better formula using both teams' FGA)
     -- Possessions should be similar for both teams in a stint
-    field_goal_attempts AS possessions,
+    ss.field_goal_attempts AS possessions,
     -- Per-minute metrics (convert seconds to minutes)
     -- Use NULLIF to prevent division by zero errors in Power BI
-    ROUND((points_scored::DECIMAL / NULLIF(duration_secs, 0)) * 60, 2) AS points_per_minute,
-    ROUND((points_allowed::DECIMAL / NULLIF(duration_secs, 0)) * 60, 2) AS points_allowed_per_minute,
+    ROUND((ss.points_scored::DECIMAL / NULLIF(ls.duration_secs, 0)) * 60, 2) AS points_per_minute,
+    ROUND((ss.points_allowed::DECIMAL / NULLIF(ls.duration_secs, 0)) * 60, 2) AS points_allowed_per_minute,
     -- Per-100-possession metrics (standard NBA efficiency metric)
     -- Only calculate if we have reasonable possession count (at least duration_secs / 24)
     -- Average NBA possession is ~14 seconds, so min possessions = duration_secs / 24
     CASE
-        WHEN field_goal_attempts >= (duration_secs / NULLIF(24.0, 0)) AND field_goal_attempts > 0
-        THEN ROUND((points_scored::DECIMAL / NULLIF(field_goal_attempts, 0)) * 100, 2)
+        WHEN ss.field_goal_attempts >= (ls.duration_secs / NULLIF(24.0, 0)) AND ss.field_goal_attempts > 0
+        THEN ROUND((ss.points_scored::DECIMAL / NULLIF(ss.field_goal_attempts, 0)) * 100, 2)
         ELSE NULL  -- Not enough data for reliable rating
     END AS offensive_rating,
 
     CASE
-        WHEN field_goal_attempts >= (duration_secs / NULLIF(24.0, 0)) AND field_goal_attempts > 0
-        THEN ROUND((points_allowed::DECIMAL / NULLIF(field_goal_attempts, 0)) * 100, 2)
+        WHEN ss.field_goal_attempts >= (ls.duration_secs / NULLIF(24.0, 0)) AND ss.field_goal_attempts > 0
+        THEN ROUND((ss.points_allowed::DECIMAL / NULLIF(ss.field_goal_attempts, 0)) * 100, 2)
         ELSE NULL  -- Not enough data for reliable rating
     END AS defensive_rating,
     -- Net rating (offensive rating - defensive rating)
     CASE
-        WHEN field_goal_attempts >= (duration_secs / NULLIF(24.0, 0)) AND field_goal_attempts > 0
+        WHEN ss.field_goal_attempts >= (ls.duration_secs / NULLIF(24.0, 0)) AND ss.field_goal_attempts > 0
         THEN ROUND(
-            ((points_scored::DECIMAL / NULLIF(field_goal_attempts, 0)) * 100) -
-            ((points_allowed::DECIMAL / NULLIF(field_goal_attempts, 0)) * 100),
+            ((ss.points_scored::DECIMAL / NULLIF(ss.field_goal_attempts, 0)) * 100) -
+            ((ss.points_allowed::DECIMAL / NULLIF(ss.field_goal_attempts, 0)) * 100),
             2
         )
         ELSE NULL  -- Not enough data for reliable rating
     END AS net_rating
 
-FROM stint_scoring;
+FROM stint_scoring ss
+INNER JOIN lineup_stints ls ON ls.stint_id = ss.stint_id
+INNER JOIN lineups l ON l.lineup_id = ls.lineup_id;
 
 
 -- ----------------------------------------------------------------------------
@@ -172,7 +156,7 @@ FROM stint_scoring;
 -- PURPOSE: Aggregate stats across ALL stints for each unique lineup
 --
 -- HOW IT WORKS:
--- 1. Group all stints by the same 5 players (using lineup_hash)
+-- 1. Group all stints by the same 5 players (using the integer lineup_id)
 -- 2. Sum up total minutes, points scored, points allowed
 -- 3. Calculate overall efficiency metrics for that lineup
 --
@@ -185,13 +169,14 @@ DROP VIEW IF EXISTS lineup_aggregated_stats CASCADE;
 
 CREATE VIEW lineup_aggregated_stats AS
 SELECT
-    lineup_hash,
-    team_id,
-    player1_id,
-    player2_id,
-    player3_id,
-    player4_id,
-    player5_id,
+    l.lineup_id,
+    l.lineup_hash,
+    lss.team_id,
+    l.player1_id,
+    l.player2_id,
+    l.player3_id,
+    l.player4_id,
+    l.player5_id,
     -- Aggregate across all games
     COUNT(DISTINCT game_id) AS games_played,
     COUNT(stint_id) AS total_stints,
@@ -228,12 +213,18 @@ SELECT
     END AS avg_net_rating,
     -- Per-minute metrics
     ROUND((SUM(points_scored)::DECIMAL / NULLIF(SUM(duration_secs), 0)) * 60, 2) AS overall_points_per_minute,
-    ROUND((SUM(points_allowed)::DECIMAL / NULLIF(SUM(duration_secs), 0)) * 60, 2) AS overall_points_allowed_per_minute
+    ROUND((SUM(points_allowed)::DECIMAL / NULLIF(SUM(duration_secs), 0)) * 60, 2) AS overall_points_allowed_per_minute,
+    -- 95% net rating intervals (scripts/compute_rating_intervals.py, NULL until it has run)
+    MAX(ri.net_rating_low) AS net_rating_low,
+    MAX(ri.net_rating_high) AS net_rating_high,
+    MAX(ri.shrunk_net_rating) AS shrunk_net_rating
 
-FROM lineup_stint_stats
-GROUP BY
-    lineup_hash, team_id,
-    player1_id, player2_id, player3_id, player4_id, player5_id;
+FROM lineup_stint_stats lss
+INNER JOIN lineups l ON l.lineup_id = lss.lineup_id
+-- The all-season intervals, like the totals above
+LEFT JOIN lineup_rating_intervals ri ON ri.lineup_id = l.lineup_id AND ri.team_id = lss.team_id AND ri.season = 'all'
+-- lineup_hash and the player columns are functionally dependent on the lineups primary key
+GROUP BY l.lineup_id, lss.team_id;
 
 
 -- ----------------------------------------------------------------------------
@@ -334,10 +325,15 @@ SELECT
         ELSE NULL
     END AS avg_net_rating,
     -- Per-48-minutes metrics (standard NBA comparison)
-    ROUND((SUM(poc.plus_minus)::DECIMAL / NULLIF(SUM(poc.duration_secs), 0)) * 2880, 2) AS plus_minus_per_48min
+    ROUND((SUM(poc.plus_minus)::DECIMAL / NULLIF(SUM(poc.duration_secs), 0)) * 2880, 2) AS plus_minus_per_48min,
+    -- 95% on-court net rating intervals (scripts/compute_rating_intervals.py)
+    MAX(pri.net_rating_low) AS net_rating_low,
+    MAX(pri.net_rating_high) AS net_rating_high,
+    MAX(pri.shrunk_net_rating) AS shrunk_net_rating
 
 FROM player_on_court poc
 INNER JOIN players p ON poc.player_id = p.player_id
+LEFT JOIN player_rating_intervals pri ON pri.player_id = poc.player_id AND pri.team_id = poc.team_id AND pri.season = 'all'
 GROUP BY p.player_id, p.player_name, p.position, poc.team_id;
 
 
@@ -365,7 +361,8 @@ SELECT
     g.home_score,
     g.away_score,
     lss.team_id,
-    lss.lineup_hash,
+    l.lineup_id,
+    l.lineup_hash,
     -- Determine if this team won or lost
     CASE
         WHEN lss.team_id = g.home_team_id THEN
@@ -383,9 +380,73 @@ SELECT
 
 FROM lineup_stint_stats lss
 INNER JOIN games g ON lss.game_id = g.game_id
+INNER JOIN lineups l ON l.lineup_id = lss.lineup_id
 GROUP BY
     lss.game_id, g.home_team_id, g.away_team_id,
-    g.home_score, g.away_score, lss.team_id, lss.lineup_hash;
+    g.home_score, g.away_score, lss.team_id, l.lineup_id;
+
+
+-- ----------------------------------------------------------------------------
+-- VIEW 5: lineup_season_totals
+-- ----------------------------------------------------------------------------
+-- PURPOSE: Same totals and ratings as lineup_aggregated_stats, read from the
+-- per game lineup_game_stats table instead of every stint
+--
+-- HOW IT WORKS:
+-- 1. lineup_game_stats holds one row per game/team/lineup, rebuilt by the ETL
+--    only for the games it just loaded
+-- 2. This view just sums those rows, so it stays cheap as the season grows
+--
+-- WHY: A nightly run adds ~10 games; recomputing every stint of the season
+-- for each dashboard refresh is wasted work
+-- ----------------------------------------------------------------------------
+
+DROP VIEW IF EXISTS lineup_season_totals CASCADE;
+
+CREATE VIEW lineup_season_totals AS
+SELECT
+    l.lineup_id,
+    l.lineup_hash,
+    lgs.team_id,
+    l.player1_id,
+    l.player2_id,
+    l.player3_id,
+    l.player4_id,
+    l.player5_id,
+    COUNT(*) AS games_played,
+    SUM(lgs.stints) AS total_stints,
+    SUM(lgs.seconds) AS total_seconds,
+    ROUND(SUM(lgs.seconds)::DECIMAL / 60, 2) AS total_minutes,
+    SUM(lgs.points_scored) AS total_points_scored,
+    SUM(lgs.points_allowed) AS total_points_allowed,
+    SUM(lgs.points_scored - lgs.points_allowed) AS total_plus_minus,
+    CASE
+        WHEN SUM(lgs.possessions) > 0
+        THEN ROUND((SUM(lgs.points_scored)::DECIMAL / SUM(lgs.possessions)) * 100, 2)
+        ELSE NULL
+    END AS avg_offensive_rating,
+    CASE
+        WHEN SUM(lgs.possessions) > 0
+        THEN ROUND((SUM(lgs.points_allowed)::DECIMAL / SUM(lgs.possessions)) * 100, 2)
+        ELSE NULL
+    END AS avg_defensive_rating,
+    CASE
+        WHEN SUM(lgs.possessions) > 0
+        THEN ROUND(
+            ((SUM(lgs.points_scored)::DECIMAL / SUM(lgs.possessions)) * 100) -
+            ((SUM(lgs.points_allowed)::DECIMAL / SUM(lgs.possessions)) * 100),
+            2
+        )
+        ELSE NULL
+    END AS avg_net_rating,
+    MAX(ri.net_rating_low) AS net_rating_low,
+    MAX(ri.net_rating_high) AS net_rating_high,
+    MAX(ri.shrunk_net_rating) AS shrunk_net_rating
+
+FROM lineup_game_stats lgs
+INNER JOIN lineups l ON l.lineup_id = lgs.lineup_id
+LEFT JOIN lineup_rating_intervals ri ON ri.lineup_id = l.lineup_id AND ri.team_id = lgs.team_id AND ri.season = 'all'
+GROUP BY l.lineup_id, lgs.team_id;
 
 
 -- ============================================================================
@@ -406,7 +467,7 @@ CREATE INDEX IF NOT EXISTS idx_stints_game_team
     ON lineup_stints(game_id, team_id);
 
 CREATE INDEX IF NOT EXISTS idx_stints_lineup
-    ON lineup_stints(lineup_hash);
+    ON lineup_stints(lineup_id);
 
 -- ============================================================================
 -- USAGE NOTES
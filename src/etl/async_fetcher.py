@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import logging
+
+import aiohttp
+from nba_api.stats.endpoints import playbyplayv3, gamerotation, boxscoretraditionalv3
+from nba_api.stats.library.http import NBAStatsHTTP, NBAStatsResponse, STATS_HEADERS
+
+from src.etl.nba_data_extractor import build_game_info
+from src.utils.rate_limit import RateLimiter
+from src.utils.stats_api import configure_stats_api
+
+logger = logging.getLogger(__name__)
+
+configure_stats_api()
+
+# Asyncio fetch layer for the stats endpoints the pipeline needs per game.
+# Requests go over one pooled keep-alive aiohttp session, limited by a
+# semaphore (in-flight requests) and a RateLimiter (requests per minute).
+# Responses are parsed by the same nba_api endpoint classes as the blocking
+# path, so the frames are identical to get_game_playbyplay/get_rotation/get_game_info.
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class AsyncStatsClient:
+    def __init__(self, concurrency=4, limiter=None, max_retries=3, timeout=30):
+        self.concurrency = concurrency
+        self.limiter = limiter or RateLimiter(requests_per_minute=60)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        # Keep-alive pool sized to the concurrency; aiohttp negotiates gzip itself
+        headers = {k: v for k, v in STATS_HEADERS.items() if k not in ('Host', 'Accept-Encoding')}
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector, headers=headers,
+                                             timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def fetch(self, endpoint, parameters):
+        """
+        Returns the raw response text for a stats endpoint, retrying 429/5xx/timeouts with backoff
+        """
+        url = NBAStatsHTTP.base_url.format(endpoint=endpoint)
+        # Same parameter handling as nba_api: sorted, None dropped
+        params = [(k, v) for k, v in sorted(parameters.items()) if v is not None]
+        for attempt in range(self.max_retries):
+            await self.limiter.wait()
+            try:
+                async with self.semaphore:
+                    async with self.session.get(url, params=params) as response:
+                        text = await response.text()
+                        if response.status == 200:
+                            return text
+                        if response.status not in RETRY_STATUSES:
+                            raise ValueError(f"{endpoint} returned HTTP {response.status}")
+                        retry_after = response.headers.get('Retry-After')
+                        if response.status == 429 and retry_after:
+                            self.limiter.penalize(float(retry_after))
+                        error = f"HTTP {response.status}"
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+            if attempt < self.max_retries - 1:
+                wait_time = 15 * (2 ** attempt)  # Same backoff as get_game_playbyplay: 15s, 30s, 60s
+                logger.warning(f"{endpoint} {parameters} failed ({error}), retrying in {wait_time}s (attempt {attempt + 1}/{self.max_retries})")
+                await asyncio.sleep(wait_time)
+        raise ValueError(f"{endpoint} {parameters} failed after {self.max_retries} attempts: {error}")
+
+    async def fetch_frames(self, endpoint_obj):
+        """
+        Runs an nba_api endpoint object built with get_request=False and returns its data frames
+        """
+        text = await self.fetch(endpoint_obj.endpoint, endpoint_obj.parameters)
+        endpoint_obj.nba_response = NBAStatsResponse(response=text, status_code=200, url=None)
+        endpoint_obj.load_response()
+        return endpoint_obj.get_data_frames()
+
+    async def get_game_playbyplay(self, game_id):
+        frames = await self.fetch_frames(playbyplayv3.PlayByPlayV3(game_id, get_request=False))
+        return frames[0]
+
+    async def get_rotation(self, game_id):
+        return await self.fetch_frames(gamerotation.GameRotation(game_id, get_request=False))
+
+    async def get_game_info(self, game_id):
+        frames = await self.fetch_frames(boxscoretraditionalv3.BoxScoreTraditionalV3(game_id, get_request=False))
+        return build_game_info(game_id, frames)
+
+    async def fetch_game(self, game_id):
+        """
+        Fetches everything process_single_game needs from the API for one game, concurrently
+        Returns {'pbp': df, 'rotation': [dfs], 'game_info': df}
+        """
+        pbp, rotation, game_info = await asyncio.gather(self.get_game_playbyplay(game_id),
+                                                        self.get_rotation(game_id),
+                                                        self.get_game_info(game_id))
+        return {'pbp': pbp, 'rotation': rotation, 'game_info': game_info}
+
+class GamePrefetcher:
+    """
+    Fetches the next `depth` games on a background event loop while the caller
+    transforms and loads the current one
+    Iterating yields (game_id, prefetched, error); exactly one of prefetched/error is None
+    """
+    def __init__(self, game_ids, depth=3, concurrency=4, limiter=None, metrics=None):
+        self.game_ids = list(game_ids)
+        self.depth = depth
+        self.metrics = metrics
+        self.client = AsyncStatsClient(concurrency=concurrency, limiter=limiter)
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='prefetch-loop', daemon=True)
+
+    def __iter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.client.__aenter__(), self.loop).result()
+        futures = {}
+        try:
+            for i, game_id in enumerate(self.game_ids):
+                # Keep a sliding window of `depth` games in flight ahead of the current one
+                for j in range(i, min(i + self.depth + 1, len(self.game_ids))):
+                    if j not in futures:
+                        futures[j] = asyncio.run_coroutine_threadsafe(self.client.fetch_game(self.game_ids[j]), self.loop)
+                try:
+                    result = self._wait(game_id, futures.pop(i))
+                except Exception as e:
+                    yield game_id, None, e
+                else:
+                    yield game_id, result, None
+        finally:
+            for future in futures.values():
+                future.cancel()
+            asyncio.run_coroutine_threadsafe(self.client.__aexit__(None, None, None), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+
+    def _wait(self, game_id, future):
+        # Time the caller spends blocked on the network: ~0 when prefetching keeps up
+        if self.metrics is None:
+            return future.result()
+        with self.metrics.stage('prefetch_wait', game_id) as stage:
+            result = future.result()
+            stage.record([result['pbp'], result['game_info']] + list(result['rotation']))
+        return result
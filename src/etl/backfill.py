@@ -0,0 +1,185 @@
+import multiprocessing
+import queue as queue_module
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import logging
+
+import pandas as pd
+
+from src.etl.pipeline import process_season_queued, get_schedule, filter_season_types, SEASON_TYPE_PREFIXES
+from src.etl.database_loader import get_loaded_game_ids
+from src.utils.db_connection import get_engine, dispose_engines, pool_status
+from src.utils.log_setup import log_queue, worker_logging
+from src.utils.metrics import RunMetrics
+from src.utils.rate_limit import SharedRateLimiter
+from src.utils.stats_api import set_request_limiter
+from config import LOGS_DIR
+
+logger = logging.getLogger(__name__)
+
+# Multi-season backfill: plans the request volume for a range of seasons up
+# front, then runs one worker process per season through the durable work
+# queue (process_season_queued). All workers draw on one SharedRateLimiter, so
+# adding workers overlaps the transform/load work but never raises the request
+# rate. Progress and the ETA come from the measured per-game throughput.
+
+# PlayByPlayV3 + GameRotation + BoxScoreTraditionalV3 per game (CommonPlayerInfo for unseen players comes on top)
+REQUESTS_PER_GAME = 3
+
+def parse_seasons(spec):
+    """
+    Returns the list of seasons in a spec like '2015-16:2024-25', '2015:2024' or '2019-20,2021-22'
+    """
+    seasons = []
+    for part in spec.split(','):
+        part = part.strip()
+        if ':' in part:
+            first, last = part.split(':')
+            years = range(int(first[:4]), int(last[:4]) + 1)
+        else:
+            years = [int(part[:4])]
+        for year in years:
+            season = f'{year}-{(year + 1) % 100:02d}'
+            if season not in seasons:
+                seasons.append(season)
+    return seasons
+
+def parse_season_types(spec):
+    """
+    Returns the season types in a comma separated spec, e.g. 'regular,playoffs,playin'
+    """
+    season_types = [season_type.strip().replace('-', '') for season_type in spec.split(',') if season_type.strip()]
+    unknown = [season_type for season_type in season_types if season_type not in SEASON_TYPE_PREFIXES]
+    if unknown:
+        raise ValueError(f"Unknown season type(s) {unknown}, expected some of {list(SEASON_TYPE_PREFIXES)}")
+    return season_types
+
+def plan_backfill(engine, seasons, season_types=None, requests_per_minute=20):
+    """
+    Returns one row per season with the games still to load and the API requests that takes
+    Schedules come from the local cache when fresh, otherwise one LeagueGameFinder request per season
+    """
+    rows = []
+    for season in seasons:
+        games = get_schedule(season)
+        if games is None:
+            logger.error(f"Failed to get the schedule for {season}, leaving it out of the plan")
+            continue
+        game_ids = filter_season_types(games['GAME_ID'].unique(), season_types)
+        loaded = len(get_loaded_game_ids(engine, game_ids))
+        pending = len(game_ids) - loaded
+        rows.append({'season': season,
+                     'games': len(game_ids),
+                     'loaded': loaded,
+                     'pending': pending,
+                     'requests': pending * REQUESTS_PER_GAME})
+    plan = pd.DataFrame(rows, columns=['season', 'games', 'loaded', 'pending', 'requests'])
+    plan['est_hours'] = (plan['requests'] / requests_per_minute / 60).round(1)
+    return plan
+
+class ProgressTracker:
+    """
+    Turns per-game completions from the workers into progress lines with an ETA
+    The rate is measured over the games loaded so far in this run
+    """
+    def __init__(self, total_games):
+        self.total = total_games
+        self.started_at = time.time()
+        self.loaded = 0
+        self.failed = 0
+        self.per_season = {}
+
+    def record(self, season, loaded):
+        if loaded:
+            self.loaded += 1
+            self.per_season[season] = self.per_season.get(season, 0) + 1
+        else:
+            self.failed += 1
+
+    def games_per_minute(self):
+        elapsed = time.time() - self.started_at
+        return self.loaded / elapsed * 60 if elapsed > 0 else 0.0
+
+    def eta_seconds(self):
+        rate = self.games_per_minute()
+        if rate == 0:
+            return None
+        return max(0, self.total - self.loaded) / rate * 60
+
+    def line(self):
+        eta = self.eta_seconds()
+        eta_text = 'unknown' if eta is None else f'{eta / 3600:.1f}h'
+        return (f"Backfill progress: {self.loaded}/{self.total} games loaded, {self.failed} failed attempts, "
+                f"{self.games_per_minute():.2f} games/min, ETA {eta_text}")
+
+# Set in each worker process by _init_worker
+_events = None
+
+def _init_worker(limiter, events, logs, log_level):
+    global _events
+    _events = events
+    set_request_limiter(limiter)
+    if logs is not None:
+        # Records go to the parent's listener instead of each worker writing the log file
+        worker_logging(logs, log_level)
+
+def _run_season(season, season_types, queue_path, retry_failed, run_id):
+    engine = get_engine()
+    metrics = RunMetrics(run_id=f'{run_id}_{season}')
+    try:
+        return process_season_queued(season, engine, queue_path=queue_path, metrics=metrics,
+                                     retry_failed=retry_failed, season_types=season_types, paced=False,
+                                     progress=lambda game_id, loaded: _events.put((season, game_id, loaded)))
+    finally:
+        metrics.set_gauges('db_pool', pool_status(engine))
+        metrics.write_report(LOGS_DIR / 'metrics')
+        dispose_engines()
+
+def run_backfill(seasons, season_types=None, workers=2, requests_per_minute=20, queue_path=None,
+                 retry_failed=False, total_games=None, report_every=60):
+    """
+    Loads several seasons in parallel, one worker process per season, under one global request budget
+    total_games: games still to load (from plan_backfill) for the ETA
+    Returns {season: success}
+    """
+    limiter = SharedRateLimiter(requests_per_minute=requests_per_minute)
+    events = multiprocessing.Queue()
+    tracker = ProgressTracker(total_games or 0)
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    results = {}
+
+    initargs = (limiter, events, log_queue(), logging.getLogger().level)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        futures = {pool.submit(_run_season, season, season_types, queue_path, retry_failed, run_id): season
+                   for season in seasons}
+        last_report = time.time()
+        while futures:
+            _drain_events(events, tracker, timeout=1)
+            for future in [future for future in futures if future.done()]:
+                season = futures.pop(future)
+                try:
+                    results[season] = future.result()
+                except Exception as e:
+                    logger.error(f"Backfill of {season} failed: {type(e).__name__}: {e}")
+                    results[season] = False
+                logger.info(f"Season {season} finished ({tracker.per_season.get(season, 0)} games loaded)")
+            if time.time() - last_report >= report_every:
+                logger.info(tracker.line())
+                last_report = time.time()
+
+    # Completions the last workers sent just before exiting
+    _drain_events(events, tracker, timeout=0.5)
+    logger.info(tracker.line())
+    return results
+
+def _drain_events(events, tracker, timeout):
+    # Blocks up to timeout for the first event, then takes whatever else is already queued
+    try:
+        event = events.get(timeout=timeout)
+        while True:
+            season, game_id, loaded = event
+            tracker.record(season, loaded)
+            event = events.get_nowait()
+    except queue_module.Empty:
+        pass
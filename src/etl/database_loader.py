@@ -1,6 +1,19 @@
 from sqlalchemy import text
 import pandas as pd
 
+from src.etl.lineup_tracker import lineup_key
+
+PLAYER_COLUMNS = ['player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']
+# Columns of play_by_play (sql/schema/07_compact_play_by_play.sql), the rest of a cleaned pbp df is not stored
+PBP_COLUMNS = ['game_id', 'action_id', 'period', 'seconds_into_game', 'player_id', 'team_id',
+               'description', 'action_type_id', 'shot_value', 'shot_result']
+
+# In-process interning map: canonical lineup (sorted 5-tuple of player ids) -> lineups.lineup_id
+# Filled lazily by resolve_lineup_ids so each lineup is looked up at most once per process
+_lineup_ids = {}
+# Same for (action_type, action_subtype) -> action_types.action_type_id
+_action_type_ids = {}
+
 def load_teams(engine, teams_df):
     from sqlalchemy.exc import IntegrityError
     try:
@@ -25,22 +38,95 @@ def load_games(engine, games_df):
         # Game already exists in database, skip the duplicate
         pass
 
-def load_playbyplay(engine, pbp_df):
+def resolve_action_type_ids(engine, pbp_df):
+    """
+    Returns the action_type_id for every row of pbp_df, in order
+    Pairs missing from the interning map are inserted/fetched in one round trip
+    pbp_df: pbp df with action_type and action_subtype columns
+    """
+    keys = list(zip(pbp_df['action_type'].fillna('').astype(str), pbp_df['action_subtype'].fillna('').astype(str)))
+    missing = sorted(set(key for key in keys if key not in _action_type_ids))
+    if missing:
+        rows = [{'action_type': action_type, 'action_subtype': action_subtype} for action_type, action_subtype in missing]
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO action_types (action_type, action_subtype)
+                VALUES (:action_type, :action_subtype)
+                ON CONFLICT (action_type, action_subtype) DO NOTHING
+            """), rows)
+            result = conn.execute(text("""
+                SELECT action_type_id, action_type, action_subtype
+                FROM action_types
+                WHERE action_type = ANY(:action_types)
+            """), {'action_types': sorted(set(action_type for action_type, _ in missing))})
+            for row in result:
+                _action_type_ids[(row[1], row[2])] = row[0]
+    return [_action_type_ids[key] for key in keys]
+
+def load_playbyplay(engine, pbp_df, conn=None):
+    """
+    conn: insert inside this connection's transaction (process_single_game) instead of on its
+          own; a duplicate then raises and the caller's transaction rolls back
+    """
     from sqlalchemy.exc import IntegrityError
+    # play_by_play only stores the SMALLINT action_type_id, the type and subtype live in action_types
+    pbp_df = pbp_df.assign(action_type_id=resolve_action_type_ids(engine, pbp_df))
+    pbp_df = pbp_df[[column for column in PBP_COLUMNS if column in pbp_df.columns]]
     try:
-        pbp_df.to_sql('play_by_play', engine, if_exists='append', index=False, method='multi', chunksize=1000)
+        pbp_df.to_sql('play_by_play', conn if conn is not None else engine, if_exists='append', index=False, method='multi', chunksize=1000)
     except IntegrityError:
+        if conn is not None:
+            raise
         # Some play-by-play records already exist in database, skip the duplicates
         pass
 
-def load_lineup_stints(engine, stints_df):
+def resolve_lineup_ids(engine, stints_df):
+    """
+    Returns the lineup_id for every row of stints_df, in order
+    Lineups missing from the interning map are inserted/fetched in one round trip
+    stints_df: stints df with player1_id..player5_id columns
+    """
+    keys = [lineup_key(row) for row in stints_df[PLAYER_COLUMNS].itertuples(index=False, name=None)]
+    missing = sorted(set(key for key in keys if key not in _lineup_ids))
+    if missing:
+        rows = [dict(zip(PLAYER_COLUMNS, key), lineup_hash='-'.join(str(player) for player in key)) for key in missing]
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO lineups (player1_id, player2_id, player3_id, player4_id, player5_id, lineup_hash)
+                VALUES (:player1_id, :player2_id, :player3_id, :player4_id, :player5_id, :lineup_hash)
+                ON CONFLICT (lineup_hash) DO NOTHING
+            """), rows)
+            result = conn.execute(text("""
+                SELECT lineup_id, player1_id, player2_id, player3_id, player4_id, player5_id
+                FROM lineups
+                WHERE lineup_hash = ANY(:hashes)
+            """), {'hashes': [row['lineup_hash'] for row in rows]})
+            for row in result:
+                _lineup_ids[tuple(row[1:])] = row[0]
+    return [_lineup_ids[key] for key in keys]
+
+def load_lineup_stints(engine, stints_df, conn=None):
+    """
+    conn: insert inside this connection's transaction, as in load_playbyplay
+    """
     from sqlalchemy.exc import IntegrityError
+    # lineup_stints only stores the integer lineup_id, the players live in the lineups table
+    stints_df = stints_df.copy()
+    stints_df['lineup_id'] = resolve_lineup_ids(engine, stints_df)
+    stints_df = stints_df.drop(columns=PLAYER_COLUMNS + ['lineup_hash'], errors='ignore')
     try:
-        stints_df.to_sql('lineup_stints', engine, if_exists='append', index=False, method='multi', chunksize=1000)
+        stints_df.to_sql('lineup_stints', conn if conn is not None else engine, if_exists='append', index=False, method='multi', chunksize=1000)
     except IntegrityError:
+        if conn is not None:
+            raise
         # Some lineup stints already exist in database, skip the duplicates
         pass
 
+def delete_game_facts(conn, game_id):
+    # One game's stints and play-by-play, inside the caller's transaction (a reload replacing them)
+    for table in ['lineup_stints', 'play_by_play']:
+        conn.execute(text(f"DELETE FROM {table} WHERE game_id = :game_id"), {'game_id': int(game_id)})
+
 def check_game_exists(engine, game_id):
     with engine.connect() as conn:
         query = text("SELECT COUNT(*) FROM play_by_play WHERE game_id = :game_id")
@@ -53,6 +139,64 @@ def get_loaded_games(engine):
     # Convert to string to match NBA API format (with leading zeros)
     return pd.read_sql(query, engine)['game_id'].astype(str).str.zfill(10).tolist()
 
+def get_loaded_game_ids(engine, game_ids):
+    """
+    Returns which of game_ids already have play-by-play loaded, without scanning the whole table
+    """
+    if len(game_ids) == 0:
+        return []
+    query = text("SELECT DISTINCT game_id FROM play_by_play WHERE game_id = ANY(:game_ids)")
+    with engine.connect() as conn:
+        # game_id is an INT column, the API ids are zero padded strings
+        result = conn.execute(query, {'game_ids': [int(game_id) for game_id in game_ids]})
+        return [str(row[0]).zfill(10) for row in result]
+
+def refresh_lineup_game_stats(engine, game_ids):
+    """
+    Rebuilds the lineup_game_stats and player_game_stats rows for the given games only
+    and bumps etl_data_version, in one transaction
+    Called after loading new games so the season totals never need a full recompute
+    (the summary server uses the version as its ETag)
+    Returns the number of lineup_game_stats rows written
+    """
+    if len(game_ids) == 0:
+        return 0
+    params = {'game_ids': [int(game_id) for game_id in game_ids]}
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM lineup_game_stats WHERE game_id = ANY(:game_ids)"), params)
+        result = conn.execute(text("""
+            INSERT INTO lineup_game_stats (game_id, team_id, lineup_id, stints, seconds,
+                                           points_scored, points_allowed, possessions)
+            SELECT game_id, team_id, lineup_id, COUNT(*), SUM(duration_secs),
+                   SUM(points_scored), SUM(points_allowed), SUM(possessions)
+            FROM lineup_stint_stats
+            WHERE game_id = ANY(:game_ids)
+            GROUP BY game_id, team_id, lineup_id
+        """), params)
+        # Player totals come from the per game lineup rows (~15 per team), not from every stint
+        conn.execute(text("DELETE FROM player_game_stats WHERE game_id = ANY(:game_ids)"), params)
+        conn.execute(text("""
+            INSERT INTO player_game_stats (game_id, team_id, player_id, stints, seconds,
+                                           points_scored, points_allowed, possessions)
+            SELECT lgs.game_id, lgs.team_id, p.player_id, SUM(lgs.stints), SUM(lgs.seconds),
+                   SUM(lgs.points_scored), SUM(lgs.points_allowed), SUM(lgs.possessions)
+            FROM lineup_game_stats lgs
+            INNER JOIN lineups l ON l.lineup_id = lgs.lineup_id
+            CROSS JOIN LATERAL (VALUES (l.player1_id), (l.player2_id), (l.player3_id),
+                                       (l.player4_id), (l.player5_id)) AS p(player_id)
+            WHERE lgs.game_id = ANY(:game_ids)
+            GROUP BY lgs.game_id, lgs.team_id, p.player_id
+        """), params)
+        conn.execute(text("UPDATE etl_data_version SET version = version + 1, updated_at = NOW() WHERE id = 1"))
+        return result.rowcount
+
+def get_data_version(engine):
+    """
+    Returns the etl_data_version counter (bumped every time the aggregates change)
+    """
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT version FROM etl_data_version WHERE id = 1")).scalar()
+
 def get_loaded_players(engine):
     query = "SELECT DISTINCT player_id FROM players ORDER BY player_id"
     return pd.read_sql(query, engine)['player_id'].tolist()
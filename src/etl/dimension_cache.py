@@ -0,0 +1,175 @@
+import logging
+
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# In-memory copy of the dimension tables (teams, players, games) for one run.
+# play_by_play has foreign keys to all three and a missing row fails the whole
+# insert chunk, so every fact load used to be preceded by SELECTs of the full
+# teams and players tables. DimensionCache reads them once, resolves the ids a
+# game needs against the dicts, fills the gaps (teams from the static nba_api
+# list, players from CommonPlayerInfo, stub rows for ids that are not real
+# players) and writes all new rows in one transaction right before the facts.
+# Stub rows have a NULL position, fetched players '' at least, so a player whose
+# info fetch failed stays recognisable: scripts/fix_missing_players.py re-fetches
+# the stubs with a real player id and overwrites them.
+
+# Team ids double as personId on team events (team rebounds, team turnovers)
+TEAM_ID_RANGE = (1610612000, 1610613000)
+
+TEAM_COLUMNS = ['team_id', 'abbreviation', 'team_name']
+PLAYER_COLUMNS = ['player_id', 'player_name', 'position', 'height', 'weight']
+GAME_COLUMNS = ['game_id', 'home_team_id', 'away_team_id', 'home_score', 'away_score']
+
+def is_team_id(value):
+    return TEAM_ID_RANGE[0] <= value <= TEAM_ID_RANGE[1]
+
+class DimensionCache:
+    """
+    teams / players: {id: name} of the rows in the database or waiting to be flushed
+    games: game ids in the database or waiting to be flushed
+    stats: hits and misses per dimension, one per id looked up
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.teams = None
+        self.players = None
+        self.games = None
+        self.pending = {'teams': [], 'players': [], 'games': []}
+        self.stats = {name: {'hits': 0, 'misses': 0, 'inserted': 0} for name in ['teams', 'players', 'games']}
+
+    def preload(self):
+        # One query per table, once per run
+        if self.teams is not None:
+            return self
+        with self.engine.connect() as conn:
+            self.teams = dict(conn.execute(text("SELECT team_id, team_name FROM teams")).all())
+            self.players = dict(conn.execute(text("SELECT player_id, player_name FROM players")).all())
+            self.games = set(row[0] for row in conn.execute(text("SELECT game_id FROM games")))
+        logger.info(f"Dimension cache preloaded {len(self.teams)} teams, {len(self.players)} players, {len(self.games)} games")
+        return self
+
+    def _lookup(self, name, known, ids):
+        # Returns the ids missing from a dimension and counts the lookups
+        missing = [value for value in ids if value not in known]
+        self.stats[name]['hits'] += len(ids) - len(missing)
+        self.stats[name]['misses'] += len(missing)
+        return missing
+
+    def missing_players(self, player_ids):
+        """
+        Returns the real player ids (no 0 or team ids) that have no players row yet
+        """
+        self.preload()
+        player_ids = _distinct_ids(player_ids)
+        return [player for player in self._lookup('players', self.players, player_ids) if player != 0 and not is_team_id(player)]
+
+    def resolve_teams(self, team_ids):
+        """
+        Makes sure every team id has a teams row, adding the missing ones to the next flush
+        Team 0 (period and timeout events) gets a 'None' row like the benchmark schema
+        """
+        self.preload()
+        missing = self._lookup('teams', self.teams, _distinct_ids(team_ids))
+        if not missing:
+            return []
+        from src.etl.nba_data_extractor import get_teams
+        static = get_teams().rename(columns={'id': 'team_id', 'full_name': 'team_name'}).set_index('team_id')
+        for team_id in missing:
+            if team_id in static.index:
+                row = {'team_id': team_id, 'abbreviation': static.at[team_id, 'abbreviation'], 'team_name': static.at[team_id, 'team_name']}
+            else:
+                row = {'team_id': team_id, 'abbreviation': '', 'team_name': 'None' if team_id == 0 else f'Team {team_id}'}
+            self._add('teams', self.teams, team_id, row['team_name'], row)
+        return missing
+
+    def add_players(self, players_df):
+        # Rows fetched from the API (get_player_info) for the next flush
+        for row in players_df[PLAYER_COLUMNS].to_dict('records'):
+            if row['position'] is None or pd.isna(row['position']):
+                row['position'] = ''  # NULL is kept for stubs
+            self._add('players', self.players, int(row['player_id']), row['player_name'], row)
+
+    def resolve_players(self, player_ids, names=None):
+        """
+        Adds stub rows for ids the play-by-play references that are not real players:
+        0 on team-less events, team ids on team events, and players whose info couldn't be fetched
+        names: optional {player_id: name} for the stubs (e.g. the pbp playerNameI)
+        Call it after add_players so only the true gaps become stubs
+        """
+        self.preload()
+        names = names or {}
+        stubs = [player for player in _distinct_ids(player_ids) if player not in self.players]
+        for player in stubs:
+            if player == 0:
+                name = 'None'
+            elif is_team_id(player):
+                name = self.teams.get(player) or f'Team {player}'
+            else:
+                name = names.get(player)
+                logger.warning(f"Player {player} ({name}) has no player info, adding a stub row (fix_missing_players.py repairs it)")
+            self._add('players', self.players, player, name, {'player_id': player, 'player_name': name,
+                                                              'position': None, 'height': None, 'weight': None})
+        return stubs
+
+    def add_game(self, game_df):
+        for row in game_df[GAME_COLUMNS].to_dict('records'):
+            game_id = int(row['game_id'])
+            if self._lookup('games', self.games, [game_id]):
+                self._add('games', self.games, game_id, None, dict(row, game_id=game_id))
+
+    def _add(self, name, known, key, value, row):
+        if isinstance(known, dict):
+            known[key] = value
+        else:
+            known.add(key)
+        self.pending[name].append({column: _plain(value) for column, value in row.items()})
+
+    def flush(self):
+        """
+        Writes every pending dimension row in one transaction (teams, then players, then games)
+        Returns the number of rows written
+        """
+        if not any(self.pending.values()):
+            return 0
+        statements = {'teams': TEAM_COLUMNS, 'players': PLAYER_COLUMNS, 'games': GAME_COLUMNS}
+        pending, self.pending = self.pending, {name: [] for name in self.pending}
+        try:
+            with self.engine.begin() as conn:
+                for name, columns in statements.items():
+                    if pending[name]:
+                        conn.execute(text(f"""
+                            INSERT INTO {name} ({', '.join(columns)})
+                            VALUES ({', '.join(':' + column for column in columns)})
+                            ON CONFLICT ({columns[0]}) DO NOTHING
+                        """), pending[name])
+        except Exception:
+            # Nothing was written: forget the rows so the next game resolves them again
+            for name, rows in pending.items():
+                known = getattr(self, name)
+                for row in rows:
+                    key = row[statements[name][0]]
+                    if isinstance(known, set):
+                        known.discard(key)
+                    else:
+                        known.pop(key, None)
+            raise
+        for name, rows in pending.items():
+            self.stats[name]['inserted'] += len(rows)
+        return sum(len(rows) for rows in pending.values())
+
+    def counters(self):
+        # Flat {'players_hits': ...} for RunMetrics.set_gauges
+        return {f'{name}_{counter}': value for name, counts in self.stats.items() for counter, value in counts.items()}
+
+def _distinct_ids(values):
+    ids = pd.to_numeric(pd.Series(list(values), dtype=object), errors='coerce').dropna()
+    return [int(value) for value in pd.unique(ids)]
+
+def _plain(value):
+    # numpy scalars and NaN -> Python values the driver understands
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
@@ -0,0 +1,116 @@
+import ast
+import hashlib
+import logging
+import os
+
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Content fingerprints of every loaded game, so a reload only redoes the games
+# whose result could have changed. game_fingerprints keeps two hashes per game:
+#   - input_hash: the API frames the game was built from (play-by-play, both
+#     rotations, the box score game row), hashed by value with
+#     pd.util.hash_pandas_object, so a frame read back from the archive hashes
+#     the same as the one fetched
+#   - transform_hash: the code that turns those frames into rows (the modules
+#     in TRANSFORM_MODULES), hashed from their syntax tree so comment and
+#     formatting edits don't invalidate every game. A 'path:function' entry
+#     hashes only that function, so pipeline.py's season loops can change
+#     without redoing every game while its stint filtering still counts
+# A tracker fix changes transform_hash and every game is redone; a corrected
+# play-by-play changes only that game's input_hash.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# What process_single_game runs between the API frames and the inserted rows
+TRANSFORM_MODULES = ['src/etl/lineup_tracker.py', 'src/etl/nba_data_extractor.py',
+                     'src/etl/pipeline.py:process_single_game', 'src/etl/validation.py',
+                     'src/etl/database_loader.py']
+FRAME_KEYS = ['pbp', 'rotation', 'game_info']
+
+_transform_hash = None
+
+def _hash_frame(hasher, df):
+    hasher.update(repr(list(df.columns)).encode())
+    hasher.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+
+def input_hash(frames):
+    """
+    sha256 of a game's API frames {'pbp': df, 'rotation': [df, ...], 'game_info': df}
+    """
+    hasher = hashlib.sha256()
+    for key in FRAME_KEYS:
+        hasher.update(key.encode())
+        value = frames[key]
+        for df in (value if isinstance(value, (list, tuple)) else [value]):
+            _hash_frame(hasher, df)
+    return hasher.hexdigest()
+
+def transform_hash(modules=None):
+    """
+    sha256 of the transform modules' syntax trees (cached for the default modules)
+    """
+    global _transform_hash
+    if modules is None and _transform_hash is not None:
+        return _transform_hash
+    hasher = hashlib.sha256()
+    for module in modules or TRANSFORM_MODULES:
+        path, _, function = module.partition(':')
+        with open(os.path.join(PROJECT_ROOT, path), 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read())
+        if function:
+            nodes = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == function]
+            if not nodes:
+                raise ValueError(f"{function} not found in {path}")
+            tree = nodes[0]
+        hasher.update(ast.dump(tree).encode())
+    if modules is None:
+        _transform_hash = hasher.hexdigest()
+        return _transform_hash
+    return hasher.hexdigest()
+
+def load_fingerprints(engine, game_ids=None):
+    """
+    Returns {game_id (int): {'input_hash', 'transform_hash'}} of the fingerprinted games
+    """
+    query = "SELECT game_id, input_hash, transform_hash FROM game_fingerprints"
+    params = {}
+    if game_ids is not None:
+        query += " WHERE game_id = ANY(:game_ids)"
+        params['game_ids'] = [int(game_id) for game_id in game_ids]
+    with engine.connect() as conn:
+        rows = conn.execute(text(query), params)
+        return {row.game_id: {'input_hash': row.input_hash, 'transform_hash': row.transform_hash} for row in rows}
+
+FINGERPRINT_UPSERT = """
+    INSERT INTO game_fingerprints (game_id, input_hash, transform_hash, stints, processed_at)
+    VALUES (:game_id, :input_hash, :transform_hash, :stints, NOW())
+    ON CONFLICT (game_id) DO UPDATE
+    SET input_hash = EXCLUDED.input_hash, transform_hash = EXCLUDED.transform_hash,
+        stints = EXCLUDED.stints, processed_at = EXCLUDED.processed_at
+"""
+
+def record_fingerprint(engine, game_id, inputs, transform, stints=None, conn=None):
+    """
+    conn: write inside this connection's transaction (the game's fact load), so a game is
+          never loaded without its fingerprint or fingerprinted without its rows
+    """
+    params = {'game_id': int(game_id), 'input_hash': inputs, 'transform_hash': transform, 'stints': stints}
+    if conn is not None:
+        conn.execute(text(FINGERPRINT_UPSERT), params)
+        return
+    with engine.begin() as conn:
+        conn.execute(text(FINGERPRINT_UPSERT), params)
+
+def reload_reason(fingerprint, inputs, transform):
+    """
+    Why a game needs reprocessing: 'new' (never fingerprinted), 'input', 'transform', or None (unchanged)
+    """
+    if fingerprint is None:
+        return 'new'
+    if fingerprint['input_hash'] != inputs:
+        return 'input'
+    if fingerprint['transform_hash'] != transform:
+        return 'transform'
+    return None
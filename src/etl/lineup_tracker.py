@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 from nba_api.stats.endpoints import CommonTeamRoster, gamerotation
+from src.utils.stats_api import configure_stats_api
+
+# Honour NBA_STATS_BASE_URL (replay server) for every endpoint used below
+configure_stats_api()
 
 def clean_subs_pbp(playbyplay, team_id):
     subs = playbyplay[playbyplay['actionType'] == 'Substitution'].copy()
@@ -12,7 +16,7 @@ def clean_subs_pbp(playbyplay, team_id):
     subs['next_name'] = subs['next_name'].str.lstrip()
     subs['next_id'] = None
     
-    all_subs = subs[subs['teamTricode'] == 'IND'].copy()
+    all_subs = subs[subs['teamId'] == team_id].copy()
     sorted_prev = np.sort(all_subs['prev_name'].unique())
     sorted_next = np.sort(all_subs['next_name'].unique())
 
@@ -28,7 +32,7 @@ def clean_subs_pbp(playbyplay, team_id):
             id = ((playerdf.iloc[0])['personId'])
             player_id_dict[player] = id
         except Exception as e: 
-            team_roster = CommonTeamRoster(team_id=1610612754, season='2024-25')
+            team_roster = CommonTeamRoster(team_id=team_id, season='2024-25')
             roster_df = team_roster.get_data_frames()[0]
             roster_df2 = (roster_df[roster_df['PLAYER'].str.contains(player)]).copy()
             player_id_dict[player] = roster_df2['PLAYER_ID'].iloc[0]
@@ -38,42 +42,83 @@ def clean_subs_pbp(playbyplay, team_id):
 
     return subs
 
+def get_period_starters(playbyplay, subs):
+    """
+    Returns the players on the court at the start of every period, for both teams, in one pass
+    playbyplay: play-by-play df (period, teamId, personId, actionType)
+    subs: clean_subs_pbp output for the substitutions' next_id (the frames of both teams can be concatenated)
+    Returns {(period, team_id): {'players': [...], 'status': 'ok' | 'unknown'}}
+    A player started the period if they show up in it (an event, or being subbed out) before being
+    subbed in. Everyone with an event before the team's first substitution of the period qualifies,
+    so only the events after it are walked, and only until 5 players are found. 'unknown' means
+    the period ran out of events first (bad or missing data); the players found are still returned
+    """
+    next_ids = pd.to_numeric(subs['next_id'], errors='coerce').dropna()
+    next_ids = next_ids[~next_ids.index.duplicated()]
+
+    events = playbyplay[(playbyplay['teamId'] != 0) & (playbyplay['personId'] != 0)]
+    person = events['personId'].to_numpy()
+    is_sub = (events['actionType'] == 'Substitution').to_numpy()
+    incoming = next_ids.reindex(events.index).to_numpy()
+
+    starters = {}
+    for (period, team_id), positions in events.groupby(['period', 'teamId'], sort=False).indices.items():
+        sub_positions = positions[is_sub[positions]]
+        first_sub = sub_positions[0] if len(sub_positions) else positions[-1] + 1
+        players = [int(player) for player in pd.unique(person[positions[positions < first_sub]])]
+
+        entered = set()
+        for position in positions[positions >= first_sub]:
+            if len(players) >= 5:
+                break
+            player = int(person[position])
+            if player not in entered and player not in players:
+                players.append(player)
+            if is_sub[position] and not np.isnan(incoming[position]):
+                entered.add(int(incoming[position]))
+
+        starters[(int(period), int(team_id))] = {'players': players[:5], 'status': 'ok' if len(players) >= 5 else 'unknown'}
+    return starters
+
 def get_quarter_starters(playbyplay, subs, quarter, team_id):
     """
-    Returns a list of the 5 players on the court at the start of a quarter
+    Returns a list of the 5 players on the court at the start of a quarter, or None if they can't be told
     playbyplay: playbyplay df that is cleaned
     quarter: int quarter to search
     team_id: int team_id
+    Use get_period_starters directly when more than one quarter is needed, it computes all of them at once
     """
-    df = playbyplay[playbyplay['period'] == quarter].copy()
-    df2 = df[df['teamId'] == team_id].copy()
-    first_sub = df2[df2['actionType'] == 'Substitution'].index[0]
-    df3 = df2.loc[:df2.index[df2.index.get_loc(first_sub)-1]]
-    unique_ids = df3['personId'].unique()
-    if len(unique_ids) < 5:
-        subs = subs[subs['period'] == quarter].copy()
-        first_sub_series = subs[subs['teamId'] == team_id].copy()
-        while True:
-            sub_series = first_sub_series.iloc[0]
-            if sub_series['prev_id'] not in unique_ids.tolist():
-                unique_ids = np.append(unique_ids, sub_series['prev_id'])
-                return (unique_ids.tolist())
-            first_sub_series = first_sub_series.iloc[1:]
-    return (unique_ids.tolist())
+    starters = get_period_starters(playbyplay, subs).get((int(quarter), int(team_id)))
+    if starters is None or starters['status'] != 'ok':
+        return None
+    return starters['players']
 
 
 def clean_data(pbp):
     playbyplay = pbp.copy()
     playbyplay['minutes'] = playbyplay['clock'].str.split(r'PT|M|S').str[1]
     playbyplay['seconds'] = playbyplay['clock'].str.split(r'PT|M|S').str[2]
-    playbyplay['seconds_left_in_quarter'] = (pd.to_numeric(playbyplay['minutes']) * 60) + pd.to_numeric(playbyplay['seconds']).round(1)
-    playbyplay['seconds_left_in_game'] = (pd.to_numeric(playbyplay['minutes']) * 60) + pd.to_numeric(playbyplay['seconds']) + (abs(4 - pd.to_numeric(playbyplay['period'])) * 720).round(1)
-    playbyplay['seconds_into_game'] = (2880.0 - playbyplay['seconds_left_in_game']).round(1)
+    seconds_left = (pd.to_numeric(playbyplay['minutes']) * 60) + pd.to_numeric(playbyplay['seconds'])
+    period = pd.to_numeric(playbyplay['period'])
+    regulation = period <= 4
+    playbyplay['seconds_left_in_quarter'] = seconds_left.round(1)
+    # Overtimes are 5 minutes and come after the 2880s of regulation
+    playbyplay['seconds_left_in_game'] = np.where(regulation, seconds_left + (4 - period) * 720, seconds_left).round(1)
+    playbyplay['seconds_into_game'] = np.where(regulation, period * 720 - seconds_left, 2880 + (period - 4) * 300 - seconds_left).round(1)
     return playbyplay
 
-def get_lineups(game_id, team_id):
+def get_rotation(game_id):
+    # One GameRotation request returns the rotations for both teams
     rotation = gamerotation.GameRotation(game_id)
-    rotation_dfs = rotation.get_data_frames()
+    return rotation.get_data_frames()
+
+def get_lineups(game_id, team_id, rotation_dfs=None):
+    """
+    Returns the list of lineups a team used in a game
+    rotation_dfs: frames from get_rotation, fetched here if not given
+    """
+    if rotation_dfs is None:
+        rotation_dfs = get_rotation(game_id)
 
     # gamerotation returns 2 dataframes (one per team)
     # Find the dataframe for the requested team
@@ -99,10 +144,12 @@ def get_lineups(game_id, team_id):
     lineups.append(first_lineup)
 
     for i, (index, sub) in enumerate(sorted_rotations.iloc[5:].iterrows()):
-        curr_lineup = lineups[-1]['PLAYERS']
+        # Copy so earlier lineups aren't changed by the substitution below
+        curr_lineup = list(lineups[-1]['PLAYERS'])
         min_time = lineups[-1]["OUT_TIME_REAL"]
         if (i == len(sorted_rotations.iloc[5:]) - 1):
-            max_time = 2880.0
+            # Last lineup plays to the final buzzer (after 2880s when the game went to overtime)
+            max_time = sorted_rotations['OUT_TIME_REAL'].max()
         else:
             max_time = sorted_rotations['IN_TIME_REAL'].iloc[index + 1]
         to_remove_time = sorted_rotations['IN_TIME_REAL'].iloc[index]
@@ -126,40 +173,46 @@ def get_lineups(game_id, team_id):
         lineups.append(curr_5)
     return lineups
 
+def lineup_key(players):
+    # Canonical form of a lineup: the 5 player ids sorted ascending
+    # Used as the interning key for lineups.lineup_id in the loader
+    return tuple(sorted(int(player) for player in players))
+
 def get_stints(playbyplay, all_lineups, team_id):
-    col_names = ['game_id', 'team_id', 'start_num', 'end_num', 'duration_secs', 'player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id', 'lineup_hash']
-    df = pd.DataFrame(columns=col_names)
+    """
+    Returns one row per lineup stint of a team
+    start_secs / end_secs: game clock bounds of the stint. An event at time t belongs to the
+                           stint with start_secs < t <= end_secs, so an event at a substitution
+                           time is counted once, for the lineup that was on the court for it
+    start_num / end_num: actionId of the first and last event in the stint (NULL if there was none)
+    """
+    col_names = ['game_id', 'team_id', 'start_num', 'end_num', 'start_secs', 'end_secs', 'duration_secs', 'player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']
 
     game_id = playbyplay['gameId'].iloc[0]
-    for i in range(len(all_lineups)):
-        lineup = all_lineups[i]['PLAYERS']
-        lineup_start = all_lineups[i]['IN_TIME_REAL']
-        lineup_end = all_lineups[i]["OUT_TIME_REAL"]
-
-        # Find the action_id closest to lineup start time
-        start = playbyplay.iloc[(playbyplay['seconds_into_game'] - lineup_start).abs().argsort()][:1]
-        if len(start) == 0:
-            raise ValueError(f"No play-by-play data found near lineup start time {lineup_start}")
-        start_num = start['actionId'].iloc[0]
-
-        # Find the action_id closest to lineup end time
-        end = playbyplay.iloc[(playbyplay['seconds_into_game'] - lineup_end).abs().argsort()][:1]
-        if len(end) == 0:
-            raise ValueError(f"No play-by-play data found near lineup end time {lineup_end}")
-        end_num = end['actionId'].iloc[0]
-
-        duration_secs = lineup_end - lineup_start
-        # Sort player IDs to ensure consistency across games
-        sorted_lineup = sorted(lineup)
-        player1_id = sorted_lineup[0]
-        player2_id = sorted_lineup[1]
-        player3_id = sorted_lineup[2]
-        player4_id = sorted_lineup[3]
-        player5_id = sorted_lineup[4]
-        lineup_hash = '-'.join(str(id) for id in sorted_lineup)
-        df.loc[len(df)] = [game_id, team_id, start_num, end_num, duration_secs, player1_id, player2_id, player3_id, player4_id, player5_id, lineup_hash]
-    return df
-
+    # Events in game order; several share a timestamp, ties keep the actionId order
+    events = playbyplay.sort_values(['seconds_into_game', 'actionId'], kind='stable')
+    event_times = events['seconds_into_game'].to_numpy(dtype=float)
+    action_ids = events['actionId'].to_numpy()
+
+    starts = np.round([lineup['IN_TIME_REAL'] for lineup in all_lineups], 1)
+    ends = np.round([lineup['OUT_TIME_REAL'] for lineup in all_lineups], 1)
+    first = np.searchsorted(event_times, starts, side='right')
+    last = np.searchsorted(event_times, ends, side='right') - 1
+    has_events = last >= first
+
+    # Sort player IDs to ensure consistency across games
+    players = np.array([lineup_key(lineup['PLAYERS']) for lineup in all_lineups], dtype=np.int64).reshape(-1, 5)
+    df = pd.DataFrame({'game_id': game_id,
+                       'team_id': team_id,
+                       'start_num': pd.array(np.where(has_events, action_ids[np.minimum(first, len(action_ids) - 1)], 0), dtype='Int64'),
+                       'end_num': pd.array(np.where(has_events, action_ids[np.maximum(last, 0)], 0), dtype='Int64'),
+                       'start_secs': starts,
+                       'end_secs': ends,
+                       'duration_secs': ends - starts}, index=range(len(all_lineups)))
+    df.loc[~has_events, ['start_num', 'end_num']] = pd.NA
+    for i in range(5):
+        df[f'player{i + 1}_id'] = players[:, i]
+    return df[col_names]
 
 
 
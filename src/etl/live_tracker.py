@@ -0,0 +1,404 @@
+import time
+import logging
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Live lineup tracking for games in progress. The batch path (clean_data,
+# get_lineups, get_stints) needs the GameRotation data, which only exists once
+# the game is over. LiveGameTracker instead keeps the on-court state of both
+# teams from the play-by-play alone and only looks at the events it has not
+# seen yet, so each poll costs O(new events):
+#   - the 5 players starting a period are inferred as events arrive, with the
+#     rule of get_period_starters (a player with an event, or subbed out, before
+#     being subbed in started the period)
+#   - a substitution closes the team's open stint and opens the next one
+#   - score changes are credited to the open stints of both teams
+# Stints are split at period boundaries (lineups change between periods without
+# substitution events). Like get_stints, an event at time t belongs to the stint
+# with start_secs < t <= end_secs.
+
+REGULATION_PERIODS = 4
+PERIOD_SECS = 720
+OVERTIME_SECS = 300
+
+# PlayByPlayV3 columns the tracker reads
+Event = namedtuple('Event', ['actionNumber', 'period', 'clock', 'teamId', 'personId', 'playerName', 'playerNameI',
+                             'location', 'actionType', 'subType', 'description', 'scoreHome', 'scoreAway'])
+
+def clock_seconds_left(clock):
+    # 'PT11M32.50S' -> 692.5
+    minutes, seconds = clock[2:-1].split('M')
+    return round(int(minutes) * 60 + float(seconds), 1)
+
+def game_seconds(period, clock):
+    """
+    Returns seconds into the game of a period and clock, the same as clean_data's seconds_into_game
+    """
+    period = int(period)
+    seconds_left = clock_seconds_left(clock)
+    if period <= REGULATION_PERIODS:
+        return round(period * PERIOD_SECS - seconds_left, 1)
+    return round(REGULATION_PERIODS * PERIOD_SECS + (period - REGULATION_PERIODS) * OVERTIME_SECS - seconds_left, 1)
+
+def period_start_seconds(period):
+    period = int(period)
+    if period <= REGULATION_PERIODS:
+        return (period - 1) * PERIOD_SECS
+    return REGULATION_PERIODS * PERIOD_SECS + (period - REGULATION_PERIODS - 1) * OVERTIME_SECS
+
+def as_int(value, default=0):
+    if value is None or value == '' or (isinstance(value, float) and np.isnan(value)):
+        return default
+    return int(value)
+
+def parse_substitution(description):
+    # 'SUB: Hield FOR Mitchell' -> ('Hield', 'Mitchell'), same split as clean_subs_pbp
+    parts = description.split(': ', 1)[-1].split(' FOR')
+    return parts[0].strip(), parts[1].strip() if len(parts) > 1 else None
+
+class TeamPeriod:
+    """
+    On-court state of one team in one period
+    starters: players known to have started the period (complete at 5)
+    subs: (outgoing id, incoming id or placeholder) in the order they happened
+    stints: stints opened in the period, each with the number of subs applied before it
+    """
+    def __init__(self, team_id, period):
+        self.team_id = team_id
+        self.period = period
+        self.starters = []
+        self.entered = set()
+        self.subs = []
+        self.stints = []
+        self.on_court = None
+
+    @property
+    def known(self):
+        return self.on_court is not None
+
+    def see_player(self, player_id):
+        if self.known or player_id in self.entered or player_id in self.starters:
+            return
+        self.starters.append(player_id)
+        if len(self.starters) == 5:
+            self.resolve()
+
+    def resolve(self):
+        # Starters complete: replay the subs so far to fill in the lineups of the open stints
+        lineup = list(self.starters)
+        applied = 0
+        for stint in self.stints:
+            while applied < stint['subs_before']:
+                lineup = apply_sub(lineup, *self.subs[applied])
+                applied += 1
+            stint['players'] = list(lineup)
+        while applied < len(self.subs):
+            lineup = apply_sub(lineup, *self.subs[applied])
+            applied += 1
+        self.on_court = lineup
+
+    def replace(self, placeholder, player_id):
+        self.subs = [(out, player_id if into == placeholder else into) for out, into in self.subs]
+        if placeholder in self.entered:
+            self.entered.discard(placeholder)
+            self.entered.add(player_id)
+        if self.on_court is not None:
+            self.on_court = [player_id if player == placeholder else player for player in self.on_court]
+
+def name_matches(name, player_name, initial_name):
+    # 'Caruso' / 'A. Caruso' / 'Jal. Williams' against playerName 'Williams', playerNameI 'J. Williams'
+    if name in (player_name, initial_name):
+        return True
+    first, _, last = name.partition('. ')
+    return bool(last) and last == player_name and isinstance(initial_name, str) and initial_name[:1] == first[:1]
+
+def apply_sub(lineup, player_out, player_in):
+    lineup = [player for player in lineup if player != player_out]
+    if len(lineup) == 5:
+        logger.warning(f"Substitution of {player_out} who is not on the court {lineup}")
+        lineup = lineup[:4]
+    return lineup + [player_in]
+
+class LiveGameTracker:
+    """
+    Lineup stints of one game, updated from play-by-play events as they arrive
+    game_id: str game id
+    roster: optional {player name: player id} for incoming players who have no event yet
+            (PlayByPlayV3 names the incoming player of a substitution only in the description)
+    """
+    def __init__(self, game_id, roster=None):
+        self.game_id = game_id
+        self.roster = dict(roster or {})
+        self.last_action_number = 0
+        self.period = 0
+        self.clock = None
+        self.secs = 0.0
+        self.score = {'h': 0, 'v': 0}
+        self.team_sides = {}
+        self.names = {}
+        self.pending = {}
+        self.states = {}
+        self.stints = []
+        self.finished = False
+        self.events_processed = 0
+        self.closed_in_batch = []
+
+    def process(self, pbp):
+        """
+        Applies the events of a PlayByPlayV3 frame that have not been seen yet
+        pbp: the frame returned by a poll (the whole game so far, or just new events)
+        Returns {'events', 'opened', 'closed'} counts for this batch, and 'closed_stints':
+        the stints this batch closed, in the order they closed
+        """
+        if pbp is None or len(pbp) == 0:
+            return {'events': 0, 'opened': 0, 'closed': 0, 'closed_stints': []}
+        # Only the new rows of the columns used are taken out of the frame
+        action_numbers = pd.to_numeric(pbp['actionNumber']).to_numpy()
+        positions = np.flatnonzero(action_numbers > self.last_action_number)
+        positions = positions[np.argsort(action_numbers[positions], kind='stable')]
+        columns = [pbp[column].to_numpy()[positions].tolist() for column in Event._fields]
+
+        opened = len(self.stints)
+        self.closed_in_batch = []
+        for event in map(Event._make, zip(*columns)):
+            self.apply(event)
+        if len(positions):
+            self.last_action_number = int(action_numbers[positions[-1]])
+            self.events_processed += len(positions)
+        closed = self.closed_in_batch
+        return {'events': len(positions), 'opened': len(self.stints) - opened, 'closed': len(closed), 'closed_stints': closed}
+
+    def apply(self, event):
+        period = int(event.period)
+        if period != self.period:
+            self.start_period(period)
+        self.clock = event.clock
+        self.secs = game_seconds(period, event.clock)
+
+        team_id = as_int(event.teamId)
+        player_id = as_int(event.personId)
+        if team_id == 0:
+            if event.actionType == 'period' and event.subType == 'end':
+                self.end_period()
+                # A period ending after regulation with the scores apart ends the game
+                if period >= REGULATION_PERIODS and self.score['h'] != self.score['v']:
+                    self.finished = True
+            elif event.actionType == 'game' and event.subType == 'end':
+                self.finished = True
+            return
+
+        if event.location in ('h', 'v'):
+            self.team_sides[team_id] = event.location
+        if player_id and isinstance(event.playerName, str):
+            self.learn_player(team_id, player_id, event.playerName, event.playerNameI)
+        else:
+            # Team events (team rebounds, turnovers) carry the team or a placeholder in personId
+            player_id = 0
+        state = self.state(team_id)
+
+        if event.actionType == 'Substitution':
+            incoming_name, _ = parse_substitution(event.description)
+            self.substitute(state, player_id, self.resolve_name(team_id, incoming_name))
+        elif player_id:
+            state.see_player(player_id)
+
+        if event.actionType in ('Made Shot', 'Missed Shot'):
+            stint = self.stint_for(state)
+            if stint is not None:
+                stint['possessions'] += 1
+        # The API sends '' (a recorded CSV NaN) as the score of events that don't change it
+        home, away = as_int(event.scoreHome, None), as_int(event.scoreAway, None)
+        if home is not None and away is not None:
+            self.score_change(home, away)
+
+    def start_period(self, period):
+        self.end_period()
+        self.period = period
+        self.secs = period_start_seconds(period)
+        for team_id in self.team_sides:
+            self.state(team_id)
+
+    def end_period(self):
+        # Close the open stints at the end of the period, the next one starts from new starters
+        for state in self.states.values():
+            if state.period == self.period and state.stints and state.stints[-1]['end_secs'] is None:
+                self.close(state.stints[-1], self.period_end())
+
+    def period_end(self):
+        return period_start_seconds(self.period + 1)
+
+    def state(self, team_id):
+        # The team's state for the current period, opened with its first stint
+        state = self.states.get(team_id)
+        if state is None or state.period != self.period:
+            state = TeamPeriod(team_id, self.period)
+            self.states[team_id] = state
+            self.open(state, period_start_seconds(self.period))
+        return state
+
+    def open(self, state, start_secs):
+        stint = {'game_id': self.game_id, 'team_id': state.team_id, 'period': state.period,
+                 'start_secs': start_secs, 'end_secs': None,
+                 'players': list(state.on_court) if state.known else None,
+                 'subs_before': len(state.subs),
+                 'points_scored': 0, 'points_allowed': 0, 'possessions': 0}
+        state.stints.append(stint)
+        self.stints.append(stint)
+        return stint
+
+    def close(self, stint, end_secs):
+        if stint['end_secs'] is None:
+            self.closed_in_batch.append(stint)
+        stint['end_secs'] = end_secs
+
+    def substitute(self, state, player_out, player_in):
+        if not state.known and player_out not in state.entered and player_out not in state.starters:
+            state.starters.append(player_out)
+        state.entered.add(player_in)
+        state.subs.append((player_out, player_in))
+
+        current = state.stints[-1]
+        if current['start_secs'] < self.secs:
+            self.close(current, self.secs)
+            current = self.open(state, self.secs)
+        # Several subs at the same time: the open stint is still empty, change its lineup
+        current['subs_before'] = len(state.subs)
+
+        if state.known:
+            state.on_court = apply_sub(state.on_court, player_out, player_in)
+            current['players'] = list(state.on_court)
+        elif len(state.starters) == 5:
+            state.resolve()
+
+    def stint_for(self, state):
+        # The stint an event at the current time belongs to: start_secs < t <= end_secs
+        for stint in reversed(state.stints):
+            if stint['start_secs'] < self.secs:
+                return stint
+        return state.stints[0] if state.stints else None
+
+    def score_change(self, home, away):
+        delta = {'h': home - self.score['h'], 'v': away - self.score['v']}
+        self.score = {'h': home, 'v': away}
+        if not delta['h'] and not delta['v']:
+            return
+        for team_id, side in self.team_sides.items():
+            state = self.states.get(team_id)
+            if state is None or state.period != self.period:
+                state = self.state(team_id)
+            stint = self.stint_for(state)
+            stint['points_scored'] += delta[side]
+            stint['points_allowed'] += delta['v' if side == 'h' else 'h']
+
+    def learn_player(self, team_id, player_id, name, initial_name):
+        players = self.names.setdefault(team_id, {})
+        if player_id in players:
+            return
+        players[player_id] = (name, initial_name)
+        # An incoming player seen for the first time: swap their placeholder for the id
+        pending = self.pending.get(team_id, set())
+        for placeholder in [placeholder for placeholder in pending if name_matches(placeholder[1:], name, initial_name)]:
+            pending.discard(placeholder)
+            if team_id in self.states:
+                self.states[team_id].replace(placeholder, player_id)
+            for stint in self.stints:
+                if stint['team_id'] == team_id and stint['players'] is not None and placeholder in stint['players']:
+                    stint['players'] = [player_id if player == placeholder else player for player in stint['players']]
+
+    def resolve_name(self, team_id, name):
+        """
+        Returns the id of a player named in a substitution description, or a '?name' placeholder
+        Descriptions use the last name ('Caruso') or, when teammates share it, an abbreviated
+        first name ('Jal. Williams'), which is matched on the initial of playerNameI
+        """
+        players = self.names.get(team_id, {})
+        exact = [player_id for player_id, (player_name, initial_name) in players.items()
+                 if name in (player_name, initial_name)]
+        if len(exact) == 1:
+            return exact[0]
+        if name in self.roster:
+            return int(self.roster[name])
+        close = [player_id for player_id, names in players.items() if name_matches(name, *names)]
+        if len(close) == 1:
+            return close[0]
+        self.pending.setdefault(team_id, set()).add(f'?{name}')
+        return f'?{name}'
+
+    def on_court(self):
+        """
+        Returns {team_id: {'players', 'stint'}} for the current period, players None until the starters are known
+        """
+        return {team_id: {'players': list(state.on_court) if state.known else None,
+                          'stint': state.stints[-1] if state.stints else None}
+                for team_id, state in self.states.items() if state.period == self.period}
+
+    def stints_df(self, closed_only=False):
+        """
+        Returns the stints as a frame shaped like get_stints output (players sorted), plus scoring
+        Open stints end at the current game time; unresolved lineups have None players
+        """
+        rows = []
+        for stint in self.stints:
+            if closed_only and stint['end_secs'] is None:
+                continue
+            end_secs = stint['end_secs'] if stint['end_secs'] is not None else self.secs
+            if end_secs <= stint['start_secs'] and stint['end_secs'] is not None:
+                continue
+            players = stint['players']
+            if players is not None and all(isinstance(player, int) for player in players):
+                players = sorted(players)
+            row = {'game_id': stint['game_id'], 'team_id': stint['team_id'], 'period': stint['period'],
+                   'start_secs': stint['start_secs'], 'end_secs': end_secs,
+                   'duration_secs': round(end_secs - stint['start_secs'], 1),
+                   'open': stint['end_secs'] is None}
+            for i in range(5):
+                row[f'player{i + 1}_id'] = players[i] if players is not None and i < len(players) else None
+            row.update(points_scored=stint['points_scored'], points_allowed=stint['points_allowed'],
+                       possessions=stint['possessions'])
+            rows.append(row)
+        return pd.DataFrame(rows)
+
+def poll_game(game_id, tracker=None, interval=20.0, fetch=None, max_polls=None, on_update=None):
+    """
+    Polls the play-by-play of a game in progress and feeds new events to a tracker until the game ends
+    fetch: callable(game_id) -> PlayByPlayV3 frame, get_game_playbyplay by default
+    on_update: callable(tracker, batch summary) after every poll with new events
+    Returns the tracker
+    """
+    if fetch is None:
+        from src.etl.nba_data_extractor import get_game_playbyplay
+        fetch = get_game_playbyplay
+    tracker = tracker or LiveGameTracker(game_id)
+    polls = 0
+    while not tracker.finished:
+        batch = tracker.process(fetch(game_id))
+        polls += 1
+        if batch['events'] and on_update is not None:
+            on_update(tracker, batch)
+        if tracker.finished or (max_polls is not None and polls >= max_polls):
+            break
+        time.sleep(interval)
+    return tracker
+
+def replay_stream(pbp, speed=60.0, step_secs=30.0):
+    """
+    Yields a recorded play-by-play as growing frames, like successive polls of a live game
+    speed: game seconds per wall clock second (0 = no waiting)
+    step_secs: game seconds between polls
+    """
+    pbp = pbp.sort_values('actionNumber')
+    times = [game_seconds(period, clock) for period, clock in zip(pbp['period'], pbp['clock'])]
+    times = pd.Series(times, index=pbp.index).cummax()
+    poll_at = step_secs
+    end = times.iloc[-1]
+    while True:
+        if speed > 0:
+            time.sleep(step_secs / speed)
+        yield pbp[times <= poll_at]
+        if poll_at >= end:
+            return
+        poll_at += step_secs
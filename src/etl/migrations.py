@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import re
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Versioned schema migrations: the numbered scripts in sql/schema are applied in
+# order, each in its own transaction together with its row in schema_migrations,
+# so a failed migration leaves nothing behind and a database always knows which
+# version it is at.
+#   - 01_create_tables.sql is the full current schema (it drops and recreates
+#     every table), so it only ever runs on an empty database, which is then
+#     recorded at the latest version.
+#   - a database created before the runner has no history: `baseline` records
+#     the versions it already has without running them.
+# Every later script must be safe to run more than once, like 02-06 are.
+# table_report() measures row widths and table sizes, upgrade() takes one
+# before and after so a migration shows the storage and scan savings it made.
+
+SCHEMA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'sql', 'schema')
+MIGRATION_FILE = re.compile(r'^(\d+)_(\w+)\.sql$')
+BASELINE_VERSION = 1
+
+HISTORY_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations(
+        version INT PRIMARY KEY,
+        name VARCHAR(100) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        baseline BOOLEAN NOT NULL DEFAULT FALSE,
+        duration_ms INT,
+        applied_at TIMESTAMP DEFAULT NOW()
+    )
+"""
+
+# Fact and dimension tables the size report covers by default
+REPORT_TABLES = ['play_by_play', 'lineup_stints', 'lineups', 'lineup_game_stats', 'player_game_stats',
+                 'games', 'players', 'teams', 'action_types']
+
+def discover(directory=SCHEMA_DIR):
+    """
+    Returns the migration scripts of a directory in version order
+    [{'version', 'name', 'path', 'checksum'}], checksum being the sha256 of the file
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Two migrations with version {version}: {migrations[version]['name']} and {filename}")
+        path = os.path.join(directory, filename)
+        with open(path, 'rb') as f:
+            checksum = hashlib.sha256(f.read()).hexdigest()
+        migrations[version] = {'version': version, 'name': filename, 'path': path, 'checksum': checksum}
+    return [migrations[version] for version in sorted(migrations)]
+
+def applied_migrations(conn):
+    # {version: row} of schema_migrations, creating the table on first use
+    conn.execute(text(HISTORY_TABLE))
+    rows = conn.execute(text("SELECT version, name, checksum, baseline, duration_ms, applied_at FROM schema_migrations"))
+    return {row.version: row._asdict() for row in rows}
+
+def has_tables(conn):
+    # An empty database has none of the tables 01_create_tables.sql makes
+    return conn.execute(text("SELECT to_regclass('games')")).scalar() is not None
+
+def plan(engine, migrations=None, target=None):
+    """
+    Returns what upgrade() would do:
+    {'current': latest applied version or None, 'fresh': empty database,
+     'needs_baseline': tables exist but there is no history,
+     'pending': migrations to run, 'changed': applied migrations whose file changed since}
+    """
+    migrations = migrations if migrations is not None else discover()
+    with engine.begin() as conn:
+        applied = applied_migrations(conn)
+        tables = has_tables(conn)
+    if target is not None:
+        migrations = [migration for migration in migrations if migration['version'] <= target]
+    return {'current': max(applied) if applied else None,
+            'fresh': not applied and not tables,
+            'needs_baseline': not applied and tables,
+            'pending': [migration for migration in migrations if migration['version'] not in applied],
+            # 01 is edited with every migration on purpose, only the later scripts must stay as applied
+            'changed': [migration for migration in migrations if migration['version'] in applied
+                        and migration['version'] != BASELINE_VERSION
+                        and applied[migration['version']]['checksum'] != migration['checksum']]}
+
+def _record(conn, migration, baseline=False, duration_ms=None):
+    conn.execute(text("""
+        INSERT INTO schema_migrations (version, name, checksum, baseline, duration_ms)
+        VALUES (:version, :name, :checksum, :baseline, :duration_ms)
+        ON CONFLICT (version) DO NOTHING
+    """), {'version': migration['version'], 'name': migration['name'], 'checksum': migration['checksum'],
+           'baseline': baseline, 'duration_ms': duration_ms})
+
+def _apply(engine, migration, covers=()):
+    # One transaction: the script, its history row, and the rows of the versions it covers
+    with open(migration['path'], 'r', encoding='utf-8') as f:
+        sql = f.read()
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(sql))
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        applied_migrations(conn)
+        _record(conn, migration, duration_ms=duration_ms)
+        for covered in covers:
+            _record(conn, covered, baseline=True)
+    logger.info(f"Applied migration {migration['name']} in {duration_ms} ms")
+    return duration_ms
+
+def upgrade(engine, target=None, migrations=None):
+    """
+    Applies the pending migrations up to target (default all), in version order
+    An empty database gets 01_create_tables.sql and is recorded at the latest version
+    Returns [(migration, duration_ms)] of the scripts that ran
+    Raises RuntimeError, before running anything, for a database that needs a baseline
+    """
+    migrations = migrations if migrations is not None else discover()
+    state = plan(engine, migrations, target)
+    if state['needs_baseline']:
+        raise RuntimeError("Database has tables but no schema_migrations history; "
+                           "record the versions it already has with `migrate baseline VERSION` first")
+    for migration in state['changed']:
+        logger.warning(f"Migration {migration['name']} changed after it was applied")
+
+    pending = state['pending']
+    if state['fresh']:
+        # 01 is the full current schema, the later scripts are already in it
+        first = [migration for migration in pending if migration['version'] == BASELINE_VERSION]
+        if not first:
+            raise RuntimeError(f"No {BASELINE_VERSION:02d}_*.sql migration to create an empty database with")
+        return [(first[0], _apply(engine, first[0], covers=[m for m in pending if m is not first[0]]))]
+
+    applied = []
+    for migration in pending:
+        if migration['version'] == BASELINE_VERSION:
+            # Never run the drop-and-create script on a database with data in it
+            with engine.begin() as conn:
+                _record(conn, migration, baseline=True)
+            continue
+        applied.append((migration, _apply(engine, migration)))
+    return applied
+
+def baseline(engine, version, migrations=None):
+    """
+    Records every migration up to version as applied without running it
+    (a database created before the runner, by hand or by an older 01_create_tables.sql)
+    Returns the migrations recorded
+    """
+    migrations = migrations if migrations is not None else discover()
+    covered = [migration for migration in migrations if migration['version'] <= version]
+    with engine.begin() as conn:
+        applied = applied_migrations(conn)
+        for migration in covered:
+            if migration['version'] not in applied:
+                _record(conn, migration, baseline=True)
+    return [migration for migration in covered if migration['version'] not in applied]
+
+def table_report(engine, tables=None, scan=False):
+    """
+    Size and row width of each table that exists
+    {table: {'rows', 'pages', 'heap_bytes', 'index_bytes', 'total_bytes', 'bytes_per_row', 'avg_row_width', 'scan_ms'}}
+    bytes_per_row is the heap size over the rows (tuple headers, padding and free space included),
+    avg_row_width the data only (sum of the pg_stats column widths)
+    scan: also time a full sequential scan of each table (best of 3)
+    Tables are ANALYZEd first so the row counts and widths are current
+    """
+    tables = tables or REPORT_TABLES
+    report = {}
+    with engine.begin() as conn:
+        for table in tables:
+            if conn.execute(text("SELECT to_regclass(:name)"), {'name': table}).scalar() is None:
+                continue
+            conn.execute(text(f"ANALYZE {table}"))
+            row = conn.execute(text("""
+                SELECT c.reltuples::BIGINT AS rows, c.relpages AS pages,
+                       pg_relation_size(c.oid) AS heap_bytes,
+                       pg_indexes_size(c.oid) AS index_bytes,
+                       pg_total_relation_size(c.oid) AS total_bytes,
+                       (SELECT SUM(avg_width) FROM pg_stats s
+                        WHERE s.schemaname = current_schema() AND s.tablename = :name) AS avg_row_width
+                FROM pg_class c
+                WHERE c.oid = to_regclass(:name)
+            """), {'name': table}).one()._asdict()
+            row['rows'] = max(row['rows'], 0)
+            row['bytes_per_row'] = round(row['heap_bytes'] / row['rows'], 1) if row['rows'] else None
+            row['scan_ms'] = None
+            if scan:
+                timings = []
+                for _ in range(3):
+                    start = time.perf_counter()
+                    # COUNT of a whole-row expression can't be answered from an index
+                    conn.execute(text(f"SELECT COUNT(t.*) FROM {table} t")).scalar()
+                    timings.append(time.perf_counter() - start)
+                row['scan_ms'] = round(min(timings) * 1000, 1)
+            report[table] = row
+    return report
+
+def format_report(before, after=None):
+    """
+    Table of a table_report, or of the change between two (before -> after, saved %)
+    """
+    def size(value):
+        if value is None:
+            return '-'
+        for unit in ['B', 'kB', 'MB', 'GB']:
+            if abs(value) < 1024 or unit == 'GB':
+                return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+            value /= 1024
+
+    def plain(value):
+        return '-' if value is None else str(value)
+
+    def change(old, new):
+        if old in (None, 0) or new is None:
+            return '-'
+        return f"{(old - new) / old * 100:+.0f}%"
+
+    lines = []
+    if after is None:
+        lines.append(f"{'table':<20}{'rows':>12}{'row width':>11}{'bytes/row':>11}{'heap':>11}{'indexes':>11}{'total':>11}{'scan ms':>9}")
+        for table, row in before.items():
+            lines.append(f"{table:<20}{row['rows']:>12}{row['avg_row_width'] or '-':>11}{row['bytes_per_row'] or '-':>11}"
+                         f"{size(row['heap_bytes']):>11}{size(row['index_bytes']):>11}{size(row['total_bytes']):>11}"
+                         f"{row['scan_ms'] if row['scan_ms'] is not None else '-':>9}")
+        return '\n'.join(lines)
+
+    lines.append(f"{'table':<20}{'bytes/row':>18}{'saved':>7}{'total':>22}{'saved':>7}{'scan ms':>16}{'saved':>7}")
+    for table in dict.fromkeys(list(before) + list(after)):
+        old, new = before.get(table, {}), after.get(table, {})
+        lines.append(f"{table:<20}"
+                     f"{plain(old.get('bytes_per_row')) + ' -> ' + plain(new.get('bytes_per_row')):>18}"
+                     f"{change(old.get('bytes_per_row'), new.get('bytes_per_row')):>7}"
+                     f"{size(old.get('total_bytes')) + ' -> ' + size(new.get('total_bytes')):>22}"
+                     f"{change(old.get('total_bytes'), new.get('total_bytes')):>7}"
+                     f"{plain(old.get('scan_ms')) + ' -> ' + plain(new.get('scan_ms')):>16}"
+                     f"{change(old.get('scan_ms'), new.get('scan_ms')):>7}")
+    return '\n'.join(lines)
@@ -1,44 +1,74 @@
+import logging
+
 import pandas as pd
 from nba_api.stats.endpoints import playbyplayv3, leaguegamefinder, commonteamroster, boxscoretraditionalv3, commonplayerinfo
 from nba_api.stats.static import teams, players
+from src.utils.stats_api import configure_stats_api
+
+# Honour NBA_STATS_BASE_URL (replay server) for every endpoint used below
+configure_stats_api()
+
+logger = logging.getLogger(__name__)
 
 def get_season_games(season='2023-24'):
     try:
         gamefinder = leaguegamefinder.LeagueGameFinder(season_nullable=season)
         games_df = gamefinder.get_data_frames()[0]
-        print(f'Successfully got games for {season}')
+        logger.info('Got %s games for %s', games_df['GAME_ID'].nunique(), season)
         return games_df
     except Exception as e:
-        print(e)
+        logger.error('Failed to get the games for %s: %s: %s', season, type(e).__name__, e)
         return None
     
+def get_games_between(date_from, date_to):
+    """
+    Returns the finished NBA games in a date window (inclusive), one row per team per game
+    date_from / date_to: datetime.date
+    """
+    try:
+        # Without a league a date window also returns G League and WNBA games
+        gamefinder = leaguegamefinder.LeagueGameFinder(league_id_nullable='00',
+                                                       date_from_nullable=date_from.strftime('%m/%d/%Y'),
+                                                       date_to_nullable=date_to.strftime('%m/%d/%Y'))
+        games_df = gamefinder.get_data_frames()[0]
+        # Games in progress have no result yet; NBA game ids start with 00
+        games_df = games_df[games_df['WL'].notna() & (games_df['WL'] != '') &
+                            games_df['GAME_ID'].astype(str).str.startswith('00')]
+        logger.info('Got %s games from %s to %s', games_df['GAME_ID'].nunique(), date_from, date_to)
+        return games_df
+    except Exception as e:
+        logger.error('Failed to get the games from %s to %s: %s: %s', date_from, date_to, type(e).__name__, e)
+        return None
+
 def get_game_playbyplay(game_id, max_retries=3):
     import time
     for attempt in range(max_retries):
         try:
             pbpfinder = playbyplayv3.PlayByPlayV3(game_id)
             pbp_df = pbpfinder.get_data_frames()[0]
-            print(f'Successfully got pbp data for {game_id}')
+            logger.debug('Got pbp data for %s', game_id, extra={'game_id': game_id, 'rows': len(pbp_df)})
             return pbp_df
         except Exception as e:
             if attempt < max_retries - 1:
                 wait_time = 15 * (2 ** attempt)  # Exponential backoff: 15s, 30s, 60s
-                print(f'Timeout getting pbp for {game_id}, retrying in {wait_time}s... (attempt {attempt + 1}/{max_retries})')
+                logger.warning('Timeout getting pbp for %s, retrying in %ss (attempt %s/%s)', game_id, wait_time, attempt + 1, max_retries,
+                               extra={'game_id': game_id, 'stage': 'pbp_fetch', 'attempts': attempt + 1})
                 time.sleep(wait_time)
             else:
-                print(f'Failed to get pbp data for {game_id} after {max_retries} attempts: {e}')
+                logger.error('Failed to get pbp data for %s after %s attempts: %s', game_id, max_retries, e,
+                             extra={'game_id': game_id, 'stage': 'pbp_fetch', 'attempts': max_retries})
                 return None
     
 def get_teams():
     teams_list = teams.get_teams()
     teams_df = pd.DataFrame(teams_list)
-    print(f'Got all nba teams')
+    logger.info('Got %s nba teams', len(teams_df))
     return teams_df
     
 def get_active_players():
     players_list = players.get_active_players()
     players_df = pd.DataFrame(players_list)
-    print(f'Got all active players')
+    logger.info('Got %s active players', len(players_df))
     return players_df
 
 def pbp_cleaner(pbp):
@@ -53,10 +83,10 @@ def pbp_cleaner(pbp):
                               'shotValue': 'shot_value',
                               'shotResult': 'shot_result'})
 
-    # Select only columns that exist in the database schema
+    # Select only the columns the loader needs: load_playbyplay turns action_type/action_subtype
+    # into action_type_id, player_name only names stub players (the players table has the names)
     columns_to_keep = [
-        'game_id', 'action_id', 'period', 'clock',
-        'seconds_left_in_game', 'seconds_into_game',
+        'game_id', 'action_id', 'period', 'seconds_into_game',
         'player_id', 'player_name', 'team_id', 'description',
         'action_type', 'action_subtype', 'shot_value', 'shot_result'
     ]
@@ -69,7 +99,11 @@ def pbp_cleaner(pbp):
 
 def get_game_info(game_id):
     game_data = boxscoretraditionalv3.BoxScoreTraditionalV3(game_id)
-    game_data = game_data.get_data_frames()[2]
+    return build_game_info(game_id, game_data.get_data_frames())
+
+def build_game_info(game_id, boxscore_dfs):
+    # TeamStats is the third BoxScoreTraditionalV3 frame, home team first
+    game_data = boxscore_dfs[2]
     game_df = pd.DataFrame({'game_id': [game_id],
                             'home_team_id': [game_data['teamId'][0]],
                             'away_team_id': [game_data['teamId'][1]],
@@ -1,113 +1,558 @@
-from src.etl.lineup_tracker import clean_subs_pbp, clean_data, get_lineups, get_stints
-from src.etl.nba_data_extractor import get_game_playbyplay, get_season_games, pbp_cleaner, get_game_info, get_player_info, get_teams
-from src.etl.database_loader import get_loaded_games, load_playbyplay, load_lineup_stints, load_games, get_loaded_players, load_players, load_teams, get_loaded_teams
+from src.etl.lineup_tracker import clean_subs_pbp, clean_data, get_rotation, get_lineups, get_stints
+from src.etl.nba_data_extractor import get_game_playbyplay, get_season_games, get_games_between, pbp_cleaner, get_game_info, get_player_info
+from src.etl.database_loader import get_loaded_game_ids, check_game_exists, refresh_lineup_game_stats, load_playbyplay, load_lineup_stints, delete_game_facts
+from src.etl.dimension_cache import DimensionCache
+from src.utils.metrics import RunMetrics
+from src.utils.rate_limit import RateLimiter
+from src.utils.stats_api import set_request_limiter
+from src.etl.work_queue import WorkQueue, CircuitBreaker, RawCache
+from src.etl.schedule_cache import load_schedule, save_schedule, season_for_date
+from src.etl.validation import validate_game, Quarantine, PLAYER_COLUMNS
+from src.etl.fingerprints import input_hash, transform_hash, load_fingerprints, record_fingerprint, reload_reason
+from config import PROCESSED_DATA_DIR, RAW_DATA_DIR
 import pandas as pd
 from sqlalchemy import create_engine
+from datetime import date, timedelta
 import logging
 import time
 
 logger = logging.getLogger(__name__)
 
-def process_single_game(game_id, engine):
+SCHEDULE_CACHE_DIR = PROCESSED_DATA_DIR / 'schedules'
+# A cached season schedule older than this is fetched again (new games get played)
+SCHEDULE_MAX_AGE_HOURS = 12
+QUARANTINE_DIR = PROCESSED_DATA_DIR / 'quarantine'
+# API frames of every loaded game, kept so reload_games can redo a game without the API
+GAME_INPUTS_DIR = RAW_DATA_DIR / 'games'
+
+SEASON_TYPE_PREFIXES = {'preseason': '001', 'regular': '002', 'allstar': '003', 'playoffs': '004', 'playin': '005'}
+
+def process_single_game(game_id, engine, metrics=None, prefetched=None, dimensions=None, archive=None, replace=False,
+                        paced=True):
+    """
+    Extracts, transforms and loads one game
+    metrics: RunMetrics to record stage timings into (a throwaway one is used if None)
+    prefetched: {'pbp', 'rotation', 'game_info'} from GamePrefetcher; those API calls
+                (and their rate-limit sleeps) are skipped when given
+    dimensions: the run's DimensionCache (a new one, preloaded from the database, if None)
+    archive: RawCache the API frames of a loaded game are kept in (GAME_INPUTS_DIR if None)
+    A game whose stints fail validate_game is quarantined (QUARANTINE_DIR) instead of loaded
+    A loaded game's inputs and transform code are fingerprinted in game_fingerprints (see reload_games)
+    replace: the game is already loaded (reload_games); its play-by-play and stints are deleted in the
+             transaction that inserts the new ones, so a failed fetch, transform or validation leaves them as they were
+    paced: take the fixed sleeps after each API call; pass False when every request already goes
+           through a rate limiter (set_request_limiter)
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    dimensions = dimensions if dimensions is not None else DimensionCache(engine)
+    prefetched = prefetched or {}
     try:
-        logger.info(f"Processing game {game_id}")
+        logger.debug('Processing game %s', game_id, extra={'game_id': game_id})
 
-        loaded_games = get_loaded_games(engine)
-        if game_id in loaded_games:
-            logger.info(f"Game {game_id} already loaded, skipping")
-            return False
+        if not replace:
+            with metrics.stage('loaded_games_check', game_id):
+                already_loaded = check_game_exists(engine, game_id)
+            if already_loaded:
+                logger.info('Game %s already loaded, skipping', game_id, extra={'game_id': game_id})
+                return False
 
-        pbp_df = get_game_playbyplay(game_id)
-        if pbp_df is None:
-            logger.error(f"Failed to get play-by-play data for game {game_id}")
-            return False
+        if 'pbp' in prefetched:
+            pbp_df = prefetched['pbp']
+        else:
+            with metrics.stage('pbp_fetch', game_id) as stage:
+                pbp_df = get_game_playbyplay(game_id)
+                stage.record(pbp_df)
+            if pbp_df is None:
+                logger.error('Failed to get play-by-play data for game %s', game_id, extra={'game_id': game_id, 'stage': 'pbp_fetch'})
+                return False
 
-        time.sleep(1)  # Brief delay after getting play-by-play
+            if paced:
+                metrics.sleep(1, game_id)  # Brief delay after getting play-by-play
         teams = pbp_df['teamId'].unique()[1:]
-        clean_pbp = clean_data(pbp_df)
+        with metrics.stage('clean_data', game_id) as stage:
+            clean_pbp = clean_data(pbp_df)
+            stage.record(clean_pbp)
+        if 'rotation' in prefetched:
+            rotation_dfs = prefetched['rotation']
+        else:
+            with metrics.stage('rotation_fetch', game_id) as stage:
+                rotation_dfs = get_rotation(game_id)
+                stage.record(rotation_dfs)
+            if paced:
+                metrics.sleep(1, game_id)  # Brief delay after the rotation request
         all_stints = []
         for team in teams:
             try:
-                lineups = get_lineups(game_id, team)
-                time.sleep(1)  # Brief delay after each lineup request
-                stints = get_stints(clean_pbp, lineups, team)
-                stints = stints[stints['duration_secs'] != 0].copy()
+                with metrics.stage('get_stints', game_id) as stage:
+                    lineups = get_lineups(game_id, team, rotation_dfs)
+                    stints = get_stints(clean_pbp, lineups, team)
+                    stints = stints[stints['duration_secs'] != 0].copy()
+                    stage.record(stints)
                 # get seconds into the game too for pbp
                 all_stints.append(stints)
             except Exception as e:
-                logger.error(f"Failed to process lineups for team {team} in game {game_id}: {type(e).__name__}: {str(e)}")
+                logger.error('Failed to process lineups for team %s in game %s: %s: %s', team, game_id, type(e).__name__, e,
+                             extra={'game_id': game_id, 'stage': 'get_stints', 'team_id': int(team)})
                 raise
         all_stints =  pd.concat(all_stints)
 
-        clean_pbp = pbp_cleaner(clean_pbp)
-        time.sleep(1)  # Brief delay before getting game info
-        game_df = get_game_info(game_id)
+        with metrics.stage('pbp_cleaner', game_id) as stage:
+            clean_pbp = pbp_cleaner(clean_pbp)
+            stage.record(clean_pbp)
+        if 'game_info' in prefetched:
+            game_df = prefetched['game_info']
+        else:
+            if paced:
+                metrics.sleep(1, game_id)  # Brief delay before getting game info
+            with metrics.stage('game_info_fetch', game_id) as stage:
+                game_df = get_game_info(game_id)
+                stage.record(game_df)
 
-        # Load teams if not already loaded (teams don't change)
-        loaded_teams = get_loaded_teams(engine)
-        if len(loaded_teams) == 0:
-            logger.info("Loading NBA teams data...")
-            teams_df = get_teams()
-            # Rename columns to match database schema
-            teams_df = teams_df.rename(columns={'id': 'team_id', 'full_name': 'team_name', 'abbreviation': 'abbreviation'})
-            teams_df = teams_df[['team_id', 'abbreviation', 'team_name']]  # Select only needed columns
-            load_teams(engine, teams_df)
-            logger.info(f"Loaded {len(teams_df)} teams")
-
-        loaded_players = get_loaded_players(engine)
-        players = clean_pbp['player_id'].unique() #error around here
-        players = [player for player in players if pd.notna(player) and player != 0 and player not in loaded_players and not (player >= 1610612000 and player <= 1610613000)]
-        if players:
-            player_data = []
-            for player in players:
-                try:
+        # Teams, players and the game row come from the run's dimension cache, every gap
+        # is filled in memory and written in one batch before the facts
+        with metrics.stage('team_lookup', game_id):
+            dimensions.resolve_teams(pd.concat([clean_pbp['team_id'], game_df['home_team_id'], game_df['away_team_id']]))
+        with metrics.stage('player_lookup', game_id):
+            # Players on the court without a single pbp event are only in the stints
+            players = dimensions.missing_players(pd.concat([clean_pbp['player_id']] + [all_stints[column] for column in PLAYER_COLUMNS]))
+        unfetched = []
+        for player in players:
+            try:
+                with metrics.stage('player_info_fetch', game_id) as stage:
                     player_df = get_player_info(player)
-                    player_data.append(player_df)
-                    time.sleep(0.6)  # Rate limiting: ~100 requests per minute
-                except Exception as e:
-                    logger.warning(f"Skipping player {player} due to error: {type(e).__name__}: {str(e)}")
-                    continue  # Skip this player but continue with others
-            if player_data:
-                players_df = pd.concat(player_data, ignore_index=True)
-                load_players(engine, players_df)
-        load_games(engine, game_df)
-        load_playbyplay(engine, clean_pbp)
-        load_lineup_stints(engine, all_stints)
-        logger.info(f"Processing game {game_id} was a success")
+                    stage.record(player_df)
+                dimensions.add_players(player_df)
+                if paced:
+                    metrics.sleep(0.6, game_id)  # Rate limiting: ~100 requests per minute
+            except Exception as e:
+                logger.warning('Skipping player %s due to error: %s: %s', player, type(e).__name__, e,
+                               extra={'game_id': game_id, 'stage': 'player_info_fetch', 'player_id': int(player)})
+                unfetched.append(player)
+                continue  # Skip this player but continue with others
+
+        # A pbp-only player gets a stub row, but a stint player without info would fail validation
+        # as unknown_players; that is a failed request, not bad data, so the game is retried instead
+        stint_players = set(pd.to_numeric(pd.concat([all_stints[column] for column in PLAYER_COLUMNS]), errors='coerce').dropna().astype('int64').tolist())
+        unfetched = [player for player in unfetched if player in stint_players]
+        if unfetched:
+            logger.warning('Game %s has stint players whose info could not be fetched (%s), will retry on next run',
+                           game_id, unfetched, extra={'game_id': game_id, 'stage': 'player_info_fetch'})
+            return False
+
+        with metrics.stage('validate', game_id):
+            # Stint players must be real players; stubs are only added for the pbp-only ids below
+            issues = validate_game(all_stints, pbp_df, rotation_dfs, dimensions.players.keys())
+        if not issues:
+            names = dict(zip(clean_pbp['player_id'], clean_pbp['player_name']))
+            dimensions.resolve_players(clean_pbp['player_id'], names)
+            dimensions.add_game(game_df)
+        with metrics.stage('load_dimensions', game_id) as stage:
+            stage.rows += dimensions.flush()
+        if issues:
+            Quarantine(QUARANTINE_DIR).add(game_id, issues, {'pbp': pbp_df, 'rotation': rotation_dfs, 'game_info': game_df},
+                                           transform=transform_hash())
+            if replace:
+                logger.warning('Game %s no longer passes validation, keeping its loaded rows', game_id, extra={'game_id': game_id})
+            return False
+        # Both fact tables and the fingerprint in one transaction: a game is never left with play-by-play
+        # (which marks it loaded) and no stints, and a reload's delete is undone if an insert fails
+        frames = {'pbp': pbp_df, 'rotation': rotation_dfs, 'game_info': game_df}
+        with engine.begin() as conn:
+            if replace:
+                with metrics.stage('delete_game_facts', game_id):
+                    delete_game_facts(conn, game_id)
+            with metrics.stage('load_playbyplay', game_id) as stage:
+                load_playbyplay(engine, clean_pbp, conn)
+                stage.record(clean_pbp)
+            with metrics.stage('load_lineup_stints', game_id) as stage:
+                load_lineup_stints(engine, all_stints, conn)
+                stage.record(all_stints)
+            with metrics.stage('record_fingerprint', game_id):
+                record_fingerprint(engine, game_id, input_hash(frames), transform_hash(), len(all_stints), conn)
+        # The archive only saves reload_games an API call, losing it doesn't undo the load
+        with metrics.stage('archive_inputs', game_id):
+            try:
+                (archive if archive is not None else RawCache(GAME_INPUTS_DIR, compress=True)).save(game_id, frames)
+            except Exception as e:
+                logger.warning('Could not archive the inputs of game %s: %s: %s', game_id, type(e).__name__, e,
+                               extra={'game_id': game_id, 'stage': 'archive_inputs'})
+        Quarantine(QUARANTINE_DIR).release(game_id)  # a retried game that loads is no longer held back
+        logger.info('Processing game %s was a success', game_id, extra={'game_id': game_id, 'stints': len(all_stints)})
         return True # to say that everything worked
     except Exception as e:
-        logger.error(f"Failed to process game {game_id}: {type(e).__name__}: {str(e)}", exc_info=True)
+        logger.error('Failed to process game %s: %s: %s', game_id, type(e).__name__, e, exc_info=True, extra={'game_id': game_id})
         return False
 
-def process_season(season, engine, batch_size=10):
-    games = get_season_games(season)
+def fetch_game_data(game_id, metrics=None, max_retries=3):
+    """
+    Fetches the API data process_single_game needs for one game, in the shape it accepts as `prefetched`
+    Raises ValueError when the play-by-play can't be fetched
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    with metrics.stage('pbp_fetch', game_id) as stage:
+        pbp_df = get_game_playbyplay(game_id, max_retries=max_retries)
+        stage.record(pbp_df)
+    if pbp_df is None:
+        raise ValueError(f"Failed to get play-by-play data for game {game_id}")
+    metrics.sleep(1, game_id)
+    with metrics.stage('rotation_fetch', game_id) as stage:
+        rotation_dfs = get_rotation(game_id)
+        stage.record(rotation_dfs)
+    metrics.sleep(1, game_id)
+    with metrics.stage('game_info_fetch', game_id) as stage:
+        game_df = get_game_info(game_id)
+        stage.record(game_df)
+    return {'pbp': pbp_df, 'rotation': rotation_dfs, 'game_info': game_df}
+
+def reload_games(engine, game_ids, force=False, refetch=False, metrics=None, progress=None):
+    """
+    Reprocesses the loaded games whose inputs or transform code changed since they were loaded
+    Inputs come from GAME_INPUTS_DIR; games without archived inputs (loaded before the archive)
+    are fetched from the API once. A game to redo goes through process_single_game with replace=True:
+    its rows are only swapped once the new ones are built and validated, so a game that fails
+    (or now fails validation, which quarantines its inputs) keeps what was loaded
+    force: redo every game; refetch: fetch every game's inputs from the API (upstream corrections)
+    progress: optional callable(game_id, reason) after each game, reason None for a skipped game
+    Returns {'reloaded': [...], 'skipped': n, 'failed': [...], 'reasons': {'new'|'input'|'transform'|'forced': n}}
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    archive = RawCache(GAME_INPUTS_DIR, compress=True)
+    dimensions = DimensionCache(engine)
+    transform = transform_hash()
+    fingerprints = load_fingerprints(engine, game_ids)
+    result = {'reloaded': [], 'skipped': 0, 'failed': [], 'reasons': {}}
+    for game_id in game_ids:
+        frames = None if refetch else archive.load(game_id)
+        if frames is None:
+            try:
+                frames = fetch_game_data(game_id, metrics)
+                archive.save(game_id, frames)
+            except Exception as e:
+                logger.error('Failed to fetch the inputs of game %s: %s: %s', game_id, type(e).__name__, e, extra={'game_id': game_id})
+                result['failed'].append(game_id)
+                continue
+        with metrics.stage('fingerprint', game_id):
+            reason = 'forced' if force else reload_reason(fingerprints.get(int(game_id)), input_hash(frames), transform)
+        if reason is None:
+            result['skipped'] += 1
+            if progress:
+                progress(game_id, None)
+            continue
+
+        result['reasons'][reason] = result['reasons'].get(reason, 0) + 1
+        with metrics.stage('game', game_id), metrics.profile(game_id):
+            success = process_single_game(game_id, engine, metrics, frames, dimensions, archive, replace=True)
+        (result['reloaded'] if success else result['failed']).append(game_id)
+        if progress:
+            progress(game_id, reason)
+
+    # Failed games kept their rows, only the reprocessed ones have new aggregates
+    refresh_aggregates(engine, result['reloaded'], metrics)
+    report_dimensions(dimensions, metrics)
+    logger.info(f"Reload complete: {len(result['reloaded'])} reprocessed {result['reasons']}, "
+                f"{result['skipped']} unchanged, {len(result['failed'])} failed")
+    return result
+
+def held_in_quarantine(game_ids, retry_quarantined=False):
+    """
+    The games to leave out of a run: quarantined ones whose transform code hasn't changed since they
+    failed validation, since fetching them again would only quarantine them again
+    retry_quarantined: hold none back, e.g. after the API corrected a game's data
+    """
+    if retry_quarantined:
+        return set()
+    quarantine = Quarantine(QUARANTINE_DIR)
+    wanted = {str(game_id) for game_id in game_ids}
+    current = transform_hash()
+    held = set()
+    for game_id in quarantine.game_ids():
+        if game_id not in wanted:
+            continue
+        record = quarantine.get(game_id)
+        # Records written before the hash was kept are held too: nothing says the code changed
+        if record is not None and record.get('transform_hash') in (None, current):
+            held.add(game_id)
+    return held
+
+def process_season_queued(season, engine, queue_path=None, metrics=None, batch_size=10,
+                          retry_failed=False, breaker_threshold=5, breaker_cooldown=300,
+                          season_types=None, paced=True, progress=None, retry_quarantined=False):
+    """
+    Loads a season through the durable work queue: each game is a fetch task then a load task,
+    with attempt counts and backoff kept in SQLite, so an interrupted run resumes where it stopped
+    queue_path: SQLite queue file (default data/processed/etl_queue.sqlite)
+    retry_failed: give tasks that ran out of attempts on earlier runs another go
+    retry_quarantined: put the season's quarantined tasks back in the run
+    breaker_threshold / breaker_cooldown: consecutive fetch failures that pause the run, and for how long
+    season_types: only queue these game types, e.g. ['regular', 'playoffs'] (default all, see SEASON_TYPE_PREFIXES)
+    paced: take the fixed 5s/60s breaks between fetches; pass False when every request
+           already goes through a rate limiter (set_request_limiter)
+    progress: optional callable(game_id, loaded) called after each load task
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    queue = WorkQueue(queue_path or PROCESSED_DATA_DIR / 'etl_queue.sqlite')
+    cache = RawCache(PROCESSED_DATA_DIR / 'raw_cache')
+    breaker = CircuitBreaker(failure_threshold=breaker_threshold, cooldown=breaker_cooldown, queue=queue)
+    quarantine = Quarantine(QUARANTINE_DIR)
+    dimensions = DimensionCache(engine)
+    try:
+        recovered = queue.recover(season)
+        if recovered:
+            logger.info(f"Recovered {recovered} tasks interrupted by the previous run")
+        if retry_failed:
+            logger.info(f"Retrying {queue.retry_failed(season)} failed tasks")
+        if retry_quarantined:
+            logger.info(f"Retrying {queue.release_quarantined(season=season)} quarantined tasks")
+
+        games = get_schedule(season, metrics)
+        if games is None:
+            logger.error(f"Failed to get the schedule for {season}")
+            return False
+        season_games = filter_season_types(games['GAME_ID'].unique(), season_types)
+        loaded_games = set(get_loaded_game_ids(engine, season_games))
+        game_ids = [game for game in season_games if game not in loaded_games]
+        queue.mark_done(loaded_games)
+        logger.info(f"Queued {queue.enqueue(season, game_ids)} new games, queue state: {queue.counts(season)}")
+
+        fetches = 0
+        newly_loaded = []
+        while True:
+            wait = breaker.wait_time()
+            if wait > 0:
+                logger.warning(f"API circuit breaker open, pausing {wait:.0f}s before the next request")
+                with metrics.stage('breaker_pause'):
+                    time.sleep(wait)
+
+            task = queue.next_task(season)
+            if task is None:
+                retry_at = queue.next_retry_at(season)
+                if retry_at is None:
+                    break  # nothing pending, only done/failed tasks left
+                wait = max(0.0, retry_at - time.time())
+                logger.info(f"No tasks ready, next retry in {wait:.0f}s")
+                with metrics.stage('queue_wait'):
+                    time.sleep(wait)
+                continue
+
+            game_id = task['game_id']
+            queue.start(task)
+            if task['stage'] == 'fetch':
+                if paced:
+                    # After every batch_size fetches, take a longer break
+                    if fetches > 0 and fetches % batch_size == 0:
+                        logger.info(f"Fetched {fetches} games, taking a 60 second break to avoid rate limiting...")
+                        metrics.sleep(60)
+                    metrics.sleep(5, game_id)
+                fetches += 1
+                try:
+                    # One attempt per task: the queue owns retries instead of blocking on backoff here
+                    cache.save(game_id, fetch_game_data(game_id, metrics, max_retries=1))
+                except Exception as e:
+                    breaker.record_failure()
+                    delay = queue.fail(task, e)
+                    _log_task_failure(task, e, delay)
+                    continue
+                breaker.record_success()
+                queue.complete(task)
+            else:
+                # A missing cache file just means process_single_game fetches the data itself
+                started_at = time.time()
+                with metrics.stage('game', game_id), metrics.profile(game_id):
+                    success = process_single_game(game_id, engine, metrics, cache.load(game_id), dimensions, paced=paced)
+                loaded = success or check_game_exists(engine, game_id)
+                quarantined = not loaded and quarantine.get(game_id)
+                if loaded:
+                    queue.complete(task)
+                    cache.discard(game_id)
+                    newly_loaded.append(game_id)
+                elif quarantined and quarantined['quarantined_at'] >= started_at:
+                    # Validation failures are deterministic, retrying would only quarantine it again
+                    queue.quarantine(task, '; '.join(quarantined['issues']))
+                    cache.discard(game_id)
+                else:
+                    error = 'process_single_game failed, see log'
+                    _log_task_failure(task, error, queue.fail(task, error))
+                if progress:
+                    progress(game_id, loaded)
+
+        refresh_aggregates(engine, newly_loaded, metrics)
+        report_dimensions(dimensions, metrics)
+        counts = queue.counts(season)
+        logger.info(f"Season queue drained: {counts}")
+        failed = sum(stage_counts.get('failed', 0) for stage_counts in counts.values())
+        if failed:
+            logger.warning(f"{failed} tasks are out of attempts, rerun with --retry-failed to try them again")
+        return True
+    finally:
+        queue.close()
+
+def filter_season_types(game_ids, season_types=None):
+    """
+    Keeps the game ids of the given season types ('preseason', 'regular', 'allstar', 'playoffs', 'playin')
+    The type is the 3 digit prefix of the game id, e.g. 0022400001 is a regular season game
+    """
+    if not season_types:
+        return list(game_ids)
+    prefixes = tuple(SEASON_TYPE_PREFIXES[season_type] for season_type in season_types)
+    return [game_id for game_id in game_ids if str(game_id).startswith(prefixes)]
+
+def _log_task_failure(task, error, delay):
+    if delay is None:
+        logger.error('Game %s %s failed after %s attempts, giving up: %s', task['game_id'], task['stage'], task['attempts'], error,
+                     extra={'game_id': task['game_id'], 'stage': task['stage'], 'attempts': task['attempts']})
+    else:
+        logger.warning('Game %s %s failed (attempt %s), retrying in %ss: %s', task['game_id'], task['stage'], task['attempts'], delay, error,
+                       extra={'game_id': task['game_id'], 'stage': task['stage'], 'attempts': task['attempts']})
+
+def process_season(season, engine, batch_size=10, metrics=None, prefetch=0, concurrency=4, requests_per_minute=20,
+                   retry_quarantined=False):
+    """
+    Loads every game of a season that isn't in the database yet
+    prefetch: number of games to fetch ahead on the async client while the current one
+              is transformed/loaded (0 = fetch each game synchronously with fixed sleeps)
+    concurrency / requests_per_minute: in-flight request and rate budget for the async client; the
+              blocking requests of the run (player info, fallback fetches) draw on the same budget
+    retry_quarantined: also refetch games held in quarantine (see held_in_quarantine)
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    games = get_schedule(season, metrics)
+    if games is None:
+        logger.error(f"Failed to get the schedule for {season}")
+        return False
     game_ids = games['GAME_ID'].unique()
 
-    loaded_games = get_loaded_games(engine)
-    unprocessed_games = [game for game in game_ids if game not in loaded_games]
+    loaded_games = set(get_loaded_game_ids(engine, game_ids))
+    held = held_in_quarantine(game_ids, retry_quarantined)
+    unprocessed_games = [game for game in game_ids if game not in loaded_games and game not in held]
+
+    logger.info(f"Found {len(unprocessed_games)} unprocessed games" +
+                (f", skipping {len(held)} quarantined (--retry-quarantined to refetch them)" if held else ''))
 
-    logger.info(f"Found {len(unprocessed_games)} unprocessed games")
+    if prefetch > 0:
+        # Rate limiting is done by the client's RateLimiter instead of fixed sleeps; the blocking
+        # nba_api requests take their tokens from the same bucket, so the total rate stays in budget
+        from src.etl.async_fetcher import GamePrefetcher
+        limiter = RateLimiter(requests_per_minute=requests_per_minute)
+        set_request_limiter(limiter)
+        game_iter = GamePrefetcher(unprocessed_games, depth=prefetch, concurrency=concurrency, limiter=limiter, metrics=metrics)
+        logger.info(f"Prefetching {prefetch} games ahead ({concurrency} concurrent requests, {requests_per_minute} requests/min)")
+    else:
+        game_iter = ((game_id, None, None) for game_id in unprocessed_games)
 
     games_processed = 0
-    for i, game_id in enumerate(unprocessed_games):
-        # After every batch_size games, take a longer break
-        if i > 0 and i % batch_size == 0:
-            logger.info(f"Processed {i} games, taking a 60 second break to avoid rate limiting...")
-            time.sleep(60)
-
-        time.sleep(5)  # Increased delay between games to avoid rate limiting
-        try:
-            success = process_single_game(game_id, engine)
-            if success:
-                games_processed += 1
-                logger.info(f"Progress: {games_processed}/{len(unprocessed_games)} games completed")
-            else:
-                logger.warning(f"Failed to process game {game_id}, will retry on next run")
-                # Continue to next game instead of stopping entire season
-                continue
-        except Exception as e:
-            logger.error(f"Unexpected error processing game {game_id}: {e}")
-            continue  # Continue with other games
+    newly_loaded = []
+    dimensions = DimensionCache(engine)
+    try:
+        for i, (game_id, prefetched, fetch_error) in enumerate(game_iter):
+            if prefetch == 0:
+                # After every batch_size games, take a longer break
+                if i > 0 and i % batch_size == 0:
+                    logger.info(f"Processed {i} games, taking a 60 second break to avoid rate limiting...")
+                    metrics.sleep(60)
 
+                metrics.sleep(5, game_id)  # Increased delay between games to avoid rate limiting
+            elif fetch_error is not None:
+                logger.warning('Prefetch failed for game %s (%s: %s), fetching it directly', game_id, type(fetch_error).__name__, fetch_error,
+                               extra={'game_id': game_id, 'stage': 'prefetch'})
+            try:
+                with metrics.stage('game', game_id), metrics.profile(game_id):
+                    success = process_single_game(game_id, engine, metrics, prefetched, dimensions, paced=prefetch == 0)
+                if success:
+                    games_processed += 1
+                    newly_loaded.append(game_id)
+                    logger.info('Progress: %s/%s games completed', games_processed, len(unprocessed_games), extra={'game_id': game_id})
+                else:
+                    logger.warning('Failed to process game %s, will retry on next run', game_id, extra={'game_id': game_id})
+                    # Continue to next game instead of stopping entire season
+                    continue
+            except Exception as e:
+                logger.error('Unexpected error processing game %s: %s', game_id, e, extra={'game_id': game_id})
+                continue  # Continue with other games
+    finally:
+        if prefetch > 0:
+            set_request_limiter(None)
+
+    refresh_aggregates(engine, newly_loaded, metrics)
+    report_dimensions(dimensions, metrics)
     logger.info(f"Season processing complete: {games_processed}/{len(unprocessed_games)} games loaded successfully")
-    return True
\ No newline at end of file
+    return True
+
+def process_daily(engine, since=None, until=None, metrics=None, retry_quarantined=False):
+    """
+    Incremental mode: loads only the finished games in a date window that aren't in the database yet
+    since / until: datetime.date, inclusive (default: yesterday through today)
+    retry_quarantined: also refetch games held in quarantine (see held_in_quarantine)
+    Only the window is requested from the API; it is merged into the cached season schedule
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    until = until or date.today()
+    since = since or until - timedelta(days=1)
+    with metrics.stage('schedule_fetch') as stage:
+        games = get_games_between(since, until)
+        stage.record(games)
+    if games is None:
+        logger.error(f"Failed to get games from {since} to {until}")
+        return False
+    if len(games) > 0:
+        save_schedule(SCHEDULE_CACHE_DIR, season_for_date(until), games, full_season=False)
+
+    # LeagueGameFinder returns one row per team per game
+    game_ids = games['GAME_ID'].unique()
+    loaded_games = set(get_loaded_game_ids(engine, game_ids))
+    held = held_in_quarantine(game_ids, retry_quarantined)
+    new_games = [game for game in sorted(game_ids) if game not in loaded_games and game not in held]
+    logger.info(f"{len(game_ids)} finished games from {since} to {until}, {len(new_games)} not loaded yet" +
+                (f", skipping {len(held)} quarantined (--retry-quarantined to refetch them)" if held else ''))
+
+    newly_loaded = []
+    dimensions = DimensionCache(engine)
+    for game_id in new_games:
+        metrics.sleep(5, game_id)  # Same delay between games as process_season
+        with metrics.stage('game', game_id), metrics.profile(game_id):
+            success = process_single_game(game_id, engine, metrics, dimensions=dimensions)
+        if success:
+            newly_loaded.append(game_id)
+        else:
+            logger.warning('Failed to process game %s, will retry on next run', game_id, extra={'game_id': game_id})
+
+    refresh_aggregates(engine, newly_loaded, metrics)
+    report_dimensions(dimensions, metrics)
+    logger.info(f"Incremental run complete: {len(newly_loaded)}/{len(new_games)} games loaded")
+    return len(newly_loaded) == len(new_games)
+
+def get_schedule(season, metrics=None, max_age_hours=SCHEDULE_MAX_AGE_HOURS):
+    """
+    Returns the season schedule from the local cache, fetching it from the API when the cache is stale
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    games = load_schedule(SCHEDULE_CACHE_DIR, season, max_age_hours=max_age_hours)
+    if games is not None:
+        logger.info(f"Using cached schedule for {season} ({games['GAME_ID'].nunique()} games)")
+        return games
+    with metrics.stage('schedule_fetch') as stage:
+        games = get_season_games(season)
+        stage.record(games)
+    if games is not None:
+        save_schedule(SCHEDULE_CACHE_DIR, season, games)
+    return games
+
+def refresh_aggregates(engine, game_ids, metrics=None):
+    # The games are already loaded at this point, so a failure here only leaves the aggregates stale
+    if not game_ids:
+        return
+    metrics = metrics if metrics is not None else RunMetrics()
+    try:
+        with metrics.stage('refresh_aggregates') as stage:
+            rows = refresh_lineup_game_stats(engine, game_ids)
+            stage.rows += rows
+        logger.info(f"Refreshed lineup_game_stats and player_game_stats for {len(game_ids)} games ({rows} lineup rows)")
+    except Exception as e:
+        logger.error(f"Failed to refresh the per game aggregates, run sql/schema/03_lineup_game_stats.sql and "
+                     f"05_summary_tables.sql: {type(e).__name__}: {e}")
+
+def report_dimensions(dimensions, metrics):
+    # Hit/miss counters end up as gauges in the run report and the Prometheus textfile
+    if dimensions.teams is None:
+        return
+    metrics.set_gauges('dimension_cache', dimensions.counters())
+    logger.info(f"Dimension cache: {dimensions.stats}")
@@ -0,0 +1,66 @@
+import json
+import os
+import time
+from datetime import date
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Local copy of each season's LeagueGameFinder schedule (one row per team per game)
+# in <directory>/<season>.csv, with <season>.json recording when the full season
+# was last fetched. Daily runs merge their date window into it, so the season
+# schedule only has to be requested from the API when the cache is stale.
+
+def season_for_date(day):
+    """
+    Returns the season a date falls in, e.g. 2025-01-15 -> '2024-25'
+    Seasons are counted from August, so the summer belongs to the next season
+    """
+    start_year = day.year if day.month >= 8 else day.year - 1
+    return f'{start_year}-{(start_year + 1) % 100:02d}'
+
+def _paths(directory, season):
+    base = os.path.join(str(directory), season)
+    return base + '.csv', base + '.json'
+
+def load_schedule(directory, season, max_age_hours=None):
+    """
+    Returns the cached schedule for a season, or None if there is none
+    max_age_hours: also return None when the last full fetch is older than this
+    """
+    csv_path, meta_path = _paths(directory, season)
+    if not os.path.exists(csv_path):
+        return None
+    if max_age_hours is not None:
+        fetched_at = 0
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                fetched_at = json.load(f).get('fetched_at', 0)
+        if time.time() - fetched_at > max_age_hours * 3600:
+            return None
+    return pd.read_csv(csv_path, dtype={'GAME_ID': str})
+
+def save_schedule(directory, season, games_df, full_season=True):
+    """
+    Writes a season schedule to the cache
+    full_season: games_df is the whole season (resets the cache age); otherwise it is
+                 a date window that is merged into whatever is cached
+    """
+    csv_path, meta_path = _paths(directory, season)
+    os.makedirs(str(directory), exist_ok=True)
+    if not full_season:
+        cached = load_schedule(directory, season)
+        if cached is not None:
+            games_df = pd.concat([cached, games_df], ignore_index=True)
+            games_df = games_df.drop_duplicates(subset=['GAME_ID', 'TEAM_ID'], keep='last')
+    games_df = games_df.sort_values(['GAME_DATE', 'GAME_ID'])
+
+    tmp_path = csv_path + '.tmp'
+    games_df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+    if full_season:
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': time.time(), 'fetched_on': date.today().isoformat()}, f)
+    return games_df
@@ -0,0 +1,255 @@
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Compact on-disk copy of lineup_stints + per-stint stats for notebooks and models.
+# A store is a directory of plain .npy files (NumPy structured arrays), opened
+# with mmap so nothing is read until it is used:
+#   stints.npy   one row per stint, fixed width ints (STINT_DTYPE)
+#   lineups.npy  lineup id dictionary: lineup_id -> 5 player ids, sorted by lineup_id
+#   meta.json    format version, row counts, seasons, when it was exported
+# Those files live in a versioned subdirectory named by the CURRENT pointer file.
+# A write goes to a new version and then replaces CURRENT (os.replace, atomic on
+# POSIX and Windows), so a reader opens either the old store or the new one,
+# never a half-written or missing one; older versions are removed after the swap.
+# A reader that resolved CURRENT just before a swap can find its version removed
+# while it opens the files, so readers go through open_version, which retries on
+# the version CURRENT names then.
+
+STORE_VERSION = 1
+POINTER_FILE = 'CURRENT'
+
+STINT_DTYPE = np.dtype([('stint_id', '<i4'),
+                        ('game_id', '<i4'),
+                        ('team_id', '<i4'),
+                        ('lineup_id', '<i4'),
+                        ('start_num', '<i4'),
+                        ('end_num', '<i4'),
+                        ('duration_secs', '<i2'),
+                        ('points_scored', '<i2'),
+                        ('points_allowed', '<i2'),
+                        ('possessions', '<i2')])
+
+LINEUP_DTYPE = np.dtype([('lineup_id', '<i4'),
+                         ('players', '<i4', (5,))])
+
+# Stints without any play-by-play event are not in lineup_stint_stats, hence the LEFT JOIN
+EXPORT_QUERY = """
+    SELECT ls.stint_id, ls.game_id, ls.team_id, ls.lineup_id, ls.start_num, ls.end_num, ls.duration_secs,
+           COALESCE(lss.points_scored, 0) AS points_scored,
+           COALESCE(lss.points_allowed, 0) AS points_allowed,
+           COALESCE(lss.possessions, 0) AS possessions
+    FROM lineup_stints ls
+    LEFT JOIN lineup_stint_stats lss ON lss.stint_id = ls.stint_id
+    {where}
+    ORDER BY ls.game_id, ls.stint_id
+"""
+
+def season_code(season):
+    # Game ids carry the season's start year: 0022400001 -> 24 for 2024-25
+    return int(season[:4]) % 100
+
+def frame_to_records(df, dtype):
+    """
+    Packs the dtype's columns of a dataframe into a structured array (NULLs become 0)
+    """
+    records = np.zeros(len(df), dtype=dtype)
+    for name in dtype.names:
+        if dtype[name].shape:
+            continue
+        records[name] = pd.to_numeric(df[name], errors='coerce').fillna(0).to_numpy()
+    return records
+
+def current_version(directory):
+    """
+    The directory holding a store's files: the version CURRENT names, or directory itself
+    for a store written before versions were kept
+    """
+    directory = str(directory)
+    pointer = os.path.join(directory, POINTER_FILE)
+    if not os.path.exists(pointer):
+        return directory
+    with open(pointer, 'r', encoding='utf-8') as f:
+        return os.path.join(directory, f.read().strip())
+
+def open_version(directory, load, attempts=3):
+    """
+    Returns load(version_dir) for the current version of a store, calling it again on the
+    new version if a writer swapped one in and removed the old one while load was reading
+    """
+    for attempt in range(attempts):
+        version_dir = current_version(directory)
+        try:
+            return load(version_dir)
+        except FileNotFoundError:
+            if attempt == attempts - 1 or current_version(directory) == version_dir:
+                raise
+
+@contextmanager
+def new_version(directory):
+    """
+    Yields an empty version directory to write a store into; when the block finishes it
+    becomes CURRENT and the older versions are removed. If the block raises, the new
+    version is removed and the store stays as it was
+    """
+    directory = str(directory)
+    os.makedirs(directory, exist_ok=True)
+    version = f'v{time.time_ns()}_{os.getpid()}'
+    version_dir = os.path.join(directory, version)
+    os.makedirs(version_dir)
+    try:
+        yield version_dir
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(directory, POINTER_FILE)
+    tmp_pointer = f'{pointer}.{os.getpid()}.tmp'
+    with open(tmp_pointer, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_pointer, pointer)
+
+    # Older versions and the files of an unversioned store; newer versions and pointers
+    # still being written belong to another writer
+    for name in os.listdir(directory):
+        if name == POINTER_FILE or name.endswith('.tmp') or (name.startswith('v') and name >= version):
+            continue
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # still open by a reader on Windows, the next write retries
+
+def write_stint_store(directory, stints, lineups, seasons=None):
+    """
+    Writes a store from structured arrays (or dataframes with the STINT_DTYPE columns /
+    lineup_id + player1_id..player5_id). The store is swapped in atomically (new_version)
+    Returns the directory
+    """
+    if isinstance(stints, pd.DataFrame):
+        stints = frame_to_records(stints, STINT_DTYPE)
+    if isinstance(lineups, pd.DataFrame):
+        records = np.zeros(len(lineups), dtype=LINEUP_DTYPE)
+        records['lineup_id'] = lineups['lineup_id'].to_numpy()
+        records['players'] = lineups[[f'player{i}_id' for i in range(1, 6)]].to_numpy()
+        lineups = records
+    lineups = np.sort(lineups, order='lineup_id')
+
+    directory = str(directory)
+    meta = {'version': STORE_VERSION,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'stints': int(len(stints)),
+            'lineups': int(len(lineups)),
+            'games': int(len(np.unique(stints['game_id']))),
+            'seasons': seasons}
+    with new_version(directory) as version_dir:
+        np.save(os.path.join(version_dir, 'stints.npy'), stints)
+        np.save(os.path.join(version_dir, 'lineups.npy'), lineups)
+        with open(os.path.join(version_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    logger.info(f"Wrote stint store {directory}: {meta['stints']} stints, {meta['lineups']} lineups, {meta['games']} games")
+    return directory
+
+def export_stint_store(engine, directory, seasons=None, chunksize=100000):
+    """
+    Exports lineup_stints with per-stint points/possessions and the lineups table to a store
+    seasons: e.g. ['2023-24', '2024-25'] (default everything)
+    Rows are streamed from a server-side cursor and packed chunk by chunk, so the
+    export never holds more than one chunk as a dataframe
+    """
+    where = ''
+    params = {}
+    if seasons:
+        where = 'WHERE (ls.game_id / 100000) % 100 = ANY(:codes)'
+        params['codes'] = [season_code(season) for season in seasons]
+
+    start = time.perf_counter()
+    chunks = []
+    with engine.connect().execution_options(stream_results=True) as conn:
+        for chunk in pd.read_sql(text(EXPORT_QUERY.format(where=where)), conn, params=params, chunksize=chunksize):
+            chunks.append(frame_to_records(chunk, STINT_DTYPE))
+        stints = np.concatenate(chunks) if chunks else np.zeros(0, dtype=STINT_DTYPE)
+
+        # Only the lineups the exported stints use
+        lineups_df = pd.read_sql(text("""
+            SELECT lineup_id, player1_id, player2_id, player3_id, player4_id, player5_id
+            FROM lineups
+            WHERE lineup_id = ANY(:lineup_ids)
+        """), conn, params={'lineup_ids': np.unique(stints['lineup_id']).tolist()})
+
+    write_stint_store(directory, stints, lineups_df, seasons)
+    logger.info(f"Exported {len(stints)} stints in {time.perf_counter() - start:.1f}s")
+    return directory
+
+class StintStore:
+    """
+    Read-only view of a store. stints and lineups are memory-mapped structured arrays:
+    column access (store.stints['duration_secs']) reads only that column's pages
+    """
+    def __init__(self, directory):
+        open_version(directory, self._open)
+
+    def _open(self, version_dir):
+        self.directory = version_dir
+        with open(os.path.join(self.directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported stint store version {self.meta.get('version')} in {self.directory}")
+        self.stints = np.load(os.path.join(self.directory, 'stints.npy'), mmap_mode='r')
+        self.lineups = np.load(os.path.join(self.directory, 'lineups.npy'), mmap_mode='r')
+
+    def __len__(self):
+        return len(self.stints)
+
+    def players(self, lineup_ids):
+        """
+        Returns an (n, 5) int32 array of player ids for an array of lineup ids
+        (all 0 for a lineup id the store doesn't have)
+        """
+        lineup_ids = np.asarray(lineup_ids)
+        column = self.lineups['lineup_id']
+        players = np.zeros((len(lineup_ids), 5), dtype=np.int32)
+        if not len(column):
+            return players
+        index = np.minimum(np.searchsorted(column, lineup_ids), len(column) - 1)
+        found = column[index] == lineup_ids
+        players[found] = self.lineups['players'][index[found]]
+        return players
+
+    def games(self, game_ids):
+        """
+        Returns the stints of the given games (stints are stored sorted by game_id)
+        """
+        game_ids = np.asarray(game_ids)
+        column = self.stints['game_id']
+        starts = np.searchsorted(column, game_ids, side='left')
+        ends = np.searchsorted(column, game_ids, side='right')
+        # self.stints[:0] keeps the dtype when there are no games (or no stints)
+        return np.concatenate([self.stints[:0]] + [self.stints[start:end] for start, end in zip(starts, ends)])
+
+    def to_frame(self, with_players=False):
+        """
+        Copies the stints into a dataframe (optionally with player1_id..player5_id)
+        """
+        df = pd.DataFrame(np.asarray(self.stints))
+        if with_players:
+            players = self.players(df['lineup_id'].to_numpy())
+            for i in range(5):
+                df[f'player{i + 1}_id'] = players[:, i]
+        return df
+
+def open_stint_store(directory):
+    return StintStore(directory)
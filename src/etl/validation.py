@@ -0,0 +1,158 @@
+import json
+import os
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Pre-load data-quality checks for one game's stints. Problems such as the
+# cross-team duplicate lineup (docs/DUPLICATE_LINEUP_BUG_FIX.md) or stints with
+# players missing from the players table used to be found only after loading,
+# with whole-table SQL. validate_game runs the checks on the in-memory frames
+# (vectorized, ~3 ms per game) and a game that fails is quarantined instead of loaded.
+
+PLAYER_COLUMNS = ['player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']
+REGULATION_SECS = 2880
+OVERTIME_SECS = 300
+# Rotation times are in tenths of a second, allow for rounding when summing stints
+DURATION_TOLERANCE_SECS = 1.0
+
+def game_length(pbp):
+    """
+    Returns the length of a game in seconds from the periods in its play-by-play (overtimes included)
+    """
+    periods = int(pd.to_numeric(pbp['period']).max())
+    return REGULATION_SECS + max(0, periods - 4) * OVERTIME_SECS
+
+def team_pairs(pbp, rotation_dfs=None):
+    """
+    Returns the (player_id, team_id) pairs seen in a game, encoded as int64 keys
+    Players come from the play-by-play events and, when given, the rotation frames
+    (players who were on the court but never had an event only show up there)
+    """
+    player_ids = [_int_array(pbp['personId'])]
+    team_ids = [_int_array(pbp['teamId'])]
+    for rotation in rotation_dfs or []:
+        player_ids.append(_int_array(rotation['PERSON_ID']))
+        team_ids.append(_int_array(rotation['TEAM_ID']))
+    player_ids = np.concatenate(player_ids)
+    team_ids = np.concatenate(team_ids)
+    keep = (player_ids != 0) & (team_ids != 0)
+    return np.unique(_pair_keys(player_ids[keep], team_ids[keep]))
+
+def _int_array(column):
+    # Plain int64 array of an id column (NULLs become 0)
+    return pd.to_numeric(column, errors='coerce').fillna(0).to_numpy(np.int64)
+
+def _pair_keys(player_ids, team_ids):
+    # Player ids are < 10^9 and team ids < 10^10, so the key fits an int64 without collisions
+    return player_ids * 10**10 + team_ids
+
+def validate_game(stints, pbp, rotation_dfs=None, known_player_ids=None):
+    """
+    Checks one game's stints before they are loaded
+    stints: get_stints output for both teams (zero-length stints already dropped)
+    pbp: the raw play-by-play (personId / teamId / period)
+    rotation_dfs: GameRotation frames, used with the play-by-play to tell which team a player is on
+    known_player_ids: player ids in (or about to be loaded into) the players table; skipped if None
+    Returns a list of problems, empty when the game is fine
+    """
+    issues = []
+    if len(stints) == 0:
+        return ['no_stints: the game has no stints']
+
+    players = np.column_stack([_int_array(stints[column]) for column in PLAYER_COLUMNS])
+    team_ids = _int_array(stints['team_id'])
+
+    # Exactly 5 distinct players per lineup
+    ordered = np.sort(players, axis=1)
+    bad = (ordered[:, 0] <= 0) | (np.diff(ordered, axis=1) == 0).any(axis=1)
+    if bad.any():
+        issues.append(f"lineup_size: {int(bad.sum())} stints do not have 5 distinct players "
+                      f"(first at {stints['start_secs'].iloc[np.argmax(bad)]}s)")
+
+    # Every player on the court for the team the stint belongs to
+    pairs = team_pairs(pbp, rotation_dfs)
+    wrong_team = ~np.isin(_pair_keys(players, team_ids[:, None]), pairs)
+    if wrong_team.any():
+        stray = np.unique(players[wrong_team])
+        issues.append(f"wrong_team: {int(wrong_team.any(axis=1).sum())} stints have players not on their team "
+                      f"({stray[:5].tolist()})")
+
+    # Known players (a missing player breaks the lineups -> players joins in the views)
+    if known_player_ids is not None:
+        if not isinstance(known_player_ids, np.ndarray):
+            known_player_ids = np.fromiter(known_player_ids, dtype=np.int64)
+        unknown = ~np.isin(players, known_player_ids)
+        if unknown.any():
+            issues.append(f"unknown_players: {np.unique(players[unknown]).tolist()} are not in the players table")
+
+    # Stints are emitted in time order per team: each must start where the previous one ended or later
+    start_secs = pd.to_numeric(stints['start_secs']).to_numpy(np.float64)
+    end_secs = pd.to_numeric(stints['end_secs']).to_numpy(np.float64)
+    reversed_stints = start_secs > end_secs
+    if reversed_stints.any():
+        issues.append(f"stint_order: {int(reversed_stints.sum())} stints end before they start")
+    same_team = team_ids[1:] == team_ids[:-1]
+    overlapping = same_team & (start_secs[1:] < end_secs[:-1])
+    if overlapping.any():
+        issues.append(f"overlap: {int(overlapping.sum())} stints start before the previous stint of their team ended")
+
+    # Each team's stints cover the whole game
+    expected = game_length(pbp)
+    teams, team_index = np.unique(team_ids, return_inverse=True)
+    durations = np.bincount(team_index, weights=pd.to_numeric(stints['duration_secs']).to_numpy(np.float64))
+    for team_id, total in zip(teams.tolist(), durations.tolist()):
+        if abs(total - expected) > DURATION_TOLERANCE_SECS:
+            issues.append(f"duration: team {team_id} stints add up to {total:.1f}s, the game lasted {expected}s")
+    if len(durations) != 2:
+        issues.append(f"teams: stints cover {len(durations)} teams instead of 2")
+    return issues
+
+class Quarantine:
+    """
+    Games that failed validation: <game_id>.json holds the problems, <game_id>.pkl
+    the API frames ({'pbp', 'rotation', 'game_info'}) so the game can be inspected or
+    reprocessed without hitting the API. Deleting both files releases the game.
+    The record keeps the transform_hash it failed under, so a code fix can be told apart
+    from a game that would only fail again
+    """
+    def __init__(self, directory):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, game_id, extension):
+        return os.path.join(self.directory, f'{game_id}.{extension}')
+
+    def add(self, game_id, issues, frames=None, transform=None):
+        record = {'game_id': str(game_id), 'issues': issues, 'quarantined_at': time.time(), 'transform_hash': transform}
+        with open(self._path(game_id, 'json'), 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+        if frames is not None:
+            pd.to_pickle(frames, self._path(game_id, 'pkl'))
+        logger.warning(f"Quarantined game {game_id}: {'; '.join(issues)}")
+
+    def contains(self, game_id):
+        return os.path.exists(self._path(game_id, 'json'))
+
+    def get(self, game_id):
+        if not self.contains(game_id):
+            return None
+        with open(self._path(game_id, 'json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def load_frames(self, game_id):
+        path = self._path(game_id, 'pkl')
+        return pd.read_pickle(path) if os.path.exists(path) else None
+
+    def release(self, game_id):
+        for extension in ['json', 'pkl']:
+            path = self._path(game_id, extension)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def game_ids(self):
+        return sorted(name[:-5] for name in os.listdir(self.directory) if name.endswith('.json'))
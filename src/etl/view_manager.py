@@ -0,0 +1,367 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Deploys the view definitions in sql/views/*.sql without taking the dashboards
+# down for the whole rebuild:
+#   1. parse the CREATE [MATERIALIZED] VIEW statements and the views each one reads from
+#   2. build the new versions side by side in STAGING_SCHEMA, one dependency level
+#      at a time, independent views (and materializations) of a level in parallel
+#   3. probe the staging versions cheaply (one game's rows + checksum, or just the plan)
+#      next to the live ones, over the columns both have: a staging view that fails,
+#      returns no rows for the probe game, or returns other rows than the live view
+#      is not swapped in (allow_changes lets intended data changes through)
+#   4. swap: drop the live versions and move the staging ones into public in one
+#      short transaction, so readers see either the old set or the new set
+# plan_deployment() does steps 1 and the lookups only, for --dry-run.
+
+STAGING_SCHEMA = 'views_staging'
+TARGET_SCHEMA = 'public'
+
+CREATE_VIEW = re.compile(r'^CREATE\s+(?:OR\s+REPLACE\s+)?(MATERIALIZED\s+)?VIEW\s+(?:IF\s+NOT\s+EXISTS\s+)?([\w.]+)', re.IGNORECASE)
+CREATE_INDEX = re.compile(r'^CREATE\s+(?:UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+ON\s+(?:ONLY\s+)?([\w.]+)', re.IGNORECASE)
+DROP_VIEW = re.compile(r'^DROP\s+(?:MATERIALIZED\s+)?VIEW', re.IGNORECASE)
+
+def split_statements(sql):
+    """
+    Splits a SQL script into statements, dropping -- comments
+    Semicolons inside single quoted strings don't end a statement
+    """
+    statements = []
+    current = []
+    in_string = False
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if in_string:
+            current.append(char)
+            if char == "'":
+                in_string = False
+        elif char == "'":
+            in_string = True
+            current.append(char)
+        elif sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif char == ';':
+            statements.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statements.append(''.join(current).strip())
+    return [statement for statement in statements if statement]
+
+def parse_views(sql):
+    """
+    Returns (views, indexes, other statements) from a view script
+    views: list of {'name', 'materialized', 'sql', 'deps'} in file order, deps being the
+           other views of the script it reads from
+    DROP VIEW statements are left out, the deployment handles the drops itself
+    """
+    views = []
+    indexes = []
+    other = []
+    for statement in split_statements(sql):
+        match = CREATE_VIEW.match(statement)
+        if match:
+            views.append({'name': match.group(2).split('.')[-1].lower(),
+                          'materialized': bool(match.group(1)),
+                          'sql': statement})
+        elif CREATE_INDEX.match(statement):
+            indexes.append({'table': CREATE_INDEX.match(statement).group(1).split('.')[-1].lower(), 'sql': statement})
+        elif not DROP_VIEW.match(statement):
+            other.append(statement)
+
+    names = [view['name'] for view in views]
+    for view in views:
+        body = view['sql'][CREATE_VIEW.match(view['sql']).end():]
+        view['deps'] = [name for name in names if name != view['name'] and re.search(rf'\b{name}\b', body, re.IGNORECASE)]
+    return views, indexes, other
+
+def dependency_levels(views):
+    """
+    Groups views into levels: every view only depends on views of earlier levels,
+    so the views of one level can be built concurrently
+    Raises ValueError on a dependency cycle
+    """
+    remaining = {view['name']: set(view['deps']) for view in views}
+    by_name = {view['name']: view for view in views}
+    levels = []
+    done = set()
+    while remaining:
+        ready = [name for name, deps in remaining.items() if deps <= done]
+        if not ready:
+            raise ValueError(f"Dependency cycle between views: {sorted(remaining)}")
+        levels.append([by_name[name] for name in ready])
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return levels
+
+def existing_relations(conn, schema=TARGET_SCHEMA):
+    """
+    Returns {name: 'view' | 'materialized'} for the views in a schema
+    """
+    rows = conn.execute(text("""
+        SELECT c.relname, c.relkind
+        FROM pg_class c
+        INNER JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema AND c.relkind IN ('v', 'm')
+    """), {'schema': schema})
+    return {row[0]: 'materialized' if row[1] == 'm' else 'view' for row in rows}
+
+def external_dependents(conn, names, schema=TARGET_SCHEMA):
+    """
+    Returns views outside `names` that read from any of them (the swap would have to drop those)
+    """
+    rows = conn.execute(text("""
+        SELECT DISTINCT dependent.relname, source.relname
+        FROM pg_depend d
+        INNER JOIN pg_rewrite r ON r.oid = d.objid
+        INNER JOIN pg_class dependent ON dependent.oid = r.ev_class
+        INNER JOIN pg_class source ON source.oid = d.refobjid
+        INNER JOIN pg_namespace n ON n.oid = source.relnamespace
+        WHERE n.nspname = :schema AND source.relname = ANY(:names)
+            AND dependent.oid != source.oid
+    """), {'schema': schema, 'names': list(names)})
+    return sorted({(row[0], row[1]) for row in rows if row[0] not in names})
+
+def plan_deployment(sql, engine=None):
+    """
+    Returns the deployment plan for a view script without changing anything
+    With an engine, also looks up which views exist and what else depends on them
+    """
+    views, indexes, other = parse_views(sql)
+    levels = dependency_levels(views)
+    plan = {'levels': levels, 'indexes': indexes, 'other': other, 'existing': {}, 'external_dependents': []}
+    if engine is not None:
+        with engine.connect() as conn:
+            plan['existing'] = existing_relations(conn)
+            plan['external_dependents'] = external_dependents(conn, [view['name'] for view in views])
+    return plan
+
+def format_plan(plan):
+    lines = []
+    for number, level in enumerate(plan['levels']):
+        lines.append(f"Level {number} ({len(level)} built in parallel):")
+        for view in level:
+            kind = 'materialized view' if view['materialized'] else 'view'
+            current = plan['existing'].get(view['name'])
+            action = f"replace {current}" if current else 'create'
+            deps = ', '.join(view['deps']) or '-'
+            lines.append(f"  {view['name']:<28} {kind:<18} {action:<26} reads {deps}")
+    staged_indexes = [index for index in plan['indexes'] if index['table'] in _materialized_names(plan)]
+    table_indexes = [index for index in plan['indexes'] if index not in staged_indexes]
+    lines.append(f"Indexes built in staging (materialized views): {len(staged_indexes)}")
+    lines.append(f"Indexes on base tables, after the swap: {len(table_indexes)}")
+    if plan['other']:
+        lines.append(f"Other statements, after the swap: {len(plan['other'])}")
+    for dependent, source in plan['external_dependents']:
+        lines.append(f"[WARNING] {dependent} reads {source} but is not in the script, the swap will fail unless it is dropped first")
+    return '\n'.join(lines)
+
+def _materialized_names(plan):
+    return {view['name'] for level in plan['levels'] for view in level if view['materialized']}
+
+def _build_view(engine, view, indexes):
+    # Unqualified names resolve to staging first: sibling views from earlier levels, then the public tables
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL search_path TO {STAGING_SCHEMA}, {TARGET_SCHEMA}"))
+        conn.execute(text(view['sql']))
+        for index in indexes:
+            conn.execute(text(index['sql']))
+    return time.perf_counter() - start
+
+def build_staging(engine, plan, workers=4):
+    """
+    Creates every view of the plan in STAGING_SCHEMA, level by level
+    Returns {view name: build seconds}
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {STAGING_SCHEMA}"))
+
+    timings = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for level in plan['levels']:
+            futures = {view['name']: pool.submit(_build_view, engine, view,
+                                                 [index for index in plan['indexes'] if index['table'] == view['name']])
+                       for view in level}
+            for name, future in futures.items():
+                timings[name] = future.result()
+                logger.info(f"Built {STAGING_SCHEMA}.{name} in {timings[name]:.2f}s")
+    return timings
+
+def view_columns(conn, schema, view):
+    rows = conn.execute(text("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = :schema AND table_name = :view
+        ORDER BY ordinal_position
+    """), {'schema': schema, 'view': view})
+    return [row[0] for row in rows]
+
+def probe(conn, schema, view, game_id=None, columns=None):
+    """
+    Cheap check that a view works: for views with a game_id column, the row count and an
+    md5 checksum of one game's rows; otherwise only that it plans
+    columns: checksum only these columns (default the whole row)
+    Returns {'rows', 'checksum'} (None values for plan-only probes)
+    """
+    if 'game_id' in view_columns(conn, schema, view) and game_id is not None:
+        record = 't::text' if columns is None else 'ROW({})::text'.format(', '.join('t."{}"'.format(column.replace('"', '""')) for column in columns))
+        row = conn.execute(text(f"""
+            SELECT COUNT(*), md5(COALESCE(string_agg({record}, '|' ORDER BY {record}), ''))
+            FROM {schema}.{view} t
+            WHERE t.game_id = :game_id
+        """), {'game_id': int(game_id)}).fetchone()
+        return {'rows': row[0], 'checksum': row[1]}
+    conn.execute(text(f"EXPLAIN SELECT * FROM {schema}.{view}"))
+    return {'rows': None, 'checksum': None}
+
+def verify_staging(engine, plan, game_id=None):
+    """
+    Probes every staging view and, when it exists, its live version, both checksummed over
+    the columns they have in common (a new column doesn't count as a change)
+    Returns {view name: {'rows', 'checksum', 'live', 'problem'}}: rows / checksum of the staging
+    view, live the live view's probe (None for a new view), problem None or why the view
+    must not be swapped in: 'error: ...', 'empty', 'rows' (count differs) or 'checksum'
+    """
+    results = {}
+    for level in plan['levels']:
+        for view in level:
+            name = view['name']
+            try:
+                with engine.connect() as conn:
+                    columns = view_columns(conn, STAGING_SCHEMA, name)
+                    live = None
+                    if name in plan['existing']:
+                        live_columns = set(view_columns(conn, TARGET_SCHEMA, name))
+                        columns = [column for column in columns if column in live_columns]
+                        live = probe(conn, TARGET_SCHEMA, name, game_id, columns)
+                    result = probe(conn, STAGING_SCHEMA, name, game_id, columns)
+            except Exception as e:
+                results[name] = {'rows': None, 'checksum': None, 'live': None, 'problem': f"error: {type(e).__name__}: {e}"}
+                continue
+            result['live'] = live
+            result['problem'] = compare_probes(result, live)
+            results[name] = result
+    return results
+
+def compare_probes(staging, live):
+    # Why a staging probe must not replace the live one, None if it may
+    if staging['rows'] is None:
+        return None  # plan-only probe, no game_id column
+    if staging['rows'] == 0 and (live is None or live['rows'] != 0):
+        return 'empty'
+    if live is None or live['rows'] is None:
+        return None
+    if staging['rows'] != live['rows']:
+        return 'rows'
+    if staging['checksum'] != live['checksum']:
+        return 'checksum'
+    return None
+
+def latest_game_id(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(game_id) FROM lineup_stints")).scalar()
+
+def swap(engine, plan, lock_timeout='5s'):
+    """
+    Replaces the live views with the staging ones in one transaction
+    Old versions are dropped dependents first, new ones moved in dependencies first
+    """
+    views = [view for level in plan['levels'] for view in level]
+    with engine.begin() as conn:
+        conn.execute(text(f"SET LOCAL lock_timeout = '{lock_timeout}'"))
+        existing = existing_relations(conn)
+        for view in reversed(views):
+            kind = existing.get(view['name'])
+            if kind:
+                keyword = 'MATERIALIZED VIEW' if kind == 'materialized' else 'VIEW'
+                conn.execute(text(f"DROP {keyword} {TARGET_SCHEMA}.{view['name']}"))
+        for view in views:
+            keyword = 'MATERIALIZED VIEW' if view['materialized'] else 'VIEW'
+            conn.execute(text(f"ALTER {keyword} {STAGING_SCHEMA}.{view['name']} SET SCHEMA {TARGET_SCHEMA}"))
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {STAGING_SCHEMA} CASCADE"))
+
+def deploy(engine, sql, workers=4, verify=True, game_id=None, allow_changes=False):
+    """
+    Builds, probes and swaps in the views of a script (see the module comment)
+    allow_changes: swap in views whose probe game rows differ from the live ones (a deliberate
+                   change to what a view returns); failed and empty probes still stop the deploy
+    Returns {'plan', 'timings', 'probes', 'swap_seconds'} (probes: verify_staging()); raises if
+    a staging view fails verification, in which case the live views are left untouched
+    """
+    plan = plan_deployment(sql, engine)
+    if plan['external_dependents']:
+        names = ', '.join(sorted({dependent for dependent, _ in plan['external_dependents']}))
+        raise RuntimeError(f"Views outside the script depend on it ({names}); drop or add them to the script first")
+
+    timings = build_staging(engine, plan, workers)
+    probes = {}
+    if verify:
+        game_id = game_id if game_id is not None else latest_game_id(engine)
+        probes = verify_staging(engine, plan, game_id)
+        allowed = {None, 'rows', 'checksum'} if allow_changes else {None}
+        failed = {name: _describe(result) for name, result in probes.items() if result['problem'] not in allowed}
+        if failed:
+            raise RuntimeError(f"Staging views failed verification against game {game_id}, live views unchanged: {failed}")
+        for name, result in probes.items():
+            if result['problem']:
+                logger.warning(f"{name} returns different rows for game {game_id}: {_describe(result)} (allowed)")
+
+    start = time.perf_counter()
+    swap(engine, plan)
+    swap_seconds = time.perf_counter() - start
+    logger.info(f"Swapped {sum(len(level) for level in plan['levels'])} views into {TARGET_SCHEMA} in {swap_seconds:.2f}s")
+
+    # Base table indexes and anything else in the script are idempotent, run them after the swap
+    materialized = _materialized_names(plan)
+    with engine.begin() as conn:
+        for index in plan['indexes']:
+            if index['table'] not in materialized:
+                conn.execute(text(index['sql']))
+        for statement in plan['other']:
+            conn.execute(text(statement))
+    return {'plan': plan, 'timings': timings, 'probes': probes, 'swap_seconds': swap_seconds}
+
+def _describe(result):
+    problem = result['problem']
+    if problem in ('empty', 'rows'):
+        live = result['live']['rows'] if result['live'] else '-'
+        return f"{result['rows']} rows in staging, {live} live"
+    if problem == 'checksum':
+        return f"same {result['rows']} rows but different values (md5 {result['checksum'][:8]} vs {result['live']['checksum'][:8]})"
+    return problem
+
+def refresh_materialized(engine, plan, workers=4, concurrently=True):
+    """
+    Refreshes the materialized views of a plan, independent ones in parallel
+    concurrently: REFRESH ... CONCURRENTLY (readers are not blocked; needs a unique index)
+    Returns {view name: seconds}
+    """
+    option = 'CONCURRENTLY ' if concurrently else ''
+    timings = {}
+
+    def refresh(name):
+        start = time.perf_counter()
+        with engine.begin() as conn:
+            conn.execute(text(f"REFRESH MATERIALIZED VIEW {option}{TARGET_SCHEMA}.{name}"))
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for level in plan['levels']:
+            futures = {view['name']: pool.submit(refresh, view['name']) for view in level if view['materialized']}
+            for name, future in futures.items():
+                timings[name] = future.result()
+                logger.info(f"Refreshed {name} in {timings[name]:.2f}s")
+    return timings
@@ -0,0 +1,306 @@
+import os
+import sqlite3
+import time
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Durable game x stage work queue for season runs, kept in a local SQLite file
+# so a crash or Ctrl+C loses nothing: every task is either pending (with a
+# next-retry time), running, done or failed (out of attempts).
+#   fetch: get play-by-play, rotation and box score from the API into the RawCache
+#   load:  transform the cached frames and load them into Postgres
+# A game only reaches the load stage once its fetch is done, so a retried load
+# never hits the API again for the same data. Games that fail validation are
+# set to quarantined and left alone until they are released. A running task
+# records the pid that started it; the backfill runs one process per season on
+# the same file, so recover() only reclaims its own season's tasks, and only
+# those whose process is gone.
+
+STAGES = ['fetch', 'load']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    game_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    season TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_retry_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL,
+    owner INTEGER,
+    PRIMARY KEY (game_id, stage)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, next_retry_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class WorkQueue:
+    """
+    path: SQLite file holding the queue (created if missing)
+    max_attempts: a task is marked failed after this many attempts
+    base_delay / max_delay: retry backoff in seconds, doubling per attempt
+    """
+    def __init__(self, path, max_attempts=5, base_delay=60, max_delay=3600):
+        directory = os.path.dirname(str(path))
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = str(path)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        # Autocommit: every call below is a single statement, so each state change is durable on its own
+        self.conn = sqlite3.connect(self.path, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(SCHEMA)
+        # Queue files created before tasks had an owner
+        if 'owner' not in [row['name'] for row in self.conn.execute('PRAGMA table_info(tasks)')]:
+            self.conn.execute('ALTER TABLE tasks ADD COLUMN owner INTEGER')
+
+    def close(self):
+        self.conn.close()
+
+    def enqueue(self, season, game_ids):
+        """
+        Adds a fetch task for every game not already in the queue
+        Returns the number of new tasks
+        """
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO tasks (game_id, stage, season, updated_at) VALUES (?, 'fetch', ?, ?)",
+                              [(str(game_id), season, time.time()) for game_id in game_ids])
+        return self.conn.total_changes - before
+
+    def recover(self, season=None):
+        """
+        Puts tasks left running by an interrupted run back to pending
+        Only tasks of this season (all seasons if None) whose owning process is no longer
+        alive, so a starting worker never takes over games another live worker is running
+        """
+        query = "SELECT game_id, stage, owner FROM tasks WHERE status = 'running'"
+        params = []
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        orphaned = [(row['game_id'], row['stage']) for row in self.conn.execute(query, params).fetchall()
+                    if not _process_alive(row['owner'])]
+        self.conn.executemany("UPDATE tasks SET status = 'pending', next_retry_at = 0, owner = NULL "
+                              "WHERE game_id = ? AND stage = ? AND status = 'running'", orphaned)
+        return len(orphaned)
+
+    def mark_done(self, game_ids):
+        # Games that are already in the database (e.g. loaded by a non-queued run)
+        self.conn.executemany("UPDATE tasks SET status = 'done', updated_at = ? WHERE game_id = ? AND status != 'done'",
+                              [(time.time(), str(game_id)) for game_id in game_ids])
+
+    def next_task(self, season=None, now=None):
+        """
+        Returns the next ready task as a dict, or None
+        Loads come before fetches so cached frames are consumed as soon as they exist
+        """
+        now = now if now is not None else time.time()
+        query = "SELECT * FROM tasks WHERE status = 'pending' AND next_retry_at <= ?"
+        params = [now]
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        query += " ORDER BY CASE stage WHEN 'load' THEN 0 ELSE 1 END, next_retry_at, game_id LIMIT 1"
+        row = self.conn.execute(query, params).fetchone()
+        return dict(row) if row else None
+
+    def next_retry_at(self, season=None):
+        """
+        Returns when the earliest pending task becomes ready, or None if nothing is pending
+        """
+        query = "SELECT MIN(next_retry_at) FROM tasks WHERE status = 'pending'"
+        params = []
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        return self.conn.execute(query, params).fetchone()[0]
+
+    def start(self, task):
+        self.conn.execute("UPDATE tasks SET status = 'running', attempts = attempts + 1, updated_at = ?, owner = ? WHERE game_id = ? AND stage = ?",
+                          (time.time(), os.getpid(), task['game_id'], task['stage']))
+        task['attempts'] += 1
+
+    def complete(self, task):
+        """
+        Marks a task done and queues the game's next stage
+        """
+        now = time.time()
+        self.conn.execute("UPDATE tasks SET status = 'done', last_error = NULL, updated_at = ? WHERE game_id = ? AND stage = ?",
+                          (now, task['game_id'], task['stage']))
+        index = STAGES.index(task['stage'])
+        if index + 1 < len(STAGES):
+            self.conn.execute("INSERT OR REPLACE INTO tasks (game_id, stage, season, updated_at) VALUES (?, ?, ?, ?)",
+                              (task['game_id'], STAGES[index + 1], task['season'], now))
+
+    def fail(self, task, error):
+        """
+        Schedules a retry with exponential backoff, or marks the task failed once it is out of attempts
+        Returns the delay until the retry in seconds (None if the task is now failed)
+        """
+        now = time.time()
+        if task['attempts'] >= self.max_attempts:
+            self.conn.execute("UPDATE tasks SET status = 'failed', last_error = ?, updated_at = ? WHERE game_id = ? AND stage = ?",
+                              (str(error), now, task['game_id'], task['stage']))
+            return None
+        delay = min(self.max_delay, self.base_delay * 2 ** (task['attempts'] - 1))
+        self.conn.execute("UPDATE tasks SET status = 'pending', next_retry_at = ?, last_error = ?, updated_at = ? WHERE game_id = ? AND stage = ?",
+                          (now + delay, str(error), now, task['game_id'], task['stage']))
+        return delay
+
+    def quarantine(self, task, reason):
+        """
+        Takes a task out of the run without further attempts (the game failed validation)
+        """
+        self.conn.execute("UPDATE tasks SET status = 'quarantined', last_error = ?, updated_at = ? WHERE game_id = ? AND stage = ?",
+                          (str(reason), time.time(), task['game_id'], task['stage']))
+
+    def release_quarantined(self, game_ids=None, season=None):
+        """
+        Puts quarantined tasks back to pending (all of them, or just these games)
+        """
+        query = "UPDATE tasks SET status = 'pending', attempts = 0, next_retry_at = 0 WHERE status = 'quarantined'"
+        params = []
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        if game_ids is None:
+            return self.conn.execute(query, params).rowcount
+        return sum(self.conn.execute(query + " AND game_id = ?", params + [str(game_id)]).rowcount for game_id in game_ids)
+
+    def retry_failed(self, season=None):
+        """
+        Gives failed tasks a fresh set of attempts
+        """
+        query = "UPDATE tasks SET status = 'pending', attempts = 0, next_retry_at = 0 WHERE status = 'failed'"
+        params = []
+        if season is not None:
+            query += " AND season = ?"
+            params.append(season)
+        return self.conn.execute(query, params).rowcount
+
+    def counts(self, season=None):
+        """
+        Returns {stage: {status: count}}
+        """
+        query = "SELECT stage, status, COUNT(*) AS n FROM tasks"
+        params = []
+        if season is not None:
+            query += " WHERE season = ?"
+            params.append(season)
+        query += " GROUP BY stage, status"
+        counts = {}
+        for row in self.conn.execute(query, params):
+            counts.setdefault(row['stage'], {})[row['status']] = row['n']
+        return counts
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+def _process_alive(pid):
+    # A task without an owner (older queue file) or whose pid is gone was interrupted
+    if not pid or pid == os.getpid():
+        return False
+    if os.name == 'nt':
+        return False  # os.kill would terminate it; the season filter is the only guard there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # exists, owned by another user
+    except OSError:
+        return False
+    return True
+
+class CircuitBreaker:
+    """
+    Stops a run from grinding through timeouts while the API is down
+    After failure_threshold consecutive failures the breaker opens and callers
+    should pause for the cooldown; the next call after it is a single probe
+    (half-open). A failed probe reopens it with the cooldown doubled, up to max_cooldown
+    queue: optional WorkQueue to persist the open state in, so a restart honours the pause
+    """
+    def __init__(self, failure_threshold=5, cooldown=300, max_cooldown=3600, queue=None):
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.queue = queue
+        self.failures = 0
+        self.cooldown = cooldown
+        self.open_until = float(queue.get_meta('breaker_open_until', 0)) if queue else 0.0
+        self.half_open = self.open_until > 0
+
+    def wait_time(self, now=None):
+        """
+        Returns seconds to pause before the next request (0 when requests may go ahead)
+        """
+        now = now if now is not None else time.time()
+        return max(0.0, self.open_until - now)
+
+    def record_success(self):
+        if self.half_open:
+            logger.info("API is responding again, closing circuit breaker")
+        self.failures = 0
+        self.cooldown = self.base_cooldown
+        self.half_open = False
+        self._set_open_until(0.0)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.half_open or self.failures >= self.failure_threshold:
+            self._set_open_until(time.time() + self.cooldown)
+            logger.warning(f"Circuit breaker open after {self.failures} consecutive failures, pausing for {self.cooldown}s")
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self.half_open = True
+
+    def _set_open_until(self, value):
+        self.open_until = value
+        if self.queue:
+            self.queue.set_meta('breaker_open_until', value)
+
+class RawCache:
+    """
+    On-disk cache of the API frames for a game ({'pbp', 'rotation', 'game_info'}),
+    written by the fetch stage and read by the load stage
+    compress: gzip the pickles (for long-lived archives, ~8x smaller)
+    """
+    def __init__(self, directory, compress=False):
+        self.directory = str(directory)
+        self.compression = 'gzip' if compress else None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, game_id):
+        return os.path.join(self.directory, f"{game_id}.pkl{'.gz' if self.compression else ''}")
+
+    def save(self, game_id, frames):
+        # Write then rename, so an interrupted save never leaves a truncated file behind
+        path = self.path(game_id)
+        tmp_path = f'{path}.tmp'
+        pd.to_pickle(frames, tmp_path, compression=self.compression)
+        os.replace(tmp_path, path)
+        return path
+
+    def load(self, game_id):
+        path = self.path(game_id)
+        if not os.path.exists(path):
+            return None
+        return pd.read_pickle(path, compression=self.compression)
+
+    def discard(self, game_id):
+        path = self.path(game_id)
+        if os.path.exists(path):
+            os.remove(path)
@@ -1,8 +1,13 @@
 import os
-from sqlalchemy import create_engine, text
+import threading
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.pool import NullPool, QueuePool
 from dotenv import load_dotenv
 import logging
 
+from config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_PGBOUNCER
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -25,9 +30,7 @@ def get_connection_str():
             missing.append(var)
     
     if missing:
-        print('missing environment variables')
-        for var in missing:
-            print(var)
+        logger.error(f"Missing environment variables: {', '.join(missing)}")
 
     connection_str = (
         f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
@@ -36,24 +39,163 @@ def get_connection_str():
 
     return connection_str
 
-def create_db_engine(echo=False, pool_size=5, max_overflow=10):
+def create_db_engine(echo=False, pool_size=None, max_overflow=None, pgbouncer=None):
+    """
+    Creates a new engine with the pool settings from config.py (DB_POOL_SIZE, ...)
+    Prefer get_engine(), which shares one engine per process
+    pgbouncer: no client-side pool (pgbouncer does the pooling) and a liveness check
+               on checkout; defaults to DB_PGBOUNCER
+    """
     connection_str = get_connection_str()
     logger.info(f"Creating database engine: {os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}")
 
-    engine = create_engine(
-        connection_str,
-        pool_size=pool_size,
-        max_overflow=max_overflow,
-        pool_timeout=30,
-        pool_recycle=3600,
-        echo=echo
-    )
+    pgbouncer = DB_PGBOUNCER if pgbouncer is None else pgbouncer
+    if pgbouncer:
+        # Transaction pooling: holding idle connections here would just pin pgbouncer server slots
+        engine = create_engine(connection_str, poolclass=NullPool, pool_pre_ping=True, echo=echo,
+                               connect_args={'application_name': 'nba_lineup_etl'})
+    else:
+        engine = create_engine(
+            connection_str,
+            poolclass=TimedQueuePool,
+            pool_size=pool_size if pool_size is not None else DB_POOL_SIZE,
+            max_overflow=max_overflow if max_overflow is not None else DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            echo=echo,
+            connect_args={'application_name': 'nba_lineup_etl'}
+        )
+    _track_connections(engine)
 
     return engine
 
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waited (including opening a new connection)
+    into self.stats, which is carried over when the pool is recreated (engine.dispose())
+    """
+    stats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.stats is not None:
+                waited = time.perf_counter() - start
+                self.stats['checkout_wait_seconds'] += waited
+                self.stats['checkout_wait_max_seconds'] = max(self.stats['checkout_wait_max_seconds'], waited)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+# id(engine) -> counters, filled by TimedQueuePool and the pool events below
+_pool_stats = {}
+
+def _new_stats():
+    return {'checkouts': 0, 'checked_out': 0, 'checked_out_peak': 0, 'connections_opened': 0,
+            'checkout_wait_seconds': 0.0, 'checkout_wait_max_seconds': 0.0}
+
+def _track_connections(engine):
+    stats = _pool_stats.setdefault(id(engine), _new_stats())
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.stats = stats
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_conn, connection_record):
+        stats['connections_opened'] += 1
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_conn, connection_record, connection_proxy):
+        stats['checkouts'] += 1
+        stats['checked_out'] += 1
+        stats['checked_out_peak'] = max(stats['checked_out_peak'], stats['checked_out'])
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_conn, connection_record):
+        stats['checked_out'] = max(0, stats['checked_out'] - 1)
+
+# Process-wide registry: name -> (pid that created it, engine)
+_engines = {}
+_engines_lock = threading.Lock()
+
+def get_engine(name='default', **kwargs):
+    """
+    Returns this process's shared engine for `name`, creating it on first use
+    kwargs: create_db_engine arguments, only used when the engine is created
+    After a fork (ProcessPoolExecutor, multiprocessing) the child gets a fresh pool;
+    connections inherited from the parent are never used by the child
+    """
+    with _engines_lock:
+        pid = os.getpid()
+        entry = _engines.get(name)
+        if entry is not None and entry[0] != pid:
+            entry[1].dispose(close=False)
+            entry = (pid, entry[1])
+            _engines[name] = entry
+        if entry is None:
+            entry = (pid, create_db_engine(**kwargs))
+            _engines[name] = entry
+        return entry[1]
+
+def dispose_engines():
+    """
+    Closes every pooled connection of the registry engines (end of a script/run)
+    The engines stay registered and reconnect if used again, so pool_status() still reports on them
+    """
+    with _engines_lock:
+        for name, (pid, engine) in _engines.items():
+            if pid == os.getpid():
+                engine.dispose()
+
+def _reset_after_fork():
+    # Runs in the child right after fork: drop the parent's pooled connections
+    # without closing them (the parent still owns the sockets)
+    global _engines_lock
+    # Another thread of the parent (e.g. the prefetcher's loop) may have held the lock at
+    # the fork; that thread doesn't exist here, so the child's copy would never be released
+    _engines_lock = threading.Lock()
+    parent = os.getppid()
+    for name, (pid, engine) in list(_engines.items()):
+        # An engine the parent itself inherited and never used has no pool of the parent's
+        # to drop; get_engine resets it when the child asks for it
+        if pid != parent:
+            continue
+        engine.dispose(close=False)
+        _engines[name] = (os.getpid(), engine)
+    # The counters describe the parent's connections, start the child's from zero
+    for stats in _pool_stats.values():
+        stats.update(_new_stats())
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def pool_status(engine=None):
+    """
+    Returns connection pool counters: checkouts, checkout wait (total/max), connections opened,
+    currently/peak checked out, and the pool's configured size. For one engine, or summed
+    over every registry engine when engine is None
+    """
+    engines = [engine] if engine is not None else [entry[1] for entry in _engines.values()]
+    status = _new_stats()
+    status['pool_size'] = 0
+    for engine in engines:
+        stats = _pool_stats.get(id(engine), _new_stats())
+        for key, value in stats.items():
+            if key.endswith('_max_seconds') or key == 'checked_out_peak':
+                status[key] = max(status[key], value)
+            else:
+                status[key] += value
+        if isinstance(engine.pool, QueuePool):
+            status['pool_size'] += engine.pool.size() + max(0, engine.pool._max_overflow)
+    status['checkout_wait_seconds'] = round(status['checkout_wait_seconds'], 4)
+    status['checkout_wait_max_seconds'] = round(status['checkout_wait_max_seconds'], 4)
+    return status
+
 def test_connection():
     try:
-        print('testing connection')
+        logger.info("Testing database connection")
         engine = create_db_engine()
 
         with engine.connect() as conn:
@@ -61,10 +203,10 @@ def test_connection():
             result.scalar()
 
         engine.dispose()
-        print("works")
+        logger.info("Database connection works")
         return True
     except Exception as e:
-        print("doesn't work")
+        logger.error(f"Database connection failed: {type(e).__name__}: {e}")
         return False
     
 # dont wanna do this rn
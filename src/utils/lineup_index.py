@@ -0,0 +1,207 @@
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Nearest-lineup search: "which lineups are most like this one, and which of
+# them played more minutes?". Every lineup is a sparse vector over players
+# (5 non-zeros, CSR style: `columns` holds the 5 player columns of each row,
+# `weights` an optional weight per player). The inverted lists (CSC of the same
+# matrix) map a player to the lineups they are in, so a query only touches the
+# lineups sharing at least one player with it: the 5 lists of a ten-season
+# index are a few hundred entries and a query takes about 2 ms, most of it
+# building the result frame.
+# Ranking is by (weighted) Jaccard overlap, ties broken by the distance between
+# the lineups' standardized per-100 stats.
+
+STAT_COLUMNS = ['seconds', 'points_scored', 'points_allowed', 'possessions']
+
+DATABASE_QUERY = """
+    SELECT lgs.lineup_id, MIN(lgs.team_id) AS team_id,
+           l.player1_id, l.player2_id, l.player3_id, l.player4_id, l.player5_id,
+           SUM(lgs.seconds) AS seconds, SUM(lgs.points_scored) AS points_scored,
+           SUM(lgs.points_allowed) AS points_allowed, SUM(lgs.possessions) AS possessions
+    FROM lineup_game_stats lgs
+    INNER JOIN lineups l ON l.lineup_id = lgs.lineup_id
+    {where}
+    GROUP BY lgs.lineup_id, l.player1_id, l.player2_id, l.player3_id, l.player4_id, l.player5_id
+"""
+
+class LineupIndex:
+    """
+    lineup_ids / team_ids: (n,) arrays
+    players: (n, 5) player ids
+    stats: {'seconds', 'points_scored', 'points_allowed', 'possessions'} -> (n,) arrays
+    player_weights: None (plain Jaccard), 'minutes' (players weighted by their on-court
+                    seconds in the index, so sharing a starter counts more than sharing
+                    a deep bench player) or {player_id: weight}
+    """
+    def __init__(self, lineup_ids, team_ids, players, stats, player_weights=None):
+        self.lineup_ids = np.asarray(lineup_ids, dtype=np.int64)
+        self.team_ids = np.asarray(team_ids, dtype=np.int64)
+        self.stats = {column: np.asarray(stats[column], dtype=np.float64) for column in STAT_COLUMNS}
+        players = np.asarray(players, dtype=np.int64).reshape(-1, 5)
+
+        # Player id -> column, and each lineup's 5 columns (the CSR indices)
+        self.player_ids, columns = np.unique(players, return_inverse=True)
+        self.columns = columns.reshape(-1, 5)
+        self.row_of = {int(lineup_id): row for row, lineup_id in enumerate(self.lineup_ids.tolist())}
+
+        # Inverted lists: the rows of every player's lineups, offsets[c]:offsets[c + 1]
+        flat = self.columns.ravel()
+        order = np.argsort(flat, kind='stable')
+        self.postings = (order // 5).astype(np.int64)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(flat, minlength=len(self.player_ids)))])
+
+        self.set_player_weights(player_weights)
+        self.features = self._features()
+
+    def __len__(self):
+        return len(self.lineup_ids)
+
+    def set_player_weights(self, player_weights=None):
+        self.unknown_weight = 1.0 if player_weights is None else 0.0
+        if player_weights is None:
+            weights = np.ones(len(self.player_ids))
+        elif isinstance(player_weights, str) and player_weights == 'minutes':
+            weights = np.bincount(self.columns.ravel(), weights=np.repeat(self.stats['seconds'], 5), minlength=len(self.player_ids))
+            weights = weights / max(weights.max(), 1.0)
+        else:
+            weights = np.array([float(player_weights.get(int(player), 0.0)) for player in self.player_ids])
+        self.player_weights = weights
+        self.row_weights = weights[self.columns].sum(axis=1)
+
+    def _features(self):
+        # Per-100 ratings and possessions per 48 minutes, standardized across lineups
+        # weighted by minutes so 2-minute lineups don't set the scale
+        possessions = self.stats['possessions']
+        seconds = self.stats['seconds']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw = np.column_stack([self.stats['points_scored'] / possessions * 100,
+                                   self.stats['points_allowed'] / possessions * 100,
+                                   possessions / seconds * 2880])
+        raw[~np.isfinite(raw)] = np.nan
+        weights = np.where(np.isnan(raw).any(axis=1), 0.0, seconds)
+        if weights.sum() == 0:
+            return np.zeros_like(raw)
+        mean = np.nansum(raw * weights[:, None], axis=0) / weights.sum()
+        std = np.sqrt(np.nansum((raw - mean) ** 2 * weights[:, None], axis=0) / weights.sum())
+        # Lineups without possessions sit at the mean instead of dropping out
+        return np.nan_to_num((raw - mean) / np.where(std > 0, std, 1.0))
+
+    def encode(self, players):
+        # Columns of the query's players that are in the index (unknown players can't overlap)
+        index = np.searchsorted(self.player_ids, np.asarray(players, dtype=np.int64))
+        index = np.minimum(index, len(self.player_ids) - 1)
+        return index[self.player_ids[index] == np.asarray(players, dtype=np.int64)]
+
+    def query(self, players=None, lineup_id=None, k=10, min_overlap=1, min_seconds=None,
+              more_minutes=False, team_id=None, stat_weight=0.0):
+        """
+        Returns the k lineups most similar to a five as a dataframe, best first
+        players: 5 player ids, or lineup_id: a lineup of the index (also gives its stats for the distance)
+        min_overlap: players a candidate must share with the query (1-5)
+        min_seconds / more_minutes: only candidates with at least that many seconds / more than the query lineup
+        team_id: only candidates of that team
+        stat_weight: 0 ranks by Jaccard then stat distance; > 0 ranks by jaccard - stat_weight * distance
+        """
+        query_row = None
+        if lineup_id is not None:
+            query_row = self.row_of.get(int(lineup_id))
+            if query_row is None:
+                raise ValueError(f"Lineup {lineup_id} is not in the index")
+            query_columns = self.columns[query_row]
+        elif players is not None and len(players) == 5:
+            query_columns = self.encode(players)
+        else:
+            raise ValueError("Give 5 player ids or a lineup_id")
+
+        # Candidates and their (weighted) overlap from the query players' inverted lists
+        lists = [self.postings[self.offsets[column]:self.offsets[column + 1]] for column in query_columns]
+        if not lists:
+            return self._frame(np.array([], dtype=np.int64), np.array([]), np.array([]), np.array([]))
+        rows = np.concatenate(lists)
+        weights = np.repeat(self.player_weights[query_columns], [len(posting) for posting in lists])
+        candidates, inverse, shared = np.unique(rows, return_inverse=True, return_counts=True)
+        shared_weight = np.bincount(inverse, weights=weights)
+
+        # Query players missing from the index are only in the union
+        query_weight = self.player_weights[query_columns].sum() + (5 - len(query_columns)) * self.unknown_weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            jaccard = np.nan_to_num(shared_weight / (query_weight + self.row_weights[candidates] - shared_weight))
+
+        keep = shared >= min_overlap
+        if query_row is not None:
+            keep &= candidates != query_row
+        if team_id is not None:
+            keep &= self.team_ids[candidates] == int(team_id)
+        if more_minutes and query_row is not None:
+            keep &= self.stats['seconds'][candidates] > self.stats['seconds'][query_row]
+        if min_seconds is not None:
+            keep &= self.stats['seconds'][candidates] >= min_seconds
+        candidates, jaccard, shared = candidates[keep], jaccard[keep], shared[keep]
+
+        if query_row is not None:
+            distance = np.sqrt(((self.features[candidates] - self.features[query_row]) ** 2).sum(axis=1))
+        else:
+            distance = np.zeros(len(candidates))
+        if stat_weight > 0:
+            order = np.argsort(-(jaccard - stat_weight * distance), kind='stable')
+        else:
+            order = np.lexsort((distance, -jaccard))
+        top = order[:k]
+        return self._frame(candidates[top], jaccard[top], shared[top], distance[top])
+
+    def _frame(self, rows, jaccard, shared, distance):
+        df = pd.DataFrame({'lineup_id': self.lineup_ids[rows], 'team_id': self.team_ids[rows]})
+        players = self.player_ids[self.columns[rows]] if len(rows) else np.zeros((0, 5), dtype=np.int64)
+        for i in range(5):
+            df[f'player{i + 1}_id'] = players[:, i]
+        df['shared_players'] = shared
+        df['jaccard'] = np.round(jaccard, 4)
+        df['stat_distance'] = np.round(distance, 4)
+        df['minutes'] = np.round(self.stats['seconds'][rows] / 60, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            net = (self.stats['points_scored'][rows] - self.stats['points_allowed'][rows]) / self.stats['possessions'][rows] * 100
+        df['net_rating'] = np.round(np.where(np.isfinite(net), net, np.nan), 2)
+        return df
+
+    def save(self, path):
+        # Lineups and stats only: the inverted lists are rebuilt on load (~100 ms for ten seasons)
+        np.savez(path, lineup_ids=self.lineup_ids, team_ids=self.team_ids,
+                 players=self.player_ids[self.columns], **self.stats)
+
+def load_lineup_index(path, player_weights=None):
+    data = np.load(path)
+    return LineupIndex(data['lineup_ids'], data['team_ids'], data['players'],
+                       {column: data[column] for column in STAT_COLUMNS}, player_weights)
+
+def lineup_index_from_store(store, player_weights=None):
+    """
+    Builds the index from a stint store (one row per lineup, stints summed)
+    """
+    stints = store.stints
+    lineup_ids, first, inverse = np.unique(stints['lineup_id'], return_index=True, return_inverse=True)
+    stats = {'seconds': np.bincount(inverse, weights=stints['duration_secs']),
+             'points_scored': np.bincount(inverse, weights=stints['points_scored']),
+             'points_allowed': np.bincount(inverse, weights=stints['points_allowed']),
+             'possessions': np.bincount(inverse, weights=stints['possessions'])}
+    return LineupIndex(lineup_ids, stints['team_id'][first], store.players(lineup_ids), stats, player_weights)
+
+def lineup_index_from_database(engine, seasons=None, player_weights=None):
+    """
+    Builds the index from lineup_game_stats (seasons: optional list like ['2023-24', '2024-25'])
+    """
+    from src.etl.stint_store import season_code
+    where = ''
+    params = {}
+    if seasons:
+        where = 'WHERE (lgs.game_id / 100000) % 100 = ANY(:season_codes)'
+        params['season_codes'] = [season_code(season) for season in seasons]
+    df = pd.read_sql(text(DATABASE_QUERY.format(where=where)), engine, params=params)
+    players = df[['player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']].to_numpy()
+    logger.info(f"Building lineup index over {len(df)} lineups")
+    return LineupIndex(df['lineup_id'], df['team_id'], players, df, player_weights)
@@ -0,0 +1,180 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import traceback
+from datetime import datetime, timezone
+
+# Shared logging for the pipeline and the scripts. setup_logging() puts a
+# QueueHandler on the root logger, so a logging call only formats its message
+# and enqueues the record; one listener thread does the console and file I/O:
+#   - console: human readable lines for the modules, bare text for the
+#     scripts' report output (output_logger)
+#   - file: one JSON object per line with the structured fields passed in
+#     extra (game_id, stage, seconds, rows, ...), rotated by size
+# RunMetrics.stage() logs one event per stage to EVENT_LOGGER, which goes to the
+# file only, so a run's log can be queried per game and stage:
+#   jq 'select(.stage == "pbp_fetch" and .seconds > 2)' logs/etl_pipeline.jsonl
+# With multiprocess=True the queue is a multiprocessing.Queue, so worker
+# processes (forked, or set up with worker_logging) log through the parent.
+# The report output stays at INFO whatever the level: --log-level WARNING quiets
+# the modules, not the tables and [OK] lines a script exists to print.
+
+OUTPUT_LOGGER = 'output'
+EVENT_LOGGER = 'etl.events'
+CONSOLE_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', 20 * 1024 * 1024))
+LOG_BACKUPS = int(os.getenv('LOG_BACKUPS', 5))
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+_queue = None
+_multiprocess = False
+_owner_pid = None
+
+def output_logger(name):
+    """
+    Logger for a script's report output (tables, banners, [OK]/[ERROR] lines):
+    printed bare on the console, and kept in the JSON log like any other record.
+    Its level is INFO independent of setup_logging's level; log [ERROR] lines with .error
+    """
+    return logging.getLogger(f'{OUTPUT_LOGGER}.{name}')
+
+def event_fields(record):
+    # The extra={...} fields of a record
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES and not key.startswith('_')}
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, logger, process, message, the extra fields, exc
+    """
+    def format(self, record):
+        event = {'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+                 'level': record.levelname,
+                 'logger': record.name,
+                 'process': record.processName,
+                 'message': record.getMessage()}
+        event.update(event_fields(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            event['exc'] = record.exc_text
+        return json.dumps(event, default=str)
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    CONSOLE_FORMAT for module loggers, the bare message for output_logger loggers
+    """
+    def __init__(self, fmt=CONSOLE_FORMAT, datefmt=DATE_FORMAT):
+        super().__init__(fmt, datefmt)
+
+    def format(self, record):
+        if record.name == OUTPUT_LOGGER or record.name.startswith(OUTPUT_LOGGER + '.'):
+            message = record.getMessage()
+            if record.exc_text:
+                message += '\n' + record.exc_text
+            return message
+        return super().format(record)
+
+class _NoEvents(logging.Filter):
+    # Keeps the per-stage events off the console
+    def filter(self, record):
+        return not record.name.startswith(EVENT_LOGGER)
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    # Like QueueHandler, but keeps the message and the traceback apart so the
+    # JSON formatter can put them in their own fields
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+def setup_logging(log_file=None, level=logging.INFO, console=True, multiprocess=False,
+                  max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """
+    Routes every logger through a queue to the console and, with log_file, a rotating JSON lines file
+    Calling it again replaces the previous configuration (e.g. nba_etl.py, then the subcommand)
+    log_file: path of the JSON log (rotated at max_bytes, keeping backups old files)
+    level: logging level or its name ('INFO')
+    multiprocess: use a multiprocessing.Queue so worker processes can log through this process
+    Returns the QueueListener
+    """
+    global _listener, _queue, _owner_pid, _multiprocess
+    shutdown_logging()
+    level = logging.getLevelName(level) if isinstance(level, str) else level
+
+    handlers = []
+    if console:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(ConsoleFormatter())
+        console_handler.addFilter(_NoEvents())
+        handlers.append(console_handler)
+    if log_file is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(log_file)), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups,
+                                                            encoding='utf-8')
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+
+    if multiprocess:
+        import multiprocessing
+        _queue = multiprocessing.Queue(-1)
+    else:
+        _queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(_queue))
+    root.setLevel(level)
+    logging.getLogger(OUTPUT_LOGGER).setLevel(logging.INFO)
+    # Chatty third party loggers stay at warnings
+    for name in ['urllib3', 'asyncio']:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    _listener = logging.handlers.QueueListener(_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _owner_pid = os.getpid()
+    _multiprocess = multiprocess
+    return _listener
+
+def log_queue():
+    """
+    The queue worker processes should log to, None unless set up with multiprocess=True
+    """
+    return _queue if _multiprocess else None
+
+def worker_logging(log_queue, level=logging.INFO):
+    """
+    Process pool initializer side: send this process's records to the parent's queue
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(log_queue))
+    root.setLevel(level)
+    logging.getLogger(OUTPUT_LOGGER).setLevel(logging.INFO)
+
+def shutdown_logging():
+    """
+    Stops the listener once the queued records are written (registered with atexit)
+    """
+    global _listener
+    # A forked child has a copy of the listener but not its thread, and stopping
+    # it would put the stop sentinel on the parent's queue
+    if _listener is not None and os.getpid() == _owner_pid:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+atexit.register(shutdown_logging)
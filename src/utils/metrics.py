@@ -0,0 +1,212 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+import logging
+
+from src.utils.log_setup import EVENT_LOGGER
+
+logger = logging.getLogger(__name__)
+# One structured record per stage, written to the JSON log only (src/utils/log_setup.py)
+events = logging.getLogger(EVENT_LOGGER)
+
+# Upper bounds (seconds) of the duration histogram buckets, Prometheus style
+HISTOGRAM_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float('inf')]
+
+SAMPLE_FIELDS = ['game_id', 'stage', 'seconds', 'rows', 'bytes', 'ok']
+
+def frame_size(df):
+    """
+    Returns (rows, bytes) for a dataframe, a list of dataframes or None
+    """
+    if df is None:
+        return 0, 0
+    if isinstance(df, (list, tuple)):
+        sizes = [frame_size(frame) for frame in df]
+        return sum(s[0] for s in sizes), sum(s[1] for s in sizes)
+    if hasattr(df, 'memory_usage'):
+        return len(df), int(df.memory_usage(index=True, deep=True).sum())
+    return len(df), 0
+
+class StageTimer:
+    """
+    Handle yielded by RunMetrics.stage so the caller can attach the rows/bytes
+    the stage produced or consumed
+    """
+    def __init__(self):
+        self.rows = 0
+        self.bytes = 0
+
+    def record(self, df):
+        rows, size = frame_size(df)
+        self.rows += rows
+        self.bytes += size
+
+class RunMetrics:
+    """
+    Collects wall time, rows and bytes for each pipeline stage of a run
+    Samples are kept in memory (a season is a few thousand games x ~15 stages)
+    and summarised into per-stage histograms when the report is written
+    """
+    def __init__(self, run_id=None, profiler=None):
+        self.run_id = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        self.started_at = time.time()
+        self.samples = []
+        self.gauges = {}
+        # Optional GameProfiler (src/utils/profiling.py) that profile() hands each game to
+        self.profiler = profiler
+
+    @contextmanager
+    def stage(self, name, game_id=None):
+        timer = StageTimer()
+        start = time.perf_counter()
+        ok = False
+        try:
+            yield timer
+            ok = True
+        finally:
+            sample = {'game_id': game_id,
+                      'stage': name,
+                      'seconds': time.perf_counter() - start,
+                      'rows': timer.rows,
+                      'bytes': timer.bytes,
+                      'ok': ok}
+            self.samples.append(sample)
+            if events.isEnabledFor(logging.INFO):
+                events.info('stage %s', name, extra=dict(sample, seconds=round(sample['seconds'], 6), run_id=self.run_id))
+
+    def profile(self, game_id):
+        """
+        Context manager around one game's processing: profiles it when the run has a profiler
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.profile(game_id)
+
+    def sleep(self, seconds, game_id=None):
+        # Rate limiting sleeps are recorded as their own stage so they can be
+        # separated from API latency in the report
+        with self.stage('sleep', game_id):
+            time.sleep(seconds)
+
+    def set_gauges(self, prefix, values):
+        """
+        Records point-in-time values (e.g. db_connection.pool_status()) as <prefix>_<key> gauges
+        """
+        for key, value in values.items():
+            self.gauges[f'{prefix}_{key}'] = value
+
+    def stages(self):
+        names = []
+        for sample in self.samples:
+            if sample['stage'] not in names:
+                names.append(sample['stage'])
+        return names
+
+    def histogram(self, name):
+        """
+        Returns cumulative bucket counts for a stage, one per HISTOGRAM_BUCKETS bound
+        """
+        durations = [s['seconds'] for s in self.samples if s['stage'] == name]
+        return [sum(1 for d in durations if d <= bound) for bound in HISTOGRAM_BUCKETS]
+
+    def summary(self):
+        summary = {}
+        for name in self.stages():
+            samples = [s for s in self.samples if s['stage'] == name]
+            durations = sorted(s['seconds'] for s in samples)
+            total = sum(durations)
+            rows = sum(s['rows'] for s in samples)
+            summary[name] = {
+                'count': len(samples),
+                'failures': sum(1 for s in samples if not s['ok']),
+                'total_seconds': round(total, 4),
+                'mean_seconds': round(total / len(durations), 4),
+                'p50_seconds': round(_percentile(durations, 0.50), 4),
+                'p95_seconds': round(_percentile(durations, 0.95), 4),
+                'max_seconds': round(durations[-1], 4),
+                'rows': rows,
+                'bytes': sum(s['bytes'] for s in samples),
+                'rows_per_second': round(rows / total, 1) if total > 0 else None,
+                'histogram': dict(zip([_bucket_label(b) for b in HISTOGRAM_BUCKETS], self.histogram(name))),
+            }
+        return summary
+
+    def write_report(self, directory):
+        """
+        Writes run_<id>.json (summary + histograms) and run_<id>.csv (raw samples)
+        Returns the path of the json report
+        """
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f'run_{self.run_id}.json')
+        csv_path = os.path.join(directory, f'run_{self.run_id}.csv')
+
+        games = set(s['game_id'] for s in self.samples if s['game_id'] is not None)
+        report = {'run_id': self.run_id,
+                  'started_at': datetime.fromtimestamp(self.started_at).isoformat(),
+                  'wall_seconds': round(time.time() - self.started_at, 2),
+                  'games': len(games),
+                  'stages': self.summary(),
+                  'gauges': self.gauges}
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=SAMPLE_FIELDS)
+            writer.writeheader()
+            writer.writerows(self.samples)
+
+        logger.info(f"Wrote run metrics to {json_path} and {csv_path}")
+        return json_path
+
+    def write_prometheus(self, path):
+        """
+        Writes the histograms in Prometheus text exposition format, for the
+        node_exporter textfile collector. Written to a temp file and renamed so
+        the collector never reads a partial file
+        """
+        lines = ['# HELP etl_stage_duration_seconds Wall time of each ETL stage',
+                 '# TYPE etl_stage_duration_seconds histogram']
+        for name in self.stages():
+            for bound, count in zip(HISTOGRAM_BUCKETS, self.histogram(name)):
+                lines.append(f'etl_stage_duration_seconds_bucket{{stage="{name}",le="{_bucket_label(bound)}"}} {count}')
+            durations = [s['seconds'] for s in self.samples if s['stage'] == name]
+            lines.append(f'etl_stage_duration_seconds_sum{{stage="{name}"}} {sum(durations):.6f}')
+            lines.append(f'etl_stage_duration_seconds_count{{stage="{name}"}} {len(durations)}')
+
+        for metric, field, help_text in [('etl_stage_rows_total', 'rows', 'Rows handled by each ETL stage'),
+                                         ('etl_stage_bytes_total', 'bytes', 'In-memory bytes handled by each ETL stage'),
+                                         ('etl_stage_failures_total', None, 'Failed executions of each ETL stage')]:
+            lines.append(f'# HELP {metric} {help_text}')
+            lines.append(f'# TYPE {metric} counter')
+            for name in self.stages():
+                samples = [s for s in self.samples if s['stage'] == name]
+                if field is None:
+                    value = sum(1 for s in samples if not s['ok'])
+                else:
+                    value = sum(s[field] for s in samples)
+                lines.append(f'{metric}{{stage="{name}"}} {value}')
+
+        for name, value in self.gauges.items():
+            lines.append(f'# TYPE etl_{name} gauge')
+            lines.append(f'etl_{name} {value}')
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+        logger.info(f"Wrote Prometheus metrics to {path}")
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _bucket_label(bound):
+    return '+Inf' if bound == float('inf') else f'{bound:g}'
@@ -0,0 +1,189 @@
+import cProfile
+import heapq
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Opt-in per game profiling (run_etl.py --profile / --profile-slowest). A
+# profiled game runs under cProfile and a stack sampler at the same time:
+#   game_<id>.pstats     cProfile stats (python -m pstats, snakeviz, gprof2dot)
+#   game_<id>.collapsed  sampled wall-clock stacks in the collapsed format
+#                        py-spy writes (`func (file:line);...;func (file:line) count`),
+#                        ready for flamegraph.pl, inferno or speedscope
+# Games are picked by a hash of their id, so a rerun with the same fraction
+# profiles the same games, and/or kept only if they are among the N slowest of
+# the run (every game is profiled then, the others are discarded). finish()
+# writes summary.txt with the top cumulative functions over all profiled games
+# and run.pstats with their combined stats.
+
+SAMPLE_INTERVAL = 0.005
+SUMMARY_FUNCTIONS = 25
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every interval seconds from a background thread
+    counts: Counter of collapsed stacks (outermost frame first, ';' separated)
+    """
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({_short_path(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self.counts
+
+def write_collapsed(counts, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in counts.most_common():
+            f.write(f'{stack} {count}\n')
+
+def _short_path(filename):
+    # Project files relative to the project, libraries from their site-packages directory
+    for marker in ('site-packages' + os.sep, 'dist-packages' + os.sep):
+        if marker in filename:
+            return filename.split(marker, 1)[1]
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return os.path.relpath(filename, root) if filename.startswith(root) else filename
+
+class GameProfiler:
+    """
+    directory: where the run's profiles go (a run_<id> subdirectory is created)
+    fraction: share of games profiled and always kept, picked by a hash of the game id (0-1)
+    slowest: also keep the profiles of the N slowest games of the run (profiles every game)
+    """
+    def __init__(self, directory, fraction=0.0, slowest=0, run_id=None, interval=SAMPLE_INTERVAL):
+        self.fraction = fraction
+        self.slowest = slowest
+        self.interval = interval
+        self.directory = os.path.join(str(directory), f"run_{run_id or time.strftime('%Y%m%d_%H%M%S')}")
+        self.total = None
+        self.profiled = {}   # game_id -> wall seconds of every profiled game
+        self.kept = {}       # game_id -> why its profile was written ('sampled' / 'slowest')
+        self._slowest = []   # min-heap of (seconds, order, game_id, profile, stacks)
+        self._order = 0
+
+    def sampled(self, game_id):
+        # Same games for the same fraction on every run
+        return zlib.crc32(str(game_id).encode()) / 2 ** 32 < self.fraction
+
+    @contextmanager
+    def profile(self, game_id):
+        sampled = self.sampled(game_id)
+        if not sampled and self.slowest <= 0:
+            yield
+            return
+        profile = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), self.interval).start()
+        start = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - start
+            stacks = sampler.stop()
+            self._record(game_id, seconds, profile, stacks, sampled)
+
+    def _record(self, game_id, seconds, profile, stacks, sampled):
+        self.profiled[game_id] = seconds
+        if self.total is None:
+            self.total = pstats.Stats(profile)
+        else:
+            self.total.add(profile)
+        if sampled:
+            self._write(game_id, profile, stacks, 'sampled')
+        elif self.slowest > 0:
+            self._order += 1
+            entry = (seconds, self._order, game_id, profile, stacks)
+            if len(self._slowest) < self.slowest:
+                heapq.heappush(self._slowest, entry)
+            elif seconds > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def _write(self, game_id, profile, stacks, reason):
+        os.makedirs(self.directory, exist_ok=True)
+        profile.dump_stats(os.path.join(self.directory, f'game_{game_id}.pstats'))
+        write_collapsed(stacks, os.path.join(self.directory, f'game_{game_id}.collapsed'))
+        self.kept[game_id] = reason
+
+    def top_functions(self, limit=SUMMARY_FUNCTIONS):
+        """
+        The functions with the most cumulative time over all profiled games
+        [{'function', 'calls', 'tottime', 'cumtime', 'cumtime_per_game', 'share'}]
+        share is the cumulative time over the profiled games' wall time
+        """
+        if self.total is None:
+            return []
+        games = max(len(self.profiled), 1)
+        wall = sum(self.profiled.values()) or 1.0
+        rows = []
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in self.total.stats.items():
+            label = name if filename == '~' else f"{name} ({_short_path(filename)}:{line})"
+            rows.append({'function': label, 'calls': calls, 'tottime': tottime, 'cumtime': cumtime,
+                         'cumtime_per_game': cumtime / games, 'share': cumtime / wall})
+        rows.sort(key=lambda row: row['cumtime'], reverse=True)
+        return rows[:limit]
+
+    def format_summary(self, limit=SUMMARY_FUNCTIONS):
+        lines = [f"{len(self.profiled)} games profiled, {len(self.kept)} kept "
+                 f"({sum(1 for r in self.kept.values() if r == 'sampled')} sampled, "
+                 f"{sum(1 for r in self.kept.values() if r == 'slowest')} slowest)", '']
+        for game_id, reason in sorted(self.kept.items(), key=lambda item: -self.profiled[item[0]]):
+            lines.append(f"  {game_id}  {self.profiled[game_id]:8.2f}s  {reason}")
+        lines.append('')
+        lines.append(f"{'cumtime s':>10}{'per game':>10}{'share':>7}{'tottime s':>10}{'calls':>10}  function")
+        for row in self.top_functions(limit):
+            lines.append(f"{row['cumtime']:>10.3f}{row['cumtime_per_game']:>10.3f}{row['share']:>7.0%}"
+                         f"{row['tottime']:>10.3f}{row['calls']:>10}  {row['function']}")
+        return '\n'.join(lines)
+
+    def finish(self):
+        """
+        Writes the slowest games' profiles, run.pstats and summary.txt
+        Returns the summary text (None if no game was profiled)
+        """
+        for seconds, _, game_id, profile, stacks in sorted(self._slowest, reverse=True):
+            if game_id not in self.kept:
+                self._write(game_id, profile, stacks, 'slowest')
+        self._slowest = []
+        if self.total is None:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        self.total.dump_stats(os.path.join(self.directory, 'run.pstats'))
+        summary = self.format_summary()
+        with open(os.path.join(self.directory, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(summary + '\n\n')
+            # The standard pstats listing as well, with the full file paths
+            stream = io.StringIO()
+            pstats.Stats(os.path.join(self.directory, 'run.pstats'), stream=stream).sort_stats('cumulative').print_stats(SUMMARY_FUNCTIONS * 2)
+            f.write(stream.getvalue())
+        logger.info(f"Wrote {len(self.kept)} game profiles and the run summary to {self.directory}")
+        return summary
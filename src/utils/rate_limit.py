@@ -0,0 +1,73 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+
+class RateLimiter:
+    """
+    Token bucket shared by everything that calls stats.nba.com in this process
+    requests_per_minute: sustained rate; burst: how many requests may go back to back
+    acquire() blocks the calling thread, wait() is the asyncio version; both draw on the same bucket
+    """
+    def __init__(self, requests_per_minute=60, burst=1):
+        self.interval = 60.0 / requests_per_minute
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _reserve(self):
+        # Takes a token (possibly going negative) and returns how long the caller must wait for it
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) / self.interval)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens * self.interval)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def wait(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def penalize(self, seconds):
+        """
+        Drains the bucket so nobody sends for `seconds` (e.g. after a 429 with Retry-After)
+        """
+        with self.lock:
+            self.tokens = min(self.tokens, -seconds / self.interval)
+            self.updated = time.monotonic()
+
+class SharedRateLimiter:
+    """
+    Request budget shared by several processes (e.g. backfill workers, one per season)
+    Hands out evenly spaced send slots from a shared next-slot timestamp; create it in
+    the parent and pass it to the workers when they start (Pool initializer args)
+    """
+    def __init__(self, requests_per_minute=20):
+        self.interval = 60.0 / requests_per_minute
+        self.next_slot = multiprocessing.Value('d', 0.0)
+
+    def acquire(self):
+        with self.next_slot.get_lock():
+            now = time.time()
+            slot = max(now, self.next_slot.value)
+            self.next_slot.value = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def penalize(self, seconds):
+        """
+        Pushes every process's next slot at least `seconds` into the future
+        """
+        with self.next_slot.get_lock():
+            self.next_slot.value = max(self.next_slot.value, time.time() + seconds)
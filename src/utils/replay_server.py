@@ -0,0 +1,244 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Local stand-in for stats.nba.com. Serves recorded endpoint payloads from
+# <directory>/<endpoint>/<key>.json, with optional latency, 500s and 429s so
+# retry, concurrency and rate-limiting code can be exercised deterministically.
+# Point the pipeline at it with NBA_STATS_BASE_URL=http://host:port
+
+# Request parameters that identify a recorded payload, per endpoint
+KEY_PARAMS = {
+    'playbyplayv3': ['GameID'],
+    'gamerotation': ['GameID'],
+    'boxscoretraditionalv3': ['GameID'],
+    'leaguegamefinder': ['Season', 'SeasonType', 'DateFrom', 'DateTo'],
+    'commonplayerinfo': ['PlayerID'],
+    'commonteamroster': ['TeamID', 'Season'],
+}
+
+ERROR_BODY = '{"Message":"An error has occurred."}'
+
+def payload_key(endpoint, params):
+    """
+    Returns the file name (without .json) a payload is stored under
+    params: dict of request parameters; missing/empty values are ignored, like requests does with None
+    """
+    parts = []
+    for name in KEY_PARAMS.get(endpoint.lower(), []):
+        value = params.get(name)
+        if value not in (None, ''):
+            parts.append(f'{name}-{value}')
+    key = '_'.join(parts) or 'default'
+    return re.sub(r'[^A-Za-z0-9_.-]', '-', key)
+
+def payload_path(directory, endpoint, params):
+    return os.path.join(directory, endpoint.lower(), payload_key(endpoint, params) + '.json')
+
+def save_payload(directory, endpoint, params, body):
+    """
+    Stores a response body (str or json-serialisable object) for later replay
+    Returns the path written
+    """
+    path = payload_path(directory, endpoint, params)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not isinstance(body, str):
+        body = json.dumps(body)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(body)
+    return path
+
+def record_endpoint(directory, endpoint_obj):
+    """
+    Stores the raw response of an nba_api endpoint object that has already run its request
+    """
+    return save_payload(directory, endpoint_obj.endpoint, endpoint_obj.parameters,
+                        endpoint_obj.nba_response.get_response())
+
+class ReplayConfig:
+    """
+    Fault injection settings for the replay server
+    latency: seconds added to every response; jitter: +/- uniform seconds on top
+    error_rate / throttle_rate: fraction of requests answered with 500 / 429
+    requests_per_minute: sliding-window budget, requests over it get 429 (None = unlimited)
+    """
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0,
+                 requests_per_minute=None, retry_after=5, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.seed = seed
+
+class ReplayServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, directory, config=None):
+        super().__init__(address, ReplayHandler)
+        self.directory = directory
+        self.config = config or ReplayConfig()
+        self.rng = random.Random(self.config.seed)
+        self.lock = threading.Lock()
+        self.recent = deque()
+        self.stats = {'requests': 0, 'served': 0, 'errors': 0, 'throttled': 0, 'missing': 0}
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def decide(self):
+        """
+        Returns (status, delay) for the next request; all randomness goes through one seeded rng
+        so a run with the same seed and request order injects the same faults
+        """
+        config = self.config
+        with self.lock:
+            self.stats['requests'] += 1
+            now = time.monotonic()
+            delay = config.latency
+            if config.jitter:
+                delay = max(0.0, delay + self.rng.uniform(-config.jitter, config.jitter))
+
+            if config.requests_per_minute:
+                while self.recent and now - self.recent[0] > 60:
+                    self.recent.popleft()
+                if len(self.recent) >= config.requests_per_minute:
+                    self.stats['throttled'] += 1
+                    return 429, delay
+                self.recent.append(now)
+
+            roll = self.rng.random()
+            if roll < config.error_rate:
+                self.stats['errors'] += 1
+                return 500, delay
+            if roll < config.error_rate + config.throttle_rate:
+                self.stats['throttled'] += 1
+                return 429, delay
+            return 200, delay
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='replay-server', daemon=True)
+        self.thread.start()
+        logger.info(f"Replay server serving {self.directory} at {self.base_url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = re.match(r'^/stats/([^/]+)/?$', url.path)
+        if not match:
+            self.send_body(404, '{"Message":"Unknown path"}')
+            return
+        endpoint = match.group(1).lower()
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+
+        status, delay = self.server.decide()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self.send_body(429, ERROR_BODY, {'Retry-After': str(self.server.config.retry_after)})
+            return
+        if status == 500:
+            self.send_body(500, ERROR_BODY)
+            return
+
+        path = payload_path(self.server.directory, endpoint, params)
+        if not os.path.exists(path):
+            with self.server.lock:
+                self.server.stats['missing'] += 1
+            logger.warning(f"No recorded payload for {endpoint} {params} ({path})")
+            self.send_body(404, '{"Message":"No recorded payload"}')
+            return
+        with open(path, 'r', encoding='utf-8') as f:
+            body = f.read()
+        with self.server.lock:
+            self.server.stats['served'] += 1
+        self.send_body(200, body)
+
+    def send_body(self, status, body, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def start_replay_server(directory, host='127.0.0.1', port=0, config=None):
+    """
+    Starts a replay server on a background thread and returns it
+    port=0 picks a free port; use server.base_url to configure the client
+    """
+    return ReplayServer((host, port), directory, config).start()
+
+# ----------------------------------------------------------------------------
+# Payload builders: turn frames (bundled CSV, synthetic games) into responses
+# shaped like the real endpoints, so they parse through nba_api unchanged
+# ----------------------------------------------------------------------------
+
+def _records(df):
+    # NaN -> None so the payload is valid JSON
+    return json.loads(df.to_json(orient='records'))
+
+def _result_set(name, df):
+    return {'name': name, 'headers': list(df.columns), 'rowSet': json.loads(df.to_json(orient='values'))}
+
+def playbyplay_payload(game_id, pbp_df):
+    actions = []
+    for row in _records(pbp_df):
+        row.pop('gameId', None)
+        actions.append(row)
+    return {'meta': {}, 'game': {'gameId': game_id, 'videoAvailable': 1, 'actions': actions}}
+
+def rotation_payload(rotation_dfs):
+    # GameRotation returns AwayTeam then HomeTeam
+    return {'resource': 'gamerotation', 'parameters': {},
+            'resultSets': [_result_set('AwayTeam', rotation_dfs[0]), _result_set('HomeTeam', rotation_dfs[1])]}
+
+def boxscore_payload(game_id, home_team_id, away_team_id, home_score, away_score):
+    def team(team_id, points):
+        return {'teamId': int(team_id), 'players': [], 'statistics': {'points': int(points)}}
+    return {'meta': {}, 'boxScoreTraditional': {'gameId': game_id,
+                                                'homeTeamId': int(home_team_id),
+                                                'awayTeamId': int(away_team_id),
+                                                'homeTeam': team(home_team_id, home_score),
+                                                'awayTeam': team(away_team_id, away_score)}}
+
+def game_finder_payload(games_df):
+    return {'resource': 'leaguegamefinderparameters', 'parameters': {},
+            'resultSets': [_result_set('LeagueGameFinderResults', games_df)]}
+
+def player_info_payload(player_id, first_name, last_name, position=None, height=None, weight=None):
+    info = {'PERSON_ID': int(player_id),
+            'FIRST_NAME': first_name,
+            'LAST_NAME': last_name,
+            'DISPLAY_FIRST_LAST': f'{first_name} {last_name}',
+            'PLAYER_SLUG': f'{first_name}-{last_name}'.lower(),
+            'POSITION': position,
+            'HEIGHT': height,
+            'WEIGHT': weight}
+    return {'resource': 'commonplayerinfo', 'parameters': {},
+            'resultSets': [{'name': 'CommonPlayerInfo', 'headers': list(info), 'rowSet': [list(info.values())]},
+                           {'name': 'PlayerHeadlineStats', 'headers': ['PLAYER_ID'], 'rowSet': [[int(player_id)]]},
+                           {'name': 'AvailableSeasons', 'headers': ['SEASON_ID'], 'rowSet': []}]}
@@ -0,0 +1,370 @@
+import json
+import os
+import time
+from datetime import datetime
+import logging
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from src.etl.stint_store import season_code, current_version, new_version, open_version
+
+logger = logging.getLogger(__name__)
+
+# Rotation patterns per team-season, built once from lineup_stints and kept on
+# disk as bit-packed on-court matrices: for every game, one row per player of
+# the team-season with one bit per game second (np.packbits, 8 seconds a byte).
+# A regulation game is 2880 seconds, 360 bytes per player, so a team-season of
+# 82 games x ~18 players is about 0.5 MB. Second s (the interval s..s+1) belongs
+# to the stint its midpoint falls in (start_secs < s + 0.5 <= end_secs), the
+# same half-open bounds lineup_stint_stats joins events on, so every second of
+# a game has exactly 5 players of each team on the court.
+# A store has one directory per season, swapped in atomically through its CURRENT
+# pointer file (src/etl/stint_store.py new_version):
+#   bits.npy     uint8 (rows, seconds / 8); a team's rows are one block, game-major,
+#                so bits[block].reshape(games, players, -1) is a view of the file
+#   teams.npy    TEAM_DTYPE: each team's block and its slices of games / players
+#   games.npy    GAME_DTYPE: game ids and lengths in seconds, per team in game order
+#   players.npy  int32 player ids, per team ascending
+#   meta.json    format version, width in seconds, the lineup_stints signature it was built from
+# Heatmaps, lineup minutes per period, substitution times and stagger between
+# two players are then NumPy reductions over a memory-mapped block (TeamRotation).
+
+STORE_VERSION = 1
+PERIOD_SECS = 720
+OVERTIME_SECS = 300
+REGULATION_SECS = 4 * PERIOD_SECS
+PLAYER_COLUMNS = ['player1_id', 'player2_id', 'player3_id', 'player4_id', 'player5_id']
+
+TEAM_DTYPE = np.dtype([('team_id', '<i4'),
+                       ('row_start', '<i8'),
+                       ('game_start', '<i4'),
+                       ('game_end', '<i4'),
+                       ('player_start', '<i4'),
+                       ('player_end', '<i4')])
+
+GAME_DTYPE = np.dtype([('game_id', '<i4'),
+                       ('seconds', '<i2')])
+
+STINTS_QUERY = """
+    SELECT ls.game_id, ls.team_id, ls.start_secs, ls.end_secs,
+           l.player1_id, l.player2_id, l.player3_id, l.player4_id, l.player5_id
+    FROM lineup_stints ls
+    INNER JOIN lineups l ON l.lineup_id = ls.lineup_id
+    WHERE (ls.game_id / 100000) % 100 = :code
+"""
+
+# Changes whenever a game of the season is loaded, reloaded (new stint ids) or deleted
+SIGNATURE_QUERY = """
+    SELECT COUNT(*) AS stints, COALESCE(MAX(stint_id), 0) AS max_stint_id, COALESCE(SUM(duration_secs), 0) AS seconds
+    FROM lineup_stints
+    WHERE (game_id / 100000) % 100 = :code
+"""
+
+def period_start(period):
+    # Game second a period starts at, overtimes are 5 minutes
+    if period <= 4:
+        return (period - 1) * PERIOD_SECS
+    return REGULATION_SECS + (period - 5) * OVERTIME_SECS
+
+def periods(width):
+    """
+    Period (1-4, 5+ for overtimes) of every game second 0..width-1
+    """
+    seconds = np.arange(width)
+    overtime = 5 + (seconds - REGULATION_SECS) // OVERTIME_SECS
+    return np.where(seconds < REGULATION_SECS, 1 + seconds // PERIOD_SECS, overtime).astype(np.int8)
+
+def occupancy(stints, width=None):
+    """
+    On-court matrix of one team's stints
+    stints: rows with game_id, start_secs, end_secs, player1_id..player5_id
+    width: seconds to cover (default the longest game)
+    Returns (game_ids, game_secs, player_ids, on_court), on_court a (games, players, width) bool array
+    """
+    game_ids, game_rows = np.unique(stints['game_id'].to_numpy(np.int64), return_inverse=True)
+    player_ids, player_cols = np.unique(stints[PLAYER_COLUMNS].to_numpy(np.int64), return_inverse=True)
+    # First and one-past-last second whose midpoint is inside (start_secs, end_secs]
+    starts = np.maximum(np.floor(stints['start_secs'].to_numpy(float) - 0.5).astype(np.int64) + 1, 0)
+    ends = np.floor(stints['end_secs'].to_numpy(float) - 0.5).astype(np.int64) + 1
+    game_secs = np.zeros(len(game_ids), dtype=np.int64)
+    np.maximum.at(game_secs, game_rows, ends)
+    width = width if width is not None else max(int(game_secs.max(initial=0)), REGULATION_SECS)
+    ends = np.minimum(ends, width)
+
+    # +1 where each of the 5 players' stint starts, -1 where it ends; a running sum above 0 is on court
+    delta = np.zeros((len(game_ids), len(player_ids), width + 1), dtype=np.int16)
+    rows = np.repeat(game_rows, 5)
+    cols = player_cols.ravel()
+    np.add.at(delta, (rows, cols, np.repeat(starts, 5)), 1)
+    np.add.at(delta, (rows, cols, np.repeat(ends, 5)), -1)
+    on_court = np.cumsum(delta, axis=2, dtype=np.int16)[:, :, :width] > 0
+    return game_ids, game_secs, player_ids, on_court
+
+def write_rotations(directory, stints, season, signature=None):
+    """
+    Builds and writes the rotations of every team in a season's stints (occupancy columns + team_id)
+    to directory/<season>, replacing what was there
+    signature: the lineup_stints signature the stints were read with (see export_rotations)
+    Returns the season directory
+    """
+    start = time.perf_counter()
+    stints = stints.sort_values(['team_id', 'game_id'], kind='stable')
+    game_secs = np.floor(stints['end_secs'].to_numpy(float) - 0.5).astype(np.int64) + 1
+    width = max(int(game_secs.max(initial=0)), REGULATION_SECS)
+    width += -width % 8  # whole bytes
+
+    teams, games, players, blocks = [], [], [], []
+    rows = 0
+    for team_id, team_stints in stints.groupby('team_id', sort=True):
+        game_ids, team_game_secs, player_ids, on_court = occupancy(team_stints, width)
+        teams.append((team_id, rows, len(games), len(games) + len(game_ids),
+                      len(players), len(players) + len(player_ids)))
+        games.extend(zip(game_ids.tolist(), team_game_secs.tolist()))
+        players.extend(player_ids.tolist())
+        blocks.append(np.packbits(on_court, axis=2).reshape(-1, width // 8))
+        rows += len(game_ids) * len(player_ids)
+    bits = np.concatenate(blocks) if blocks else np.zeros((0, width // 8), dtype=np.uint8)
+
+    season_dir = os.path.join(str(directory), season)
+    meta = {'version': STORE_VERSION,
+            'season': season,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'width': width,
+            'teams': len(teams),
+            'games': len(np.unique([game_id for game_id, _ in games])),
+            'stints': int(len(stints)),
+            'bytes': int(bits.nbytes),
+            'signature': signature}
+    with new_version(season_dir) as version_dir:
+        np.save(os.path.join(version_dir, 'bits.npy'), bits)
+        np.save(os.path.join(version_dir, 'teams.npy'), np.array(teams, dtype=TEAM_DTYPE))
+        np.save(os.path.join(version_dir, 'games.npy'), np.array(games, dtype=GAME_DTYPE))
+        np.save(os.path.join(version_dir, 'players.npy'), np.array(players, dtype=np.int32))
+        with open(os.path.join(version_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+    logger.info(f"Wrote rotations {season_dir}: {meta['teams']} teams, {meta['games']} games, "
+                f"{bits.nbytes / 1e6:.1f} MB in {time.perf_counter() - start:.1f}s")
+    return season_dir
+
+def read_meta(season_dir):
+    # meta.json of a season's current version, None if it was never built
+    def load(version_dir):
+        with open(os.path.join(version_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    try:
+        return open_version(season_dir, load)
+    except FileNotFoundError:
+        return None
+
+def stints_signature(engine, season):
+    with engine.connect() as conn:
+        row = conn.execute(text(SIGNATURE_QUERY), {'code': season_code(season)}).one()
+    return {'stints': int(row.stints), 'max_stint_id': int(row.max_stint_id), 'seconds': int(row.seconds)}
+
+def export_rotations(engine, directory, seasons, force=False):
+    """
+    Builds the rotations of each season from lineup_stints, skipping the seasons whose
+    stints are unchanged since they were built (force: rebuild them all)
+    Returns {season: 'built' / 'unchanged' / 'empty'}
+    """
+    results = {}
+    for season in seasons:
+        signature = stints_signature(engine, season)
+        if signature['stints'] == 0:
+            results[season] = 'empty'
+            continue
+        meta = None if force else read_meta(os.path.join(str(directory), season))
+        if meta is not None and meta.get('version') == STORE_VERSION and meta.get('signature') == signature:
+            results[season] = 'unchanged'
+            continue
+        with engine.connect() as conn:
+            stints = pd.read_sql(text(STINTS_QUERY), conn, params={'code': season_code(season)})
+        write_rotations(directory, stints, season, signature)
+        results[season] = 'built'
+    return results
+
+class SeasonRotations:
+    """
+    Read-only view of one season of a rotation store, arrays memory-mapped
+    """
+    def __init__(self, directory, season):
+        self.season = season
+        open_version(os.path.join(str(directory), season), self._open)
+
+    def _open(self, version_dir):
+        self.directory = version_dir
+        with open(os.path.join(self.directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported rotation store version {self.meta.get('version')} in {self.directory}")
+        self.width = self.meta['width']
+        self.bits = np.load(os.path.join(self.directory, 'bits.npy'), mmap_mode='r')
+        self.teams = np.load(os.path.join(self.directory, 'teams.npy'))
+        self.games = np.load(os.path.join(self.directory, 'games.npy'))
+        self.players = np.load(os.path.join(self.directory, 'players.npy'))
+
+    def team_ids(self):
+        return self.teams['team_id'].tolist()
+
+    def team(self, team_id):
+        match = np.flatnonzero(self.teams['team_id'] == int(team_id))
+        if not len(match):
+            raise KeyError(f"Team {team_id} has no rotations in {self.season}")
+        entry = self.teams[match[0]]
+        games = self.games[entry['game_start']:entry['game_end']]
+        player_ids = self.players[entry['player_start']:entry['player_end']]
+        rows = len(games) * len(player_ids)
+        bits = self.bits[entry['row_start']:entry['row_start'] + rows].reshape(len(games), len(player_ids), -1)
+        return TeamRotation(int(team_id), self.season, games['game_id'], games['seconds'], player_ids, bits, self.width)
+
+class TeamRotation:
+    """
+    One team-season: bits is the (games, players, width / 8) packed on-court matrix
+    game_ids / game_secs: (games,) ids and lengths; player_ids: (players,) ascending
+    """
+    def __init__(self, team_id, season, game_ids, game_secs, player_ids, bits, width):
+        self.team_id = team_id
+        self.season = season
+        self.game_ids = np.asarray(game_ids)
+        self.game_secs = np.asarray(game_secs, dtype=np.int64)
+        self.player_ids = np.asarray(player_ids)
+        self.bits = bits
+        self.width = width
+
+    def on_court(self, start=0, end=None, players=None):
+        """
+        Unpacked (games, players, end - start) bool matrix of the seconds start..end-1
+        players: only these player ids, in the order given
+        """
+        end = self.width if end is None else min(end, self.width)
+        bits = self.bits
+        if players is not None:
+            bits = bits[:, self._columns(players)]
+        # Only the bytes covering the window are unpacked
+        first = start // 8
+        unpacked = np.unpackbits(bits[:, :, first:(end + 7) // 8], axis=2)
+        return unpacked[:, :, start - first * 8:end - first * 8].astype(bool)
+
+    def _columns(self, players):
+        columns = np.searchsorted(self.player_ids, players)
+        columns = np.minimum(columns, len(self.player_ids) - 1)
+        missing = self.player_ids[columns] != np.asarray(players)
+        if missing.any():
+            raise KeyError(f"Players {np.asarray(players)[missing].tolist()} did not play for {self.team_id} in {self.season}")
+        return columns
+
+    def played(self):
+        # (games, width) True for the seconds each game lasted
+        return np.arange(self.width)[None, :] < self.game_secs[:, None]
+
+    def heatmap(self, bucket=60):
+        """
+        Share of the games each player was on the court, per bucket of game seconds (default minutes)
+        Returns a dataframe indexed by player_id with one column per bucket (its starting minute)
+        Games are only counted for the buckets they lasted into (overtimes)
+        """
+        on_court = self.on_court()
+        buckets = self.width // bucket
+        seconds = on_court[:, :, :buckets * bucket].reshape(len(self.game_ids), len(self.player_ids), buckets, bucket).sum(axis=(0, 3))
+        played = self.played()[:, :buckets * bucket].reshape(len(self.game_ids), buckets, bucket).sum(axis=(0, 2))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            share = np.where(played > 0, seconds / played, np.nan)
+        # Columns are the minute each bucket starts at
+        columns = np.arange(buckets) * bucket / 60
+        columns = columns.astype(int) if bucket % 60 == 0 else columns.round(2)
+        keep = played > 0
+        return pd.DataFrame(share[:, keep], index=pd.Index(self.player_ids, name='player_id'), columns=columns[keep])
+
+    def minutes(self):
+        """
+        Minutes per period for every player: games, minutes and minutes per game played, by period
+        """
+        on_court = self.on_court()
+        period_of = periods(self.width)
+        rows = []
+        for period in np.unique(period_of[:max(int(self.game_secs.max(initial=0)), 1)]):
+            seconds = on_court[:, :, period_of == period].sum(axis=2)
+            rows.append(pd.DataFrame({'player_id': self.player_ids,
+                                      'period': int(period),
+                                      'games': (seconds > 0).sum(axis=0),
+                                      'minutes': seconds.sum(axis=0) / 60}))
+        df = pd.concat(rows, ignore_index=True)
+        df['minutes_per_game'] = (df['minutes'] / df['games'].where(df['games'] > 0)).round(2)
+        return df
+
+    def lineup_minutes(self, by_period=True):
+        """
+        Minutes of every five-man lineup the occupancy shows, per period (or per game when not by_period)
+        Returns player1_id..player5_id (ascending, the lineup_key order), period, minutes, games
+        """
+        if len(self.player_ids) > 63:
+            raise ValueError(f"{len(self.player_ids)} players in one team-season, lineup masks hold 63")
+        on_court = self.on_court()
+        # One bit per player column: the lineup on the court at every (game, second)
+        masks = np.zeros((len(self.game_ids), self.width), dtype=np.uint64)
+        for column in range(len(self.player_ids)):
+            masks |= on_court[:, column, :].astype(np.uint64) << np.uint64(column)
+        period_of = periods(self.width) if by_period else np.zeros(self.width, dtype=np.int8)
+        games = np.broadcast_to(np.arange(len(self.game_ids))[:, None], masks.shape)
+        valid = self.played() & (masks != 0)
+        frame = pd.DataFrame({'mask': masks[valid],
+                              'period': np.broadcast_to(period_of, masks.shape)[valid],
+                              'game': games[valid]})
+        grouped = frame.groupby(['mask', 'period'], sort=False).agg(seconds=('game', 'size'), games=('game', 'nunique')).reset_index()
+
+        # Decode each mask back to its players; seconds without exactly 5 (data gaps) are dropped
+        bits = (grouped['mask'].to_numpy(np.uint64)[:, None] >> np.arange(len(self.player_ids), dtype=np.uint64)) & np.uint64(1)
+        five = bits.sum(axis=1) == 5
+        bits, grouped = bits[five], grouped[five].reset_index(drop=True)
+        columns = np.argsort(-bits.astype(np.int8), axis=1, kind='stable')[:, :5]
+        lineups = pd.DataFrame(self.player_ids[columns], columns=PLAYER_COLUMNS)
+        lineups['period'] = grouped['period'].to_numpy()
+        lineups['minutes'] = grouped['seconds'].to_numpy() / 60
+        lineups['games'] = grouped['games'].to_numpy()
+        if not by_period:
+            lineups = lineups.drop(columns='period')
+        return lineups.sort_values('minutes', ascending=False, ignore_index=True)
+
+    def substitutions(self):
+        """
+        Every check-in and check-out: game_id, player_id, seconds, period, kind ('in' / 'out')
+        The start and end of each game are not substitutions and are left out
+        """
+        on_court = self.on_court().astype(np.int8)
+        change = np.diff(on_court, axis=2, prepend=0, append=0)
+        game, column, second = np.nonzero(change)
+        kind = change[game, column, second]
+        # Entering at tip-off, and leaving when the game (or the matrix) ends
+        keep = ~(((kind == 1) & (second == 0)) | ((kind == -1) & (second >= self.game_secs[game])))
+        game, column, second, kind = game[keep], column[keep], second[keep], kind[keep]
+        return pd.DataFrame({'game_id': self.game_ids[game],
+                             'player_id': self.player_ids[column],
+                             'seconds': second,
+                             'period': periods(self.width + 1)[second],
+                             'kind': np.where(kind == 1, 'in', 'out')})
+
+    def stagger(self, player_a, player_b):
+        """
+        Seconds per game with both players on the court, only one of them, or neither
+        Returns game_id, together, only_a, only_b, neither
+        """
+        pair = self.on_court(players=[player_a, player_b])
+        a, b = pair[:, 0], pair[:, 1]
+        played = self.played()
+        return pd.DataFrame({'game_id': self.game_ids,
+                             'together': (a & b).sum(axis=1),
+                             'only_a': (a & ~b).sum(axis=1),
+                             'only_b': (~a & b).sum(axis=1),
+                             'neither': (~a & ~b & played).sum(axis=1)})
+
+def open_rotations(directory, season):
+    return SeasonRotations(directory, season)
+
+def stored_seasons(directory):
+    # Seasons with a built store under directory
+    if not os.path.isdir(str(directory)):
+        return []
+    return sorted(name for name in os.listdir(str(directory))
+                  if os.path.exists(os.path.join(current_version(os.path.join(str(directory), name)), 'meta.json')))
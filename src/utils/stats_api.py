@@ -0,0 +1,43 @@
+import os
+import logging
+from nba_api.stats.library.http import NBAStatsHTTP
+
+logger = logging.getLogger(__name__)
+
+# Set to e.g. http://127.0.0.1:8765 to send every stats.nba.com request to a replay server
+STATS_BASE_URL_ENV = 'NBA_STATS_BASE_URL'
+
+LIVE_BASE_URL = 'https://stats.nba.com/stats/{endpoint}'
+
+_send_api_request = NBAStatsHTTP.send_api_request
+
+def configure_stats_api(base_url=None):
+    """
+    Points every nba_api stats endpoint (PlayByPlayV3, GameRotation, ...) at base_url
+    base_url: server root like 'http://127.0.0.1:8765'; defaults to $NBA_STATS_BASE_URL,
+              and to the live stats.nba.com API when neither is set
+    """
+    base_url = base_url or os.getenv(STATS_BASE_URL_ENV)
+    if base_url:
+        url = base_url.rstrip('/') + '/stats/{endpoint}'
+    else:
+        url = LIVE_BASE_URL
+    if NBAStatsHTTP.base_url != url:
+        NBAStatsHTTP.base_url = url
+        if url != LIVE_BASE_URL:
+            logger.info(f"Using stats API at {base_url}")
+    return url
+
+def set_request_limiter(limiter):
+    """
+    Makes every blocking nba_api stats request wait for limiter.acquire() first
+    limiter: RateLimiter / SharedRateLimiter, or None to remove the limit again
+    """
+    if limiter is None:
+        NBAStatsHTTP.send_api_request = _send_api_request
+        return
+
+    def send_api_request(self, *args, **kwargs):
+        limiter.acquire()
+        return _send_api_request(self, *args, **kwargs)
+    NBAStatsHTTP.send_api_request = send_api_request
@@ -0,0 +1,260 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import logging
+
+import pandas as pd
+from sqlalchemy import text
+
+from src.etl.database_loader import get_data_version
+from src.etl.stint_store import season_code
+
+logger = logging.getLogger(__name__)
+
+# Read-only HTTP service for the dashboard. Lineup, player and game summaries
+# are computed from the per game tables (lineup_game_stats, player_game_stats)
+# instead of the stacked views, cached in memory and tagged with
+# etl_data_version. The loader bumps the version when it finishes a batch of
+# games: the next request recomputes, everything in between is a cache hit, and
+# clients sending If-None-Match get a 304 without any query at all.
+#   GET /lineups?season=2024-25&team_id=1610612760&format=csv
+#   GET /players?season=2024-25
+#   GET /games?season=2024-25&game_id=0042400407
+#   GET /version
+
+RATINGS = """
+    CASE WHEN SUM({p}possessions) > 0
+         THEN ROUND(SUM({p}points_scored)::DECIMAL / SUM({p}possessions) * 100, 2)::FLOAT END AS offensive_rating,
+    CASE WHEN SUM({p}possessions) > 0
+         THEN ROUND(SUM({p}points_allowed)::DECIMAL / SUM({p}possessions) * 100, 2)::FLOAT END AS defensive_rating,
+    CASE WHEN SUM({p}possessions) > 0
+         THEN ROUND((SUM({p}points_scored) - SUM({p}points_allowed))::DECIMAL / SUM({p}possessions) * 100, 2)::FLOAT END AS net_rating
+"""
+
+QUERIES = {
+    'lineups': """
+        WITH totals AS (
+            SELECT lgs.lineup_id, lgs.team_id,
+                   COUNT(*) AS games_played,
+                   SUM(lgs.stints) AS total_stints,
+                   SUM(lgs.seconds) AS total_seconds,
+                   ROUND(SUM(lgs.seconds)::DECIMAL / 60, 2)::FLOAT AS total_minutes,
+                   SUM(lgs.points_scored) AS total_points_scored,
+                   SUM(lgs.points_allowed) AS total_points_allowed,
+                   SUM(lgs.points_scored - lgs.points_allowed) AS total_plus_minus,
+                   SUM(lgs.possessions) AS total_possessions,
+                   """ + RATINGS.format(p='lgs.') + """
+            FROM lineup_game_stats lgs
+            {where}
+            GROUP BY lgs.lineup_id, lgs.team_id
+        )
+        SELECT t.*, l.player1_id, l.player2_id, l.player3_id, l.player4_id, l.player5_id,
+               concat_ws(', ', p1.player_name, p2.player_name, p3.player_name, p4.player_name, p5.player_name) AS lineup_names
+        FROM totals t
+        INNER JOIN lineups l ON l.lineup_id = t.lineup_id
+        LEFT JOIN players p1 ON p1.player_id = l.player1_id
+        LEFT JOIN players p2 ON p2.player_id = l.player2_id
+        LEFT JOIN players p3 ON p3.player_id = l.player3_id
+        LEFT JOIN players p4 ON p4.player_id = l.player4_id
+        LEFT JOIN players p5 ON p5.player_id = l.player5_id
+        ORDER BY t.total_seconds DESC
+    """,
+    'players': """
+        SELECT pgs.player_id, p.player_name, p.position, pgs.team_id,
+               COUNT(*) AS games_played,
+               SUM(pgs.stints) AS stints_played,
+               SUM(pgs.seconds) AS total_seconds,
+               ROUND(SUM(pgs.seconds)::DECIMAL / 60, 2)::FLOAT AS total_minutes,
+               SUM(pgs.points_scored) AS on_court_points_scored,
+               SUM(pgs.points_allowed) AS on_court_points_allowed,
+               SUM(pgs.points_scored - pgs.points_allowed) AS on_court_plus_minus,
+               """ + RATINGS.format(p='pgs.') + """,
+               ROUND(SUM(pgs.points_scored - pgs.points_allowed)::DECIMAL / NULLIF(SUM(pgs.seconds), 0) * 2880, 2)::FLOAT AS plus_minus_per_48min
+        FROM player_game_stats pgs
+        LEFT JOIN players p ON p.player_id = pgs.player_id
+        {where}
+        GROUP BY pgs.player_id, p.player_name, p.position, pgs.team_id
+        ORDER BY total_seconds DESC
+    """,
+    'games': """
+        SELECT lgs.game_id, g.home_team_id, g.away_team_id, g.home_score, g.away_score,
+               lgs.team_id, lgs.lineup_id,
+               CASE
+                   WHEN lgs.team_id = g.home_team_id THEN CASE WHEN g.home_score > g.away_score THEN 'W' ELSE 'L' END
+                   WHEN lgs.team_id = g.away_team_id THEN CASE WHEN g.away_score > g.home_score THEN 'W' ELSE 'L' END
+               END AS game_result,
+               lgs.stints, lgs.seconds, lgs.points_scored, lgs.points_allowed,
+               lgs.points_scored - lgs.points_allowed AS plus_minus,
+               lgs.possessions
+        FROM lineup_game_stats lgs
+        INNER JOIN games g ON g.game_id = lgs.game_id
+        {where}
+        ORDER BY lgs.game_id, lgs.team_id, lgs.seconds DESC
+    """,
+}
+
+# Table alias the filters apply to, per endpoint
+ALIASES = {'lineups': 'lgs', 'players': 'pgs', 'games': 'lgs'}
+
+def build_query(endpoint, params):
+    """
+    Returns (sql, bind params) for an endpoint and its filters (season, team_id, game_id)
+    Raises ValueError for an unknown endpoint or a malformed filter
+    """
+    if endpoint not in QUERIES:
+        raise ValueError(f"Unknown endpoint {endpoint}")
+    alias = ALIASES[endpoint]
+    clauses = []
+    binds = {}
+    if params.get('season'):
+        clauses.append(f"({alias}.game_id / 100000) % 100 = :season_code")
+        binds['season_code'] = season_code(params['season'])
+    if params.get('team_id'):
+        clauses.append(f"{alias}.team_id = :team_id")
+        binds['team_id'] = int(params['team_id'])
+    if params.get('game_id'):
+        clauses.append(f"{alias}.game_id = :game_id")
+        binds['game_id'] = int(params['game_id'])
+    where = 'WHERE ' + ' AND '.join(clauses) if clauses else ''
+    return QUERIES[endpoint].format(where=where), binds
+
+def make_etag(version, endpoint, params):
+    # Same data version + same request = same representation
+    key = json.dumps([version, endpoint, sorted(params.items())])
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + '"'
+
+class SummaryCache:
+    """
+    Computed summaries keyed by (endpoint, filters, format), valid for one data version
+    version_ttl: seconds the data version read from the database is trusted before asking again
+    """
+    def __init__(self, engine, version_ttl=2.0):
+        self.engine = engine
+        self.version_ttl = version_ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.cached_version = None
+        self.version_checked_at = 0.0
+        self.stats = {'requests': 0, 'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    def version(self):
+        now = time.monotonic()
+        if now - self.version_checked_at > self.version_ttl:
+            version = get_data_version(self.engine)
+            with self.lock:
+                if version != self.cached_version:
+                    if self.cached_version is not None:
+                        logger.info(f"Data version {self.cached_version} -> {version}, dropping {len(self.entries)} cached summaries")
+                    self.entries.clear()
+                    self.cached_version = version
+                self.version_checked_at = now
+        return self.cached_version
+
+    def body(self, endpoint, params, output_format):
+        """
+        Returns (version, body bytes, content type) for a request, computing it on a miss
+        """
+        version = self.version()
+        key = (endpoint, tuple(sorted(params.items())), output_format)
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.stats['hits'] += 1
+            return entry
+
+        self.stats['misses'] += 1
+        query, binds = build_query(endpoint, params)
+        start = time.perf_counter()
+        df = pd.read_sql(text(query), self.engine, params=binds)
+        if output_format == 'csv':
+            entry = (version, df.to_csv(index=False).encode('utf-8'), 'text/csv; charset=utf-8')
+        else:
+            entry = (version, df.to_json(orient='records').encode('utf-8'), 'application/json')
+        logger.info(f"Computed {endpoint} {params} ({len(df)} rows) in {time.perf_counter() - start:.2f}s")
+        with self.lock:
+            self.entries[key] = entry
+        return entry
+
+    def warm(self, endpoints=None, output_format='json'):
+        # Computes the unfiltered summaries up front so the first refresh is a hit
+        for endpoint in endpoints or QUERIES:
+            self.body(endpoint, {}, output_format)
+
+class SummaryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, engine, version_ttl=2.0):
+        super().__init__(address, SummaryHandler)
+        self.cache = SummaryCache(engine, version_ttl)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name='summary-server', daemon=True)
+        self.thread.start()
+        logger.info(f"Summary server at {self.base_url}")
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+class SummaryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.strip('/')
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        output_format = params.pop('format', 'json')
+        cache = self.server.cache
+        cache.stats['requests'] += 1
+
+        try:
+            if endpoint == 'version':
+                self.send_body(200, json.dumps({'version': cache.version(), 'stats': cache.stats}).encode('utf-8'), 'application/json')
+                return
+            if endpoint not in QUERIES or output_format not in ('json', 'csv'):
+                self.send_body(404, b'{"error": "unknown endpoint or format"}', 'application/json')
+                return
+            build_query(endpoint, params)  # validate the filters before answering from the ETag
+
+            etag = make_etag(cache.version(), endpoint, dict(params, format=output_format))
+            if self.headers.get('If-None-Match') == etag:
+                cache.stats['not_modified'] += 1
+                self.send_body(304, b'', None, {'ETag': etag})
+                return
+            version, body, content_type = cache.body(endpoint, params, output_format)
+            self.send_body(200, body, content_type, {'ETag': make_etag(version, endpoint, dict(params, format=output_format))})
+        except ValueError as e:
+            self.send_body(400, json.dumps({'error': str(e)}).encode('utf-8'), 'application/json')
+        except Exception as e:
+            logger.error(f"Failed to serve {self.path}: {type(e).__name__}: {e}")
+            self.send_body(500, json.dumps({'error': type(e).__name__}).encode('utf-8'), 'application/json')
+
+    def send_body(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        # Clients may keep a copy but must revalidate it with If-None-Match
+        self.send_header('Cache-Control', 'no-cache')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def start_summary_server(engine, host='127.0.0.1', port=0, version_ttl=2.0):
+    """
+    Starts a summary server on a background thread and returns it (port=0 picks a free port)
+    """
+    return SummaryServer((host, port), engine, version_ttl).start()
@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+# Generates play-by-play and rotation frames shaped like the PlayByPlayV3 and
+# GameRotation responses, so the transform and load code can be exercised
+# (and benchmarked) without the NBA API. Numbers are plausible, not realistic
+# basketball: ~350 events and ~25 substitutions per team per game.
+
+PBP_COLUMNS = ['gameId', 'actionNumber', 'clock', 'period', 'teamId', 'teamTricode', 'personId',
+               'playerName', 'playerNameI', 'xLegacy', 'yLegacy', 'shotDistance', 'shotResult',
+               'isFieldGoal', 'scoreHome', 'scoreAway', 'pointsTotal', 'location', 'description',
+               'actionType', 'subType', 'videoAvailable', 'shotValue', 'actionId']
+
+ROTATION_COLUMNS = ['GAME_ID', 'TEAM_ID', 'TEAM_CITY', 'TEAM_NAME', 'PERSON_ID', 'PLAYER_FIRST',
+                    'PLAYER_LAST', 'IN_TIME_REAL', 'OUT_TIME_REAL', 'PLAYER_PTS', 'PT_DIFF', 'USG_PCT']
+
+FIRST_TEAM_ID = 1610612737
+FIRST_PLAYER_ID = 1700000
+ROSTER_SIZE = 13
+GAMES_PER_SEASON = 1230
+PERIOD_SECS = 720
+
+def make_league(n_teams=30):
+    """
+    Returns a list of team dicts with a 13-man roster each
+    Player last names are unique across the league so substitution descriptions resolve
+    """
+    league = []
+    for t in range(n_teams):
+        team_id = FIRST_TEAM_ID + t
+        roster = [{'id': FIRST_PLAYER_ID + t * 100 + j,
+                   'first': f'P{j}',
+                   'last': f'Synth{t:02d}{j:02d}'} for j in range(ROSTER_SIZE)]
+        league.append({'id': team_id, 'tricode': f'T{t:02d}', 'city': f'City{t:02d}', 'name': f'Team{t:02d}', 'roster': roster})
+    return league
+
+def _format_clock(seconds_left):
+    minutes = int(seconds_left // 60)
+    return f'PT{minutes:02d}M{seconds_left - minutes * 60:05.2f}S'
+
+def _rotation(team, rng):
+    """
+    Returns (rotation_rows, sub_events) for one team
+    sub_events: list of (game_secs, player_in, player_out)
+    """
+    roster = team['roster']
+    on_court = list(range(5))
+    bench = list(range(5, ROSTER_SIZE))
+    in_time = {p: 0.0 for p in on_court}
+    rows = []
+    subs = []
+
+    t = float(rng.integers(120, 240))
+    while t < 4 * PERIOD_SECS - 30:
+        # 1-2 players change at each stoppage; nobody comes straight back in or goes straight out
+        out_choices = rng.choice(5, size=int(rng.integers(1, 3)), replace=False)
+        in_choices = rng.choice(len(bench), size=len(out_choices), replace=False)
+        for out_idx, in_idx in zip(out_choices, in_choices):
+            player_out = on_court[out_idx]
+            player_in = bench[in_idx]
+            rows.append((player_out, in_time.pop(player_out), t))
+            on_court[out_idx] = player_in
+            bench[in_idx] = player_out
+            in_time[player_in] = t
+            subs.append((t, roster[player_in], roster[player_out]))
+        t += float(rng.integers(90, 240))
+    for p in on_court:
+        rows.append((p, in_time[p], 4.0 * PERIOD_SECS))
+
+    rotation = pd.DataFrame([{'GAME_ID': None,
+                              'TEAM_ID': team['id'],
+                              'TEAM_CITY': team['city'],
+                              'TEAM_NAME': team['name'],
+                              'PERSON_ID': roster[p]['id'],
+                              'PLAYER_FIRST': roster[p]['first'],
+                              'PLAYER_LAST': roster[p]['last'],
+                              # GameRotation reports times in tenths of a second
+                              'IN_TIME_REAL': float(start * 10),
+                              'OUT_TIME_REAL': float(end * 10),
+                              'PLAYER_PTS': 0,
+                              'PT_DIFF': 0.0,
+                              'USG_PCT': 0.0} for p, start, end in rows], columns=ROTATION_COLUMNS)
+    return rotation, subs
+
+def _on_court_at(rotation, team, t):
+    ids = rotation.loc[(rotation['IN_TIME_REAL'] <= t * 10) & (rotation['OUT_TIME_REAL'] > t * 10), 'PERSON_ID']
+    by_id = {p['id']: p for p in team['roster']}
+    return [by_id[p] for p in ids]
+
+def generate_game(game_id, home, away, seed=None):
+    """
+    Returns (pbp_df, rotation_dfs) for one synthetic game between two teams from make_league
+    rotation_dfs matches GameRotation.get_data_frames(): [away_df, home_df]
+    """
+    rng = np.random.default_rng(seed)
+    teams = [home, away]
+    rotations = []
+    events = []
+    for team in teams:
+        rotation, subs = _rotation(team, rng)
+        rotation['GAME_ID'] = game_id
+        rotations.append(rotation)
+        for t, player_in, player_out in subs:
+            events.append((t, 0, 'sub', team, player_in, player_out))
+
+    # Possessions alternate between the teams every 8-20 seconds
+    t = 0.0
+    possession = 0
+    while True:
+        t += float(rng.integers(8, 21))
+        if t >= 4 * PERIOD_SECS:
+            break
+        events.append((t, 1, 'play', teams[possession], None, None))
+        possession = 1 - possession
+    for period in range(1, 5):
+        events.append(((period - 1) * PERIOD_SECS, -1, 'start', None, period, None))
+        events.append((period * PERIOD_SECS, 2, 'end', None, period, None))
+    events.sort(key=lambda e: (e[0], e[1]))
+
+    rows = []
+    score = {home['id']: 0, away['id']: 0}
+    team_rotation = {home['id']: rotations[0], away['id']: rotations[1]}
+
+    def add(t, team, player, action_type, sub_type='', description='', shot_value=0, shot_result=None, period=None):
+        period = period or min(4, int(t // PERIOD_SECS) + 1)
+        seconds_left = period * PERIOD_SECS - t
+        rows.append({'gameId': game_id,
+                     'clock': _format_clock(seconds_left),
+                     'period': period,
+                     'teamId': team['id'] if team else 0,
+                     'teamTricode': team['tricode'] if team else None,
+                     'personId': player['id'] if player else 0,
+                     'playerName': player['last'] if player else None,
+                     'playerNameI': f"{player['first']}. {player['last']}" if player else None,
+                     'xLegacy': 0, 'yLegacy': 0, 'shotDistance': 0,
+                     'shotResult': shot_result,
+                     'isFieldGoal': int(action_type in ('Made Shot', 'Missed Shot')),
+                     'scoreHome': float(score[home['id']]),
+                     'scoreAway': float(score[away['id']]),
+                     'pointsTotal': score[home['id']] + score[away['id']],
+                     'location': ('h' if team['id'] == home['id'] else 'v') if team else None,
+                     'description': description,
+                     'actionType': action_type,
+                     'subType': sub_type,
+                     'videoAvailable': 1,
+                     'shotValue': shot_value})
+
+    for t, _, kind, team, a, b in events:
+        if kind == 'start':
+            add(t, None, None, 'period', 'start', f'Start of Period {a}', period=a)
+        elif kind == 'end':
+            add(t, None, None, 'period', 'end', f'End of Period {a}', period=a)
+        elif kind == 'sub':
+            # PlayByPlayV3 attributes substitutions to the player going out
+            add(t, team, b, 'Substitution', description=f"SUB: {a['last']} FOR {b['last']}")
+        else:
+            on_court = _on_court_at(team_rotation[team['id']], team, t)
+            shooter = on_court[int(rng.integers(0, len(on_court)))]
+            roll = rng.random()
+            if roll < 0.12:
+                add(t, team, shooter, 'Turnover', 'Bad Pass', f"{shooter['last']} Bad Pass Turnover")
+                continue
+            shot_value = 3 if rng.random() < 0.38 else 2
+            if rng.random() < 0.47:
+                score[team['id']] += shot_value
+                add(t, team, shooter, 'Made Shot', 'Jump Shot', f"{shooter['last']} Jump Shot ({shot_value} PTS)", shot_value, 'Made')
+            else:
+                add(t, team, shooter, 'Missed Shot', 'Jump Shot', f"MISS {shooter['last']} Jump Shot", shot_value, 'Missed')
+                rebounder = on_court[int(rng.integers(0, len(on_court)))]
+                add(t, team, rebounder, 'Rebound', 'Normal Rebound', f"{rebounder['last']} REBOUND")
+
+    pbp = pd.DataFrame(rows)
+    pbp['actionNumber'] = np.arange(2, 2 * len(pbp) + 2, 2)
+    pbp['actionId'] = np.arange(1, len(pbp) + 1)
+    pbp = pbp[PBP_COLUMNS]
+    return pbp, [rotations[1], rotations[0]]
+
+def generate_season(n_games=GAMES_PER_SEASON, seed=0, league=None):
+    """
+    Yields (game_id, pbp_df, rotation_dfs) for n_games synthetic regular-season games
+    Games are generated lazily so a full 1,230-game season never sits in memory at once
+    """
+    league = league or make_league()
+    rng = np.random.default_rng(seed)
+    for g in range(n_games):
+        home, away = rng.choice(len(league), size=2, replace=False)
+        game_id = f'00299{g + 1:05d}'
+        pbp, rotation_dfs = generate_game(game_id, league[home], league[away], seed=seed * 100000 + g)
+        yield game_id, pbp, rotation_dfs